@@ -33,8 +33,9 @@ async def update(
     user_update: UserUpdate,
     user_service: UserServiceDep,
 ):
-    await user_service.update(user_id=auth_payload.user_id, user_update=user_update)
-    return await user_service.get(user_id=auth_payload.user_id)
+    return await user_service.update(
+        user_id=auth_payload.user_id, user_update=user_update
+    )
 
 
 @router.put("/password", response_model=UserResponse)
@@ -43,7 +44,6 @@ async def update_password(
     user_update_password: UserUpdatePassword,
     user_service: UserServiceDep,
 ):
-    await user_service.update_password(
+    return await user_service.update_password(
         user_id=auth_payload.user_id, user_update_password=user_update_password
     )
-    return await user_service.get(user_id=auth_payload.user_id)
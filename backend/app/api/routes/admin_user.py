@@ -1,15 +1,24 @@
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, Request
 from pydantic import UUID4
 
 from app.api.schemas.user import (
+    UserBulkIds,
+    UserBulkUpdateRole,
     UserCreate,
     UserResponse,
     UserUpdatePassword,
     UserUpdateRole,
 )
-from app.core.paging import PagingDep, PagingResponse
+from app.core.bulk import BulkResult, iter_rows
+from app.core.paging import (
+    CursorPagingDep,
+    CursorPagingResponse,
+    PagingDep,
+    PagingResponse,
+)
+from app.core.responses import ModelResponse
 from app.database.models.user import Role, UserFilter
 from app.services.user import UserServiceDep
 
@@ -18,8 +27,50 @@ router = APIRouter()
 
 @router.post("/", response_model=UserResponse)
 async def create(user_create: UserCreate, user_service: UserServiceDep):
-    id = await user_service.create(user_create)
-    return await user_service.get(user_id=id)
+    return await user_service.create(user_create)
+
+
+@router.post("/import", response_model=BulkResult)
+async def import_users(request: Request, user_service: UserServiceDep):
+    rows = iter_rows(request.stream(), request.headers.get("content-type", ""))
+    return await user_service.import_users(rows)
+
+
+@router.put("/bulk/role", response_model=BulkResult)
+async def update_role_many(
+    user_bulk_update_role: UserBulkUpdateRole, user_service: UserServiceDep
+):
+    return await user_service.update_role_many(user_bulk_update_role)
+
+
+@router.put("/bulk/deactivate", response_model=BulkResult)
+async def deactivate_many(user_bulk_ids: UserBulkIds, user_service: UserServiceDep):
+    return await user_service.deactivate_many(user_bulk_ids)
+
+
+@router.put("/bulk/reactivate", response_model=BulkResult)
+async def reactivate_many(user_bulk_ids: UserBulkIds, user_service: UserServiceDep):
+    return await user_service.reactivate_many(user_bulk_ids)
+
+
+@router.get("/cursor", response_model=CursorPagingResponse[UserResponse])
+async def get_many_by_cursor(
+    user_service: UserServiceDep,
+    paging: CursorPagingDep,
+    search_text: str = Query(None),
+    search_mode: Literal["contains", "prefix", "token"] = Query("contains"),
+    role: Annotated[Role | None, Query()] = None,
+    is_deleted: bool | None = Query(None),
+):
+    filter = UserFilter(
+        search_text=search_text,
+        search_mode=search_mode,
+        role=role,
+        is_deleted=is_deleted,
+    )
+    return ModelResponse(
+        await user_service.get_many_by_cursor(paging=paging, filter=filter)
+    )
 
 
 @router.get("/{user_id}", response_model=UserResponse)
@@ -32,14 +83,23 @@ async def get_many(
     user_service: UserServiceDep,
     paging: PagingDep,
     search_text: str = Query(None),
+    search_mode: Literal["contains", "prefix", "token"] = Query("contains"),
+    rank: bool = Query(False),
     role: Annotated[Role | None, Query()] = None,
     is_deleted: bool | None = Query(None),
 ):
-    filter = UserFilter(search_text=search_text, role=role, is_deleted=is_deleted)
-    items = await user_service.get_many(paging=paging, filter=filter)
-    total = await user_service.count(filter=filter)
-    return PagingResponse[UserResponse](
-        total=total, page=paging.page, page_size=paging.page_size, items=items
+    filter = UserFilter(
+        search_text=search_text,
+        search_mode=search_mode,
+        rank=rank,
+        role=role,
+        is_deleted=is_deleted,
+    )
+    items, total = await user_service.get_many_with_total(paging=paging, filter=filter)
+    return ModelResponse(
+        PagingResponse[UserResponse](
+            total=total, page=paging.page, page_size=paging.page_size, items=items
+        )
     )
 
 
@@ -49,8 +109,7 @@ async def update_password(
     user_update_password: UserUpdatePassword,
     user_service: UserServiceDep,
 ):
-    await user_service.update_password(user_id, user_update_password)
-    return await user_service.get(user_id=user_id)
+    return await user_service.update_password(user_id, user_update_password)
 
 
 @router.put("/{user_id}/role", response_model=UserResponse)
@@ -59,17 +118,14 @@ async def update_role(
     user_update_role: UserUpdateRole,
     user_service: UserServiceDep,
 ):
-    await user_service.update_role(user_id, user_update_role)
-    return await user_service.get(user_id=user_id)
+    return await user_service.update_role(user_id, user_update_role)
 
 
 @router.put("/{user_id}/deactivate", response_model=UserResponse)
 async def deactivate(user_id: UUID4, user_service: UserServiceDep):
-    await user_service.deactivate(user_id)
-    return await user_service.get(user_id=user_id)
+    return await user_service.deactivate(user_id)
 
 
 @router.put("/{user_id}/reactivate", response_model=UserResponse)
 async def reactivate(user_id: UUID4, user_service: UserServiceDep):
-    await user_service.reactivate(user_id)
-    return await user_service.get(user_id=user_id)
+    return await user_service.reactivate(user_id)
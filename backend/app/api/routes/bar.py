@@ -0,0 +1,36 @@
+from datetime import datetime
+from typing import Annotated
+
+from fastapi import APIRouter, Query
+
+from app.api.schemas.bar import BarResponse, BarsResponse
+from app.core.responses import ModelResponse
+from app.database.models.bar import Resolution
+from app.services.bar import BarServiceDep
+
+router = APIRouter()
+
+
+@router.get("/", response_model=BarsResponse)
+async def get_many(
+    bar_service: BarServiceDep,
+    symbols: Annotated[str, Query(description="Comma-separated symbols")],
+    start: Annotated[datetime, Query(alias="from")],
+    end: Annotated[datetime, Query(alias="to")],
+    resolution: Annotated[Resolution, Query()] = "1m",
+):
+    return ModelResponse(
+        await bar_service.get_many(symbols.split(","), resolution, start, end)
+    )
+
+
+@router.get("/{symbol}", response_model=list[BarResponse])
+async def get(
+    symbol: str,
+    bar_service: BarServiceDep,
+    start: Annotated[datetime, Query(alias="from")],
+    end: Annotated[datetime, Query(alias="to")],
+    resolution: Annotated[Resolution, Query()] = "1m",
+):
+    result = await bar_service.get_many([symbol], resolution, start, end)
+    return next(iter(result.bars.values()))
@@ -0,0 +1,18 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Query, Response
+
+from app.core.quote_cache import QuotesResponse, quote_cache
+
+router = APIRouter()
+
+
+# async although it awaits nothing: a sync route would be sent to the
+# threadpool, which costs more than the dict lookups and join it does.
+@router.get("/", response_class=Response, responses={200: {"model": QuotesResponse}})
+async def get_many(
+    symbols: Annotated[str, Query(description="Comma-separated symbols")],
+):
+    return Response(
+        quote_cache.get_many(symbols.split(",")), media_type="application/json"
+    )
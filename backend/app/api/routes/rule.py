@@ -0,0 +1,62 @@
+from fastapi import APIRouter
+from pydantic import UUID4
+
+from app.api.schemas.rule import RuleCreate, RuleResponse, RuleUpdate
+from app.core.auth import AuthPayloadDep
+from app.core.paging import PagingDep, PagingResponse
+from app.core.responses import ModelResponse
+from app.services.rule import RuleServiceDep
+
+router = APIRouter()
+
+
+@router.post("/", response_model=RuleResponse)
+async def create(
+    auth_payload: AuthPayloadDep,
+    rule_create: RuleCreate,
+    rule_service: RuleServiceDep,
+):
+    return await rule_service.create(auth_payload.user_id, rule_create)
+
+
+@router.get("/", response_model=PagingResponse[RuleResponse])
+async def get_many(
+    auth_payload: AuthPayloadDep,
+    rule_service: RuleServiceDep,
+    paging: PagingDep,
+):
+    items, total = await rule_service.get_many(auth_payload.user_id, paging=paging)
+    return ModelResponse(
+        PagingResponse[RuleResponse](
+            total=total, page=paging.page, page_size=paging.page_size, items=items
+        )
+    )
+
+
+@router.get("/{rule_id}", response_model=RuleResponse)
+async def get(
+    rule_id: UUID4,
+    auth_payload: AuthPayloadDep,
+    rule_service: RuleServiceDep,
+):
+    return await rule_service.get(auth_payload.user_id, rule_id)
+
+
+@router.put("/{rule_id}", response_model=RuleResponse)
+async def update(
+    rule_id: UUID4,
+    auth_payload: AuthPayloadDep,
+    rule_update: RuleUpdate,
+    rule_service: RuleServiceDep,
+):
+    return await rule_service.update(auth_payload.user_id, rule_id, rule_update)
+
+
+@router.delete("/{rule_id}")
+async def delete(
+    rule_id: UUID4,
+    auth_payload: AuthPayloadDep,
+    rule_service: RuleServiceDep,
+):
+    await rule_service.delete(auth_payload.user_id, rule_id)
+    return {"message": "Rule deleted successfully"}
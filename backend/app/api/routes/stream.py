@@ -0,0 +1,53 @@
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+
+from app.core.alert_dispatcher import websocket_sink
+from app.core.auth import decode_access_token
+from app.core.price_hub import Subscriber, price_hub
+
+router = APIRouter()
+
+
+async def _receive(websocket: WebSocket, subscriber: Subscriber) -> None:
+    # {"action": "subscribe" | "unsubscribe", "symbols": ["AAPL", ...]}
+    try:
+        while True:
+            message = await websocket.receive_json()
+            symbols = message.get("symbols") or []
+            # A bare string would otherwise be taken one character at a time.
+            if not isinstance(symbols, list) or not all(
+                isinstance(symbol, str) for symbol in symbols
+            ):
+                continue
+            if message.get("action") == "unsubscribe":
+                price_hub.unsubscribe(subscriber, symbols)
+            else:
+                price_hub.subscribe(subscriber, symbols)
+    except (WebSocketDisconnect, ValueError, AttributeError):
+        return
+
+
+@router.websocket("/prices")
+async def prices(websocket: WebSocket, symbols: str = ""):
+    await websocket.accept()
+    subscriber = price_hub.connect(websocket.send_text)
+    price_hub.subscribe(subscriber, filter(None, symbols.split(",")))
+    await price_hub.serve(subscriber, _receive(websocket, subscriber))
+
+
+@router.websocket("/alerts")
+async def alerts(websocket: WebSocket, token: str = ""):
+    # Browsers cannot set headers on a WebSocket, so the token is a parameter.
+    try:
+        auth_payload = decode_access_token(token)
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    websocket_sink.connect(auth_payload.user_id, websocket.send_text)
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        websocket_sink.disconnect(auth_payload.user_id, websocket.send_text)
@@ -0,0 +1,32 @@
+from datetime import datetime
+from typing import Annotated
+
+import numpy as np
+from fastapi import APIRouter, HTTPException, Query
+
+from app.api.schemas.tick import TickSeries
+from app.core.tick_store import tick_store
+
+router = APIRouter()
+
+
+# Sync on purpose: scans touch memory-mapped files, so they run in the threadpool.
+@router.get("/{symbol}", response_model=TickSeries)
+def get_range(
+    symbol: str,
+    start: Annotated[datetime, Query()],
+    end: Annotated[datetime, Query()],
+    limit: int = Query(10_000, ge=1, le=1_000_000),
+):
+    start_ms, end_ms = int(start.timestamp() * 1000), int(end.timestamp() * 1000)
+    if end_ms <= start_ms:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    columns = tick_store.scan(symbol, start_ms, end_ms, limit=limit)
+    size = columns["size"]
+    return TickSeries(
+        symbol=tick_store.normalize_symbol(symbol),
+        count=len(columns["ts"]),
+        ts=columns["ts"].tolist(),
+        price=columns["price"].tolist(),
+        size=np.where(np.isnan(size), None, size).tolist(),
+    )
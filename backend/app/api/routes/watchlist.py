@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Response
+from pydantic import UUID4
+
+from app.api.schemas.watchlist import (
+    WatchlistCreate,
+    WatchlistResponse,
+    WatchlistUpdate,
+)
+from app.core.auth import AuthPayloadDep
+from app.core.quote_cache import QuotesResponse
+from app.services.watchlist import WatchlistServiceDep
+
+router = APIRouter()
+
+
+@router.post("/", response_model=WatchlistResponse)
+async def create(
+    auth_payload: AuthPayloadDep,
+    watchlist_create: WatchlistCreate,
+    watchlist_service: WatchlistServiceDep,
+):
+    return await watchlist_service.create(auth_payload.user_id, watchlist_create)
+
+
+@router.get("/", response_model=list[WatchlistResponse])
+async def get_many(
+    auth_payload: AuthPayloadDep, watchlist_service: WatchlistServiceDep
+):
+    return await watchlist_service.get_many(auth_payload.user_id)
+
+
+@router.get("/{watchlist_id}", response_model=WatchlistResponse)
+async def get(
+    watchlist_id: UUID4,
+    auth_payload: AuthPayloadDep,
+    watchlist_service: WatchlistServiceDep,
+):
+    return await watchlist_service.get(auth_payload.user_id, watchlist_id)
+
+
+@router.get(
+    "/{watchlist_id}/quotes",
+    response_class=Response,
+    responses={200: {"model": QuotesResponse}},
+)
+async def get_quotes(
+    watchlist_id: UUID4,
+    auth_payload: AuthPayloadDep,
+    watchlist_service: WatchlistServiceDep,
+):
+    body = await watchlist_service.get_quotes(auth_payload.user_id, watchlist_id)
+    return Response(body, media_type="application/json")
+
+
+@router.put("/{watchlist_id}", response_model=WatchlistResponse)
+async def update(
+    watchlist_id: UUID4,
+    auth_payload: AuthPayloadDep,
+    watchlist_update: WatchlistUpdate,
+    watchlist_service: WatchlistServiceDep,
+):
+    return await watchlist_service.update(
+        auth_payload.user_id, watchlist_id, watchlist_update
+    )
+
+
+@router.delete("/{watchlist_id}")
+async def delete(
+    watchlist_id: UUID4,
+    auth_payload: AuthPayloadDep,
+    watchlist_service: WatchlistServiceDep,
+):
+    await watchlist_service.delete(auth_payload.user_id, watchlist_id)
+    return {"message": "Watchlist deleted successfully"}
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from pydantic import UUID4, BaseModel
+
+
+class AlertResponse(BaseModel):
+    id: int
+    rule_id: UUID4
+    symbol: str
+    kind: str
+    threshold: float
+    value: float
+    triggered_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class Notification(BaseModel):
+    """Every alert claimed for one user in one dispatch window."""
+
+    user_id: UUID4
+    alerts: list[AlertResponse]
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+from app.database.models.bar import Resolution
+
+
+class BarResponse(BaseModel):
+    bucket: datetime
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    trades: int
+
+    class Config:
+        from_attributes = True
+
+
+class BarsResponse(BaseModel):
+    resolution: Resolution
+    bars: dict[str, list[BarResponse]]
@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from pydantic import UUID4, BaseModel, Field, FiniteFloat
+
+from app.database.models.rule import RuleKind
+
+
+class RuleCreate(BaseModel):
+    symbol: str = Field(pattern=r"^[A-Za-z0-9.^=-]{1,20}$")
+    kind: RuleKind
+    threshold: FiniteFloat
+
+
+class RuleUpdate(BaseModel):
+    kind: RuleKind
+    threshold: FiniteFloat
+
+
+class RuleResponse(BaseModel):
+    id: UUID4
+    user_id: UUID4
+    symbol: str
+    kind: RuleKind
+    threshold: float
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+
+
+class TickSeries(BaseModel):
+    symbol: str
+    count: int
+    ts: list[int]
+    price: list[float]
+    size: list[float | None]
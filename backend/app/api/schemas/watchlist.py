@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import Annotated
+
+from pydantic import UUID4, BaseModel, Field
+
+Symbol = Annotated[str, Field(pattern=r"^[A-Za-z0-9.^=-]{1,20}$")]
+
+
+class WatchlistCreate(BaseModel):
+    name: str = Field(min_length=1, max_length=100)
+    symbols: list[Symbol] = []
+
+
+class WatchlistUpdate(BaseModel):
+    name: str = Field(min_length=1, max_length=100)
+    symbols: list[Symbol]
+
+
+class WatchlistResponse(BaseModel):
+    id: UUID4
+    user_id: UUID4
+    name: str
+    symbols: list[str]
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,314 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import defaultdict, deque
+from collections.abc import Awaitable, Callable, Sequence
+from datetime import UTC, datetime
+from typing import Protocol
+
+import httpx
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.api.schemas.alert import AlertResponse, Notification
+from app.core.database import SessionLocal
+from app.database.models.alert import Alert
+from app.database.repositories.alert import AlertRepository
+
+logger = logging.getLogger(__name__)
+
+# Alerts claimed within one window reach a user as a single notification.
+ALERT_COALESCE_WINDOW = float(os.getenv("ALERT_COALESCE_WINDOW", 1))
+ALERT_BATCH_SIZE = int(os.getenv("ALERT_BATCH_SIZE", 1000))
+ALERT_MAX_BATCHES = int(os.getenv("ALERT_MAX_BATCHES", 20))
+# Claimed alerts not acknowledged within the lease are claimed again.
+ALERT_LEASE = float(os.getenv("ALERT_LEASE", 30))
+ALERT_MAX_CONCURRENCY = int(os.getenv("ALERT_MAX_CONCURRENCY", 100))
+ALERT_SEND_TIMEOUT = float(os.getenv("ALERT_SEND_TIMEOUT", 5))
+ALERT_WEBHOOK_URL = os.getenv("ALERT_WEBHOOK_URL", "")
+# Alerts no sink could deliver within this long are dropped.
+ALERT_TTL = float(os.getenv("ALERT_TTL", 24 * 3600))
+
+
+class AlertDispatcherMetrics(BaseModel):
+    depth: int
+    oldest_pending_s: float
+    claimed: int
+    delivered: int
+    undelivered: int
+    expired: int
+    notifications: int
+    failures: int
+    errors: int
+    latency_p50_ms: float
+    latency_p99_ms: float
+    avg_cycle_ms: float
+
+
+class Sink(Protocol):
+    async def send(self, notification: Notification, payload: str) -> bool:
+        """Deliver one notification; returns whether it reached the user.
+
+        Raising counts as not delivered; its alerts retry only if no sink
+        delivered them.
+        """
+        ...
+
+
+class MemorySink:
+    """Keeps notifications in memory; for tests and benchmarks."""
+
+    def __init__(self):
+        self.notifications: list[Notification] = []
+
+    async def send(self, notification: Notification, payload: str) -> bool:
+        self.notifications.append(notification)
+        return True
+
+
+class WebSocketSink:
+    """Pushes notifications to the user's sockets connected to this process.
+
+    A user with no live socket here is not delivered to; the alert stays in
+    the outbox until a dispatcher whose process holds one of the user's
+    sockets claims it, or it expires.
+    """
+
+    def __init__(self, timeout: float = ALERT_SEND_TIMEOUT):
+        self.timeout = timeout
+        self._connections: dict[uuid.UUID, set[Callable[[str], Awaitable]]] = (
+            defaultdict(set)
+        )
+
+    def connect(self, user_id: uuid.UUID, send: Callable[[str], Awaitable]) -> None:
+        self._connections[user_id].add(send)
+
+    def disconnect(self, user_id: uuid.UUID, send: Callable[[str], Awaitable]):
+        connections = self._connections.get(user_id)
+        if connections is not None:
+            connections.discard(send)
+            if not connections:
+                del self._connections[user_id]
+
+    async def send(self, notification: Notification, payload: str) -> bool:
+        delivered = False
+        for send in list(self._connections.get(notification.user_id, ())):
+            try:
+                async with asyncio.timeout(self.timeout):
+                    await send(payload)
+                delivered = True
+            except Exception:
+                self.disconnect(notification.user_id, send)
+        return delivered
+
+
+class WebhookSink:
+    """POSTs each notification as JSON to one URL; non-2xx responses retry."""
+
+    def __init__(self, url: str, timeout: float = ALERT_SEND_TIMEOUT):
+        self.url = url
+        self._client = httpx.AsyncClient(timeout=timeout)
+
+    async def send(self, notification: Notification, payload: str) -> bool:
+        response = await self._client.post(
+            self.url,
+            content=payload,
+            headers={"content-type": "application/json"},
+        )
+        response.raise_for_status()
+        return True
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class AlertDispatcher:
+    """Delivers the alerts outbox to sinks.
+
+    Every window it claims all due alerts (up to `max_batches` batches) with
+    FOR UPDATE SKIP LOCKED, so any number of API workers can run one. The
+    claim groups alerts by user, so a market-open burst of N triggers for one
+    user becomes one notification, serialized once and sent to every sink.
+    Alerts whose notification reached at least one sink are acknowledged in
+    one UPDATE, even if another sink failed, so a retry never pushes them
+    twice; alerts that reached no sink are released for a retry with backoff.
+    Alerts still undelivered after `ttl` are deleted.
+    """
+
+    def __init__(
+        self,
+        sinks: Sequence[Sink],
+        session_factory: async_sessionmaker[AsyncSession] = SessionLocal,
+        window: float = ALERT_COALESCE_WINDOW,
+        batch_size: int = ALERT_BATCH_SIZE,
+        max_batches: int = ALERT_MAX_BATCHES,
+        lease: float = ALERT_LEASE,
+        max_concurrency: int = ALERT_MAX_CONCURRENCY,
+        ttl: float = ALERT_TTL,
+    ):
+        self.sinks = list(sinks)
+        self.session_factory = session_factory
+        self.window = window
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.lease = lease
+        self.ttl = ttl
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._task: asyncio.Task | None = None
+        self._running = False
+        self.depth = 0
+        self.oldest_pending: datetime | None = None
+        self.claimed = 0
+        self.delivered = 0
+        self.undelivered = 0
+        self.expired = 0
+        self.notifications = 0
+        self.failures = 0
+        self.errors = 0
+        self.cycles = 0
+        self.cycle_time = 0.0
+        self.latencies: deque[float] = deque(maxlen=10_000)
+
+    async def _claim(self) -> list[Alert]:
+        alerts: list[Alert] = []
+        async with self.session_factory() as session:
+            repository = AlertRepository(session)
+            for _ in range(self.max_batches):
+                batch = await repository.claim(self.batch_size, self.lease)
+                await session.commit()
+                alerts.extend(batch)
+                if len(batch) < self.batch_size:
+                    break
+        return alerts
+
+    async def _deliver(self, notification: Notification) -> bool:
+        payload = notification.model_dump_json()
+        delivered = False
+        async with self._semaphore:
+            for sink in self.sinks:
+                try:
+                    delivered = await sink.send(notification, payload) or delivered
+                except Exception:
+                    self.failures += 1
+                    logger.exception(
+                        "Alert delivery to %s via %s failed",
+                        notification.user_id,
+                        type(sink).__name__,
+                    )
+        if not delivered:
+            self.undelivered += 1
+            return False
+        self.notifications += 1
+        return True
+
+    async def dispatch_once(self) -> int:
+        """Claim, coalesce, deliver and acknowledge; returns alerts claimed."""
+        alerts = await self._claim()
+        if not alerts:
+            return 0
+        self.claimed += len(alerts)
+
+        by_user: dict[uuid.UUID, list[Alert]] = defaultdict(list)
+        for alert in alerts:
+            by_user[alert.user_id].append(alert)
+        notifications = [
+            Notification(
+                user_id=user_id,
+                alerts=[AlertResponse.model_validate(alert) for alert in rows],
+            )
+            for user_id, rows in by_user.items()
+        ]
+        results = await asyncio.gather(*map(self._deliver, notifications))
+
+        delivered: list[int] = []
+        failed: list[int] = []
+        for rows, ok in zip(by_user.values(), results, strict=True):
+            (delivered if ok else failed).extend(alert.id for alert in rows)
+        async with self.session_factory() as session:
+            repository = AlertRepository(session)
+            if delivered:
+                await repository.mark_delivered(delivered)
+            if failed:
+                await repository.release(failed)
+            await session.commit()
+
+        now = datetime.now(UTC)
+        self.delivered += len(delivered)
+        for rows, ok in zip(by_user.values(), results, strict=True):
+            if ok:
+                self.latencies.extend(
+                    (now - alert.created_at).total_seconds() for alert in rows
+                )
+        return len(alerts)
+
+    async def _sample_depth(self) -> None:
+        async with self.session_factory() as session:
+            repository = AlertRepository(session)
+            self.expired += await repository.expire(self.ttl)
+            await session.commit()
+            self.depth, self.oldest_pending = await repository.pending()
+
+    async def _run(self) -> None:
+        backoff = 0.0
+        while self._running:
+            started_at = time.monotonic()
+            try:
+                await self.dispatch_once()
+                await self._sample_depth()
+                backoff = 0.0
+            except Exception:
+                self.errors += 1
+                backoff = min(30.0, backoff * 2 or self.window)
+                logger.exception("Alert dispatch failed")
+            elapsed = time.monotonic() - started_at
+            self.cycles += 1
+            self.cycle_time += elapsed
+            await asyncio.sleep(max(backoff, self.window - elapsed))
+
+    def start(self) -> None:
+        self._running = True
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._running = False
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for sink in self.sinks:
+            close = getattr(sink, "close", None)
+            if close is not None:
+                await close()
+
+    @staticmethod
+    def _percentile(samples: Sequence[float], percentile: float) -> float:
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percentile / 100))]
+
+    def metrics(self) -> AlertDispatcherMetrics:
+        oldest = self.oldest_pending
+        return AlertDispatcherMetrics(
+            depth=self.depth,
+            oldest_pending_s=(
+                (datetime.now(UTC) - oldest).total_seconds() if oldest else 0.0
+            ),
+            claimed=self.claimed,
+            delivered=self.delivered,
+            undelivered=self.undelivered,
+            expired=self.expired,
+            notifications=self.notifications,
+            failures=self.failures,
+            errors=self.errors,
+            latency_p50_ms=self._percentile(self.latencies, 50) * 1000,
+            latency_p99_ms=self._percentile(self.latencies, 99) * 1000,
+            avg_cycle_ms=self.cycle_time / self.cycles * 1000 if self.cycles else 0.0,
+        )
+
+
+websocket_sink = WebSocketSink()
+alert_dispatcher = AlertDispatcher(
+    [websocket_sink] + ([WebhookSink(ALERT_WEBHOOK_URL)] if ALERT_WEBHOOK_URL else [])
+)
@@ -1,4 +1,6 @@
+import hashlib
 import os
+import time
 import uuid
 from datetime import UTC, datetime, timedelta
 from typing import Annotated
@@ -8,11 +10,14 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 from pydantic import UUID4, BaseModel
 
+from app.core.cache import LRUCache
 from app.database.models.user import Role
 
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your_secret_key")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 120
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", 300))
 
 
 class AuthPayload(BaseModel):
@@ -30,16 +35,29 @@ def create_access_token(user_id: str, role: Role) -> str:
     return jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=ALGORITHM)
 
 
+# Verified payloads keyed by token digest; entries never outlive the token's exp.
+token_cache: LRUCache[bytes, AuthPayload] = LRUCache(
+    maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL
+)
+
+
 def decode_access_token(token: str) -> AuthPayload:
+    digest = hashlib.sha256(token.encode()).digest()
+    cached = token_cache.get(digest)
+    if cached is not None:
+        return cached
     try:
         payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[ALGORITHM])
         payload["user_id"] = uuid.UUID(payload["user_id"])
-        return AuthPayload(**payload)
+        auth_payload = AuthPayload(**payload)
     except JWTError as e:
         raise HTTPException(
             status_code=401,
             detail="Invalid token",
         ) from e
+    if "exp" in payload:
+        token_cache.set(digest, auth_payload, ttl=payload["exp"] - time.time())
+    return auth_payload
 
 
 def get_auth_payload_with_roles(roles: list[Role] | None = None):
@@ -0,0 +1,173 @@
+import csv
+import json
+from collections import deque
+from collections.abc import AsyncIterator, Iterator, Sequence
+from typing import TypeVar
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+BULK_CHUNK_SIZE = 1000
+# Longest CSV record (in characters) a quoted field may span before the record
+# is reported as a bad row.
+BULK_MAX_RECORD_LENGTH = 16 * 1024
+
+
+class BulkRowError(BaseModel):
+    row: int
+    key: str | None = None
+    detail: str
+
+
+class BulkResult(BaseModel):
+    processed: int = 0
+    succeeded: int = 0
+    errors: list[BulkRowError] = []
+
+
+def chunked(items: Sequence[T], size: int = BULK_CHUNK_SIZE) -> Iterator[Sequence[T]]:
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+async def iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    buffer = b""
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8").rstrip("\r")
+
+
+class _Lines:
+    """Iterator fed by hand, so one csv.reader can read a streamed body.
+
+    It raises StopIteration whenever it runs dry, which csv.reader passes
+    through without losing its place; iter_rows only asks the reader for a
+    row once a complete record has been fed.
+    """
+
+    def __init__(self):
+        self.lines: deque[str] = deque()
+
+    def __iter__(self) -> "_Lines":
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+def _in_quotes(line: str, in_quotes: bool) -> bool:
+    """Whether a record is inside a quoted field after `line`.
+
+    As in csv.reader, a quote opens a quoted field only at the start of a
+    field and is a literal anywhere else; inside one, a doubled quote is an
+    escaped quote and a single one closes it.
+    """
+    pos = line.find('"')
+    while pos != -1:
+        if in_quotes:
+            if line.startswith('"', pos + 1):
+                pos = line.find('"', pos + 2)
+                continue
+            in_quotes = False
+        elif pos == 0 or line[pos - 1] == ",":
+            in_quotes = True
+        pos = line.find('"', pos + 1)
+    return in_quotes
+
+
+async def _csv_records(stream: AsyncIterator[bytes]) -> AsyncIterator[list[str] | None]:
+    """Yield the lines of each CSV record, or None for one that never closes.
+
+    A record still inside a quoted field after BULK_MAX_RECORD_LENGTH
+    characters, or at the end of the body, is reported as its first line
+    alone, and the lines after it are read again as records of their own.
+    """
+    source = aiter(iter_lines(stream))
+    pending: deque[str] = deque()
+    record: list[str] = []
+    length = 0
+    in_quotes = False
+    ended = False
+    while True:
+        if pending:
+            line = pending.popleft()
+        elif not ended:
+            try:
+                line = await anext(source)
+            except StopAsyncIteration:
+                ended = True
+                continue
+        elif record:
+            line = None
+        else:
+            break
+        if line is not None:
+            if not record and not line.strip():
+                continue
+            record.append(line)
+            length += len(line)
+            in_quotes = _in_quotes(line, in_quotes)
+        if not in_quotes:
+            yield record
+        elif line is None or length > BULK_MAX_RECORD_LENGTH:
+            yield None
+            pending.extendleft(reversed(record[1:]))
+            in_quotes = False
+        else:
+            continue
+        record = []
+        length = 0
+
+
+async def iter_rows(
+    stream: AsyncIterator[bytes], content_type: str
+) -> AsyncIterator[tuple[int, dict | None]]:
+    """Yield (row number, parsed row) from a CSV or NDJSON body as it streams in.
+
+    Rows that cannot be parsed are yielded as None so they can be reported.
+    """
+    if content_type.startswith("text/csv"):
+        header: list[str] | None = None
+        row = 0
+        lines = _Lines()
+        reader = csv.reader(lines)
+        async for record in _csv_records(stream):
+            if record is None:
+                if header is not None:
+                    row += 1
+                    yield row, None
+                continue
+            lines.lines.extend(line + "\n" for line in record)
+            values = next(reader)
+            if header is None:
+                header = [value.strip() for value in values]
+                continue
+            row += 1
+            if len(values) != len(header):
+                yield row, None
+                continue
+            yield row, dict(zip(header, values, strict=True))
+    elif content_type.startswith(("application/x-ndjson", "application/jsonl")):
+        row = 0
+        async for line in iter_lines(stream):
+            if not line.strip():
+                continue
+            row += 1
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError:
+                yield row, None
+                continue
+            yield row, data if isinstance(data, dict) else None
+    else:
+        raise HTTPException(
+            status_code=415, detail="Expected text/csv or application/x-ndjson"
+        )
@@ -0,0 +1,186 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+M = TypeVar("M", bound=BaseModel)
+
+
+class CacheStats(BaseModel):
+    size: int
+    maxsize: int
+    hits: int
+    misses: int
+    evictions: int
+    hit_ratio: float
+
+
+class LRUCache(Generic[K, V]):
+    """In-process LRU cache with an optional per-entry time-to-live."""
+
+    def __init__(self, maxsize: int, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[K, tuple[V, float | None]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: K) -> V | None:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        if self.maxsize <= 0:
+            return
+        if ttl is None:
+            ttl = self.ttl
+        elif self.ttl is not None:
+            ttl = min(ttl, self.ttl)
+        if ttl is not None and ttl <= 0:
+            self._data.pop(key, None)
+            return
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: K) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> CacheStats:
+        lookups = self.hits + self.misses
+        return CacheStats(
+            size=len(self._data),
+            maxsize=self.maxsize,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            hit_ratio=self.hits / lookups if lookups else 0.0,
+        )
+
+
+class CacheBackend(ABC):
+    """Shared cache tier (e.g. Redis) storing serialized values."""
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float | None = None) -> None: ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None: ...
+
+
+class InMemoryCacheBackend(CacheBackend):
+    def __init__(self):
+        self._data: dict[str, tuple[bytes, float | None]] = {}
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._data[key] = (value, expires_at)
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+
+class TieredCacheStats(BaseModel):
+    local: CacheStats
+    shared_hits: int
+    shared_misses: int
+    hit_ratio: float
+
+
+class TieredCache(Generic[M]):
+    """Read-through cache of pydantic models: local LRU, then a shared backend.
+
+    delete() clears the local tier of this process only. With several
+    processes, give the local LRU a TTL of a few seconds; that bounds how long
+    another process can serve an entry after it is invalidated.
+    """
+
+    def __init__(
+        self,
+        model: type[M],
+        namespace: str,
+        local: LRUCache[str, M],
+        shared: CacheBackend | None = None,
+        ttl: float | None = None,
+    ):
+        self.model = model
+        self.namespace = namespace
+        self.local = local
+        self.shared = shared
+        self.ttl = ttl
+        self.shared_hits = 0
+        self.shared_misses = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str) -> M | None:
+        value = self.local.get(key)
+        if value is not None or self.shared is None:
+            return value
+        data = await self.shared.get(self._key(key))
+        if data is None:
+            self.shared_misses += 1
+            return None
+        self.shared_hits += 1
+        value = self.model.model_validate_json(data)
+        self.local.set(key, value, ttl=self.ttl)
+        return value
+
+    async def set(self, key: str, value: M) -> None:
+        self.local.set(key, value, ttl=self.ttl)
+        if self.shared is not None:
+            await self.shared.set(
+                self._key(key), value.model_dump_json().encode(), ttl=self.ttl
+            )
+
+    async def delete(self, key: str) -> None:
+        self.local.delete(key)
+        if self.shared is not None:
+            await self.shared.delete(self._key(key))
+
+    def stats(self) -> TieredCacheStats:
+        local = self.local.stats()
+        lookups = local.hits + local.misses
+        hits = local.hits + self.shared_hits
+        return TieredCacheStats(
+            local=local,
+            shared_hits=self.shared_hits,
+            shared_misses=self.shared_misses,
+            hit_ratio=hits / lookups if lookups else 0.0,
+        )
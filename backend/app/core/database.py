@@ -1,18 +1,141 @@
+import hashlib
 import os
+import time
 from typing import Annotated
 
-from fastapi import Depends
-from sqlalchemy import text
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from fastapi import Depends, Request
+from pydantic import BaseModel
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.cache import LRUCache
 
 DATABASE_URL = os.getenv("POSTGRES_URI", "")
-engine = create_async_engine(
-    DATABASE_URL.replace(
-        "postgresql+psycopg2", "postgresql+asyncpg"
-    ),  # Ensure asyncpg driver
-    pool_pre_ping=True,
-    echo=False,  # Set to True for debugging
+DATABASE_READ_URL = os.getenv("POSTGRES_READ_URI", DATABASE_URL)
+# Seconds a client keeps reading from the primary after a write (0 disables).
+DB_READ_STICKY_SECONDS = float(os.getenv("DB_READ_STICKY_SECONDS", 0))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+# "always" pings on every checkout; "never" relies on DB_POOL_RECYCLE and
+# invalidation on disconnect errors, saving a round trip per checkout.
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "always")
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 100))
+
+
+class PoolMetrics(BaseModel):
+    size: int
+    max_overflow: int
+    checked_out: int
+    overflow: int
+    saturation: float
+    checkouts: int
+    avg_checkout_ms: float
+    max_checkout_ms: float
+    connects: int
+    closes: int
+    invalidations: int
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long callers wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.checkout_time_total = 0.0
+        self.checkout_time_max = 0.0
+        self.connects = 0
+        self.closes = 0
+        self.invalidations = 0
+
+    def connect(self):
+        started_at = time.perf_counter()
+        connection = super().connect()
+        elapsed = time.perf_counter() - started_at
+        self.checkouts += 1
+        self.checkout_time_total += elapsed
+        self.checkout_time_max = max(self.checkout_time_max, elapsed)
+        return connection
+
+    def recreate(self):
+        # Carry the counters over when the engine swaps in a fresh pool.
+        pool = super().recreate()
+        for name in (
+            "checkouts",
+            "checkout_time_total",
+            "checkout_time_max",
+            "connects",
+            "closes",
+            "invalidations",
+        ):
+            setattr(pool, name, getattr(self, name))
+        return pool
+
+    def metrics(self) -> PoolMetrics:
+        capacity = self.size() + max(self._max_overflow, 0)
+        checkouts = self.checkouts or 1
+        return PoolMetrics(
+            size=self.size(),
+            max_overflow=self._max_overflow,
+            checked_out=self.checkedout(),
+            overflow=self.overflow(),
+            saturation=self.checkedout() / capacity if capacity else 0.0,
+            checkouts=self.checkouts,
+            avg_checkout_ms=self.checkout_time_total / checkouts * 1000,
+            max_checkout_ms=self.checkout_time_max * 1000,
+            connects=self.connects,
+            closes=self.closes,
+            invalidations=self.invalidations,
+        )
+
+
+def _create_engine(url: str) -> AsyncEngine:
+    engine = create_async_engine(
+        url.replace(
+            "postgresql+psycopg2", "postgresql+asyncpg"
+        ),  # Ensure asyncpg driver
+        poolclass=InstrumentedPool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING == "always",
+        connect_args={"statement_cache_size": DB_STATEMENT_CACHE_SIZE},
+        echo=False,  # Set to True for debugging
+    )
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        sync_engine.pool.connects += 1
+
+    @event.listens_for(sync_engine, "close")
+    def _on_close(dbapi_connection, connection_record):
+        sync_engine.pool.closes += 1
+
+    @event.listens_for(sync_engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        sync_engine.pool.invalidations += 1
+
+    return engine
+
+
+def pool_metrics(engine: AsyncEngine) -> PoolMetrics:
+    return engine.sync_engine.pool.metrics()
+
+
+engine = _create_engine(DATABASE_URL)
+read_engine = (
+    _create_engine(DATABASE_READ_URL) if DATABASE_READ_URL != DATABASE_URL else engine
 )
 
 SessionLocal = async_sessionmaker(
@@ -23,8 +146,20 @@ SessionLocal = async_sessionmaker(
     class_=AsyncSession,
 )
 
+ReadSessionLocal = async_sessionmaker(
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+    bind=read_engine,
+    class_=AsyncSession,
+)
+
 Base = declarative_base()
 
+_recent_writers: LRUCache[str, bool] = LRUCache(
+    maxsize=100_000, ttl=DB_READ_STICKY_SECONDS
+)
+
 
 async def health_check():
     try:
@@ -35,9 +170,37 @@ async def health_check():
         return {"status": "error", "database": str(e)}
 
 
-async def get_db():
+def _client_key(request: Request) -> str | None:
+    authorization = request.headers.get("authorization")
+    if not authorization:
+        return None
+    return hashlib.sha256(authorization.encode()).hexdigest()
+
+
+async def get_db(request: Request):
     async with SessionLocal() as session:
         yield session
+    if DB_READ_STICKY_SECONDS > 0 and request.method not in ("GET", "HEAD"):
+        key = _client_key(request)
+        if key:
+            _recent_writers.set(key, True)
 
 
 DbDep = Annotated[AsyncSession, Depends(get_db)]
+
+
+async def get_read_db(request: Request, db: DbDep):
+    # Without a replica, or right after this client wrote, reuse the primary
+    # session; it only checks out a connection if it is actually queried.
+    if read_engine is engine:
+        yield db
+        return
+    key = _client_key(request) if DB_READ_STICKY_SECONDS > 0 else None
+    if key and _recent_writers.get(key):
+        yield db
+        return
+    async with ReadSessionLocal() as session:
+        yield session
+
+
+ReadDbDep = Annotated[AsyncSession, Depends(get_read_db)]
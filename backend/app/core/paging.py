@@ -1,24 +1,36 @@
-from collections.abc import Sequence
-from typing import Annotated, Generic, Literal, TypeVar
+import base64
+import binascii
+import uuid
+from collections.abc import Callable
+from datetime import datetime
+from typing import Annotated, Any, Generic, Literal, TypeVar
 
-from fastapi import Depends, Query
-from pydantic import BaseModel
-from sqlalchemy import Select
+from fastapi import Depends, HTTPException, Query
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import Select, tuple_
 
 T = TypeVar("T")
 
 
 class PagingResponse(BaseModel, Generic[T]):
-    total: int
+    total: int | None
     page: int
     page_size: int
-    items: Sequence[T]
+    items: list[T]
+
+
+class CursorPagingResponse(BaseModel, Generic[T]):
+    page_size: int
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+    items: list[T]
 
 
 class Paging(BaseModel, Generic[T]):
     page: int
     page_size: int
     sort: Literal["asc", "desc"]
+    total: Literal["exact", "estimated", "none"] = "exact"
 
     @property
     def skip(self) -> int:
@@ -42,12 +54,88 @@ class Paging(BaseModel, Generic[T]):
         )
 
 
+class Cursor(BaseModel):
+    value: datetime
+    id: uuid.UUID
+    backward: bool = False
+
+    def encode(self) -> str:
+        return base64.urlsafe_b64encode(self.model_dump_json().encode()).decode()
+
+    @classmethod
+    def decode(cls, cursor: str) -> "Cursor":
+        try:
+            return cls.model_validate_json(base64.urlsafe_b64decode(cursor.encode()))
+        except (binascii.Error, ValueError, ValidationError) as e:
+            raise HTTPException(status_code=400, detail="Invalid cursor") from e
+
+
+class CursorPaging(BaseModel):
+    cursor: Cursor | None
+    page_size: int
+    sort: Literal["asc", "desc"]
+
+    @property
+    def descending(self) -> bool:
+        descending = self.sort == "desc"
+        if self.cursor and self.cursor.backward:
+            return not descending
+        return descending
+
+    def apply(self, stmt: Select, sort_field, id_field) -> Select:
+        # Keyset on (sort_field, id) so each page is an index range scan
+        # regardless of depth; one extra row tells whether another page exists.
+        if self.cursor:
+            key = tuple_(sort_field, id_field)
+            value = tuple_(self.cursor.value, self.cursor.id)
+            stmt = stmt.where(key < value if self.descending else key > value)
+        if self.descending:
+            stmt = stmt.order_by(sort_field.desc(), id_field.desc())
+        else:
+            stmt = stmt.order_by(sort_field.asc(), id_field.asc())
+        return stmt.limit(self.page_size + 1)
+
+    def paginate(
+        self, rows: list[Any], key: Callable[[Any], tuple[datetime, uuid.UUID]]
+    ) -> tuple[list[Any], str | None, str | None]:
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        backward = bool(self.cursor and self.cursor.backward)
+        if backward:
+            rows.reverse()
+
+        next_cursor = prev_cursor = None
+        if rows:
+            first, last = key(rows[0]), key(rows[-1])
+            if has_more or backward:
+                next_cursor = Cursor(value=last[0], id=last[1]).encode()
+            if (has_more and backward) or (self.cursor and not backward):
+                prev_cursor = Cursor(
+                    value=first[0], id=first[1], backward=True
+                ).encode()
+        return rows, next_cursor, prev_cursor
+
+
 def get_paging(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
     sort: Literal["asc", "desc"] = Query("desc"),
+    total: Literal["exact", "estimated", "none"] = Query("exact"),
 ) -> Paging:
-    return Paging(page=page, page_size=page_size, sort=sort)
+    return Paging(page=page, page_size=page_size, sort=sort, total=total)
+
+
+def get_cursor_paging(
+    cursor: str | None = Query(None),
+    page_size: int = Query(10, ge=1, le=100),
+    sort: Literal["asc", "desc"] = Query("desc"),
+) -> CursorPaging:
+    return CursorPaging(
+        cursor=Cursor.decode(cursor) if cursor else None,
+        page_size=page_size,
+        sort=sort,
+    )
 
 
 PagingDep = Annotated[Paging, Depends(get_paging)]
+CursorPagingDep = Annotated[CursorPaging, Depends(get_cursor_paging)]
@@ -1,14 +1,149 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 from fastapi import HTTPException
 from passlib.context import CryptContext
+from pydantic import BaseModel
 
 # Configure hashing algorithm
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+PASSWORD_HASH_CONCURRENCY = int(
+    os.getenv("PASSWORD_HASH_CONCURRENCY", PASSWORD_HASH_WORKERS * 2)
+)
+# Bulk imports hash on their own, smaller pool so logins never queue behind them.
+PASSWORD_HASH_BULK_WORKERS = int(
+    os.getenv("PASSWORD_HASH_BULK_WORKERS", max(1, PASSWORD_HASH_WORKERS // 2))
+)
+
 
-def hash_password(password: str) -> str:
+def _hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
-def verify_password(plain_password: str, hashed_password: str):
-    if not pwd_context.verify(plain_password, hashed_password):
+def _hash_many(passwords: list[str]) -> list[str]:
+    return [pwd_context.hash(password) for password in passwords]
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordHasherMetrics(BaseModel):
+    workers: int
+    concurrency: int
+    in_flight: int
+    queued: int
+    completed: int
+    avg_queue_wait_ms: float
+    max_queue_wait_ms: float
+    avg_run_ms: float
+
+
+class PasswordHasher:
+    """Runs bcrypt in a process pool so it never blocks the event loop.
+
+    At most `concurrency` jobs are submitted to the pool at once; the rest wait
+    on a semaphore, which is what the queue metrics measure.
+    """
+
+    def __init__(self, workers: int, concurrency: int):
+        self.workers = workers
+        self.concurrency = concurrency
+        self._executor: ProcessPoolExecutor | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._in_flight = 0
+        self._queued = 0
+        self._completed = 0
+        self._queue_wait_total = 0.0
+        self._queue_wait_max = 0.0
+        self._run_total = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    async def _run(self, fn, *args):
+        semaphore = self._get_semaphore()
+        queued_at = time.perf_counter()
+        self._queued += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self._queued -= 1
+        started_at = time.perf_counter()
+        wait = started_at - queued_at
+        self._queue_wait_total += wait
+        self._queue_wait_max = max(self._queue_wait_max, wait)
+        self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self._in_flight -= 1
+            self._completed += 1
+            self._run_total += time.perf_counter() - started_at
+            semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password)
+
+    async def hash_many(self, passwords: list[str]) -> list[str]:
+        # One pool job per worker keeps IPC overhead flat for large batches.
+        size = -(-len(passwords) // self.workers) or 1
+        slices = [passwords[i : i + size] for i in range(0, len(passwords), size)]
+        results = await asyncio.gather(
+            *(self._run(_hash_many, chunk) for chunk in slices)
+        )
+        return [hashed for result in results for hashed in result]
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(_verify, plain_password, hashed_password)
+
+    def metrics(self) -> PasswordHasherMetrics:
+        completed = self._completed or 1
+        return PasswordHasherMetrics(
+            workers=self.workers,
+            concurrency=self.concurrency,
+            in_flight=self._in_flight,
+            queued=self._queued,
+            completed=self._completed,
+            avg_queue_wait_ms=self._queue_wait_total / completed * 1000,
+            max_queue_wait_ms=self._queue_wait_max * 1000,
+            avg_run_ms=self._run_total / completed * 1000,
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    workers=PASSWORD_HASH_WORKERS, concurrency=PASSWORD_HASH_CONCURRENCY
+)
+bulk_password_hasher = PasswordHasher(
+    workers=PASSWORD_HASH_BULK_WORKERS, concurrency=PASSWORD_HASH_BULK_WORKERS
+)
+
+
+async def hash_password(password: str) -> str:
+    return await password_hasher.hash(password)
+
+
+async def hash_passwords(passwords: list[str]) -> list[str]:
+    return await bulk_password_hasher.hash_many(passwords)
+
+
+async def verify_password(plain_password: str, hashed_password: str):
+    if not await password_hasher.verify(plain_password, hashed_password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
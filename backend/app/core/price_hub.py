@@ -0,0 +1,301 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Awaitable, Callable, Iterable
+
+from confluent_kafka import OFFSET_END, Consumer, TopicPartition
+from pydantic import BaseModel
+
+from app.core.quote_cache import quote_cache
+
+logger = logging.getLogger(__name__)
+
+KAFKA_BOOTSTRAP_SERVERS = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "")
+PRICE_HUB_TOPIC = os.getenv("PRICE_HUB_TOPIC", "processed-prices")
+# Updates are coalesced and fanned out once per interval.
+PRICE_HUB_INTERVAL = float(os.getenv("PRICE_HUB_INTERVAL", 0.1))
+PRICE_HUB_MAX_SYMBOLS = int(os.getenv("PRICE_HUB_MAX_SYMBOLS", 200))
+# A client whose send takes longer than this is disconnected.
+PRICE_HUB_SEND_TIMEOUT = float(os.getenv("PRICE_HUB_SEND_TIMEOUT", 5))
+
+
+class PriceHubMetrics(BaseModel):
+    clients: int
+    symbols: int
+    received: int
+    flushes: int
+    frames: int
+    sends: int
+    conflated: int
+    slow_disconnects: int
+    listener_errors: int
+    avg_flush_ms: float
+
+
+class Subscriber:
+    """One connected client.
+
+    Pending frames are kept per symbol, so a client that falls behind only ever
+    holds the latest frame for each subscribed symbol: the queue is bounded by
+    its subscriptions and older updates are conflated away.
+    """
+
+    def __init__(self, send: Callable[[str], Awaitable[None]]):
+        self.send = send
+        self.symbols: set[str] = set()
+        self.pending: dict[str, str] = {}
+        self.ready = asyncio.Event()
+        self.closed = False
+        self.sending_since: float | None = None
+        self.task: asyncio.Task | None = None
+
+    def offer(self, symbol: str, frame: str) -> bool:
+        """Queue a frame; returns True if it replaced an unsent one."""
+        pending = self.pending
+        if not pending:
+            self.ready.set()
+        conflated = symbol in pending
+        pending[symbol] = frame
+        return conflated
+
+    async def run(self) -> None:
+        """Send pending frames until closed.
+
+        Everything pending goes out as one JSON array message per wake-up, made
+        by joining the shared per-symbol frames rather than re-serializing.
+        """
+        while not self.closed:
+            await self.ready.wait()
+            self.ready.clear()
+            pending, self.pending = self.pending, {}
+            if pending:
+                self.sending_since = time.monotonic()
+                await self.send("[" + ",".join(pending.values()) + "]")
+                self.sending_since = None
+
+
+class PriceHub:
+    """Fans processed-prices out to WebSocket subscribers.
+
+    One Kafka consumer thread per worker process keeps only the latest event
+    per (symbol, type, window) between flushes. Every `interval` the flush task
+    serializes each changed symbol once into a shared frame and offers it to
+    the subscribers of that symbol.
+    """
+
+    def __init__(
+        self,
+        interval: float = PRICE_HUB_INTERVAL,
+        listeners: Iterable[Callable[[list[dict]], None]] = (),
+    ):
+        self.interval = interval
+        # Called with every ingested batch of events, on the consumer thread.
+        self.listeners = list(listeners)
+        self._latest: dict[tuple, dict] = {}
+        self._lock = threading.Lock()
+        self._subscribers: dict[str, set[Subscriber]] = defaultdict(set)
+        self._clients: set[Subscriber] = set()
+        self._running = False
+        self._flush_task: asyncio.Task | None = None
+        self._consumer_thread: threading.Thread | None = None
+        self.received = 0
+        self.flushes = 0
+        self.frames = 0
+        self.sends = 0
+        self.conflated = 0
+        self.slow_disconnects = 0
+        self.listener_errors = 0
+        self.flush_time = 0.0
+
+    def publish(self, payload: bytes | str) -> None:
+        """Ingest one processed-prices message (an event or a list of events)."""
+        events = json.loads(payload)
+        if isinstance(events, dict):
+            events = [events]
+        with self._lock:
+            for event in events:
+                symbol = event.get("symbol")
+                if symbol:
+                    key = (symbol, event.get("type"), event.get("window"))
+                    self._latest[key] = event
+            self.received += len(events)
+        # A failing listener must not take the consumer thread down with it.
+        for listener in self.listeners:
+            try:
+                listener(events)
+            except Exception:
+                self.listener_errors += 1
+                logger.exception("Price hub listener %r failed", listener)
+
+    def connect(self, send: Callable[[str], Awaitable[None]]) -> Subscriber:
+        subscriber = Subscriber(send)
+        self._clients.add(subscriber)
+        return subscriber
+
+    def disconnect(self, subscriber: Subscriber) -> None:
+        subscriber.closed = True
+        subscriber.ready.set()
+        self.unsubscribe(subscriber, list(subscriber.symbols))
+        self._clients.discard(subscriber)
+
+    def subscribe(self, subscriber: Subscriber, symbols: Iterable[str]) -> None:
+        if isinstance(symbols, str):
+            raise TypeError("symbols must be a list, not a string")
+        for symbol in symbols:
+            if len(subscriber.symbols) >= PRICE_HUB_MAX_SYMBOLS:
+                break
+            symbol = symbol.upper()
+            subscriber.symbols.add(symbol)
+            self._subscribers[symbol].add(subscriber)
+
+    def unsubscribe(self, subscriber: Subscriber, symbols: Iterable[str]) -> None:
+        if isinstance(symbols, str):
+            raise TypeError("symbols must be a list, not a string")
+        for symbol in symbols:
+            symbol = symbol.upper()
+            subscriber.symbols.discard(symbol)
+            subscribers = self._subscribers.get(symbol)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[symbol]
+
+    def flush(self) -> int:
+        """Fan out everything received since the last flush; returns frames built."""
+        started_at = time.perf_counter()
+        with self._lock:
+            latest, self._latest = self._latest, {}
+        by_symbol: dict[str, list[dict]] = defaultdict(list)
+        for (symbol, _, _), event in latest.items():
+            by_symbol[symbol].append(event)
+
+        frames = 0
+        for symbol, events in by_symbol.items():
+            subscribers = self._subscribers.get(symbol)
+            if not subscribers:
+                continue
+            frame = json.dumps({"symbol": symbol, "events": events})
+            frames += 1
+            conflated = 0
+            for subscriber in subscribers:  # Subscriber.offer, inlined
+                pending = subscriber.pending
+                if pending:
+                    conflated += symbol in pending
+                else:
+                    subscriber.ready.set()
+                pending[symbol] = frame
+            self.conflated += conflated
+            self.sends += len(subscribers)
+
+        self.frames += frames
+        self.flushes += 1
+        self.flush_time += time.perf_counter() - started_at
+        return frames
+
+    def evict_slow(self, timeout: float = PRICE_HUB_SEND_TIMEOUT) -> int:
+        """Cancel senders stuck in one send for longer than `timeout`."""
+        deadline = time.monotonic() - timeout
+        evicted = 0
+        for subscriber in self._clients:
+            since = subscriber.sending_since
+            if since is not None and since < deadline and subscriber.task:
+                subscriber.task.cancel()
+                evicted += 1
+        self.slow_disconnects += evicted
+        return evicted
+
+    async def serve(self, subscriber: Subscriber, receiver: Awaitable) -> None:
+        """Run a client's sender next to its `receiver` until either ends."""
+        subscriber.task = asyncio.create_task(subscriber.run())
+        tasks = {asyncio.ensure_future(receiver), subscriber.task}
+        try:
+            _, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in pending:
+                task.cancel()
+        finally:
+            self.disconnect(subscriber)
+
+    async def _flush_loop(self) -> None:
+        # A per-send timeout costs a timer per client per flush; checking send
+        # ages once a second is enough to drop clients that stopped reading.
+        last_check = time.monotonic()
+        while self._running:
+            await asyncio.sleep(self.interval)
+            self.flush()
+            if time.monotonic() - last_check >= 1:
+                self.evict_slow()
+                last_check = time.monotonic()
+
+    def _consume(self) -> None:
+        # Every worker needs every partition from the live end, so partitions
+        # are assigned directly instead of joining a group (a group per process
+        # would leave one behind on every restart). The client requires a
+        # group.id, but with assign() and no commits the broker never
+        # registers it.
+        consumer = Consumer(
+            {
+                "bootstrap.servers": KAFKA_BOOTSTRAP_SERVERS,
+                "group.id": "price-hub",
+                "enable.auto.commit": False,
+            }
+        )
+        topic = consumer.list_topics(PRICE_HUB_TOPIC, timeout=10).topics[
+            PRICE_HUB_TOPIC
+        ]
+        consumer.assign(
+            [
+                TopicPartition(PRICE_HUB_TOPIC, partition, OFFSET_END)
+                for partition in topic.partitions
+            ]
+        )
+        try:
+            while self._running:
+                for message in consumer.consume(num_messages=1000, timeout=0.5):
+                    if message.error() is None and message.value():
+                        try:
+                            self.publish(message.value())
+                        except (ValueError, AttributeError):
+                            continue
+        finally:
+            consumer.close()
+
+    def start(self) -> None:
+        self._running = True
+        self._flush_task = asyncio.create_task(self._flush_loop())
+        if KAFKA_BOOTSTRAP_SERVERS:
+            self._consumer_thread = threading.Thread(
+                target=self._consume, name="price-hub-consumer", daemon=True
+            )
+            self._consumer_thread.start()
+
+    async def stop(self) -> None:
+        self._running = False
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        for subscriber in list(self._clients):
+            self.disconnect(subscriber)
+        if self._consumer_thread is not None:
+            await asyncio.to_thread(self._consumer_thread.join)
+            self._consumer_thread = None
+
+    def metrics(self) -> PriceHubMetrics:
+        return PriceHubMetrics(
+            clients=len(self._clients),
+            symbols=len(self._subscribers),
+            received=self.received,
+            flushes=self.flushes,
+            frames=self.frames,
+            sends=self.sends,
+            conflated=self.conflated,
+            slow_disconnects=self.slow_disconnects,
+            listener_errors=self.listener_errors,
+            avg_flush_ms=self.flush_time / self.flushes * 1000 if self.flushes else 0.0,
+        )
+
+
+price_hub = PriceHub(listeners=[quote_cache.update])
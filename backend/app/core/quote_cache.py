@@ -0,0 +1,131 @@
+import json
+import os
+import threading
+from collections.abc import Iterable
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+QUOTES_MAX_SYMBOLS = int(os.getenv("QUOTES_MAX_SYMBOLS", 500))
+# The window whose OHLCV is reported alongside the last price.
+QUOTES_WINDOW = os.getenv("QUOTES_WINDOW", "1m")
+
+
+class Quote(BaseModel):
+    symbol: str
+    price: float
+    ts: int  # epoch milliseconds
+    open: float | None = None
+    high: float | None = None
+    low: float | None = None
+    volume: float | None = None
+
+
+class QuotesResponse(BaseModel):
+    quotes: dict[str, Quote]
+    missing: list[str]
+
+
+class QuoteCacheMetrics(BaseModel):
+    symbols: int
+    updates: int
+    stale_updates: int
+    lookups: int
+    hits: int
+    misses: int
+
+
+class QuoteCache:
+    """Last quote per symbol from processed-prices, kept pre-serialized.
+
+    An update re-serializes only its own symbol, into a `"SYMBOL":{...}`
+    fragment. A lookup joins the requested fragments into the response
+    body, so answering for many symbols encodes no JSON at all. Writers hold
+    the lock; readers only do dict lookups of immutable bytes.
+    """
+
+    def __init__(self, window: str = QUOTES_WINDOW):
+        self.window = window
+        self._quotes: dict[str, dict] = {}
+        self._fragments: dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self.updates = 0
+        self.stale_updates = 0
+        self.lookups = 0
+        self.hits = 0
+        self.misses = 0
+
+    def update(self, events: Iterable[dict]) -> None:
+        """Apply processed-prices events: window results and anomaly ticks."""
+        with self._lock:
+            changed: set[str] = set()
+            for event in events:
+                symbol = event.get("symbol")
+                if event.get("type") == "window":
+                    if event.get("window") != self.window:
+                        continue
+                    price, ts = event.get("close"), event.get("end")
+                else:
+                    price, ts = event.get("price"), event.get("ts")
+                if (
+                    not symbol
+                    or not isinstance(price, int | float)
+                    or not isinstance(ts, int)
+                ):
+                    continue
+                quote = self._quotes.get(symbol)
+                if quote is None:
+                    quote = self._quotes[symbol] = {"symbol": symbol, "ts": -1}
+                if ts < quote["ts"]:
+                    self.stale_updates += 1
+                    continue
+                quote["price"] = price
+                quote["ts"] = ts
+                if event.get("type") == "window":
+                    for field in ("open", "high", "low", "volume"):
+                        quote[field] = event.get(field)
+                changed.add(symbol)
+            for symbol in changed:
+                quote = json.dumps(self._quotes[symbol], separators=(",", ":"))
+                self._fragments[symbol] = f"{json.dumps(symbol)}:{quote}".encode()
+            self.updates += len(changed)
+
+    def get_many(self, symbols: Iterable[str]) -> bytes:
+        """A QuotesResponse JSON body for `symbols`."""
+        symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols if symbol))
+        if len(symbols) > QUOTES_MAX_SYMBOLS:
+            raise HTTPException(status_code=400, detail="Too many symbols")
+        fragments = self._fragments
+        found: list[bytes] = []
+        missing: list[str] = []
+        for symbol in symbols:
+            fragment = fragments.get(symbol)
+            if fragment is None:
+                missing.append(symbol)
+            else:
+                found.append(fragment)
+        self.lookups += 1
+        self.hits += len(found)
+        self.misses += len(missing)
+        return b"".join(
+            (
+                b'{"quotes":{',
+                b",".join(found),
+                b'},"missing":',
+                json.dumps(missing).encode(),
+                b"}",
+            )
+        )
+
+    def metrics(self) -> QuoteCacheMetrics:
+        return QuoteCacheMetrics(
+            symbols=len(self._fragments),
+            updates=self.updates,
+            stale_updates=self.stale_updates,
+            lookups=self.lookups,
+            hits=self.hits,
+            misses=self.misses,
+        )
+
+
+quote_cache = QuoteCache()
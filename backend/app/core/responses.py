@@ -0,0 +1,27 @@
+from typing import Any
+
+from fastapi import Response
+from pydantic import BaseModel
+
+
+class ModelResponse(Response):
+    """JSON response rendered straight from a pydantic model.
+
+    Returning a Response makes FastAPI skip `response_model` validation and
+    serialization; the model is dumped to JSON bytes once in pydantic-core.
+    Routes keep `response_model` for the OpenAPI schema.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: BaseModel) -> bytes:
+        return content.__pydantic_serializer__.to_json(content)
+
+
+def columns(entity: Any, model: type[BaseModel]) -> list:
+    """The entity's columns for every field of a response model.
+
+    Selecting these instead of the entity returns plain rows, which
+    `model.model_validate` reads like ORM objects without hydrating them.
+    """
+    return [getattr(entity, name) for name in model.model_fields]
@@ -0,0 +1,387 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import UTC, datetime
+from pathlib import Path
+
+import numpy as np
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+TICK_STORE_DIR = os.getenv("TICK_STORE_DIR", "data/ticks")
+# A day is compacted into one segment once it has more segments than this.
+TICK_STORE_MAX_SEGMENTS = int(os.getenv("TICK_STORE_MAX_SEGMENTS", 16))
+# Each mapped column holds a file descriptor, so only this many segments stay
+# mapped; the least recently read are unmapped first.
+TICK_STORE_MAX_MAPPED = int(os.getenv("TICK_STORE_MAX_MAPPED", 256))
+
+DAY_MS = 86_400_000
+COLUMNS = {"ts": np.dtype("<i8"), "price": np.dtype("<f8"), "size": np.dtype("<f8")}
+# Symbols are directory names: at least one alphanumeric keeps out "." and "..".
+SYMBOL_PATTERN = re.compile(r"^(?=.*[A-Z0-9])[A-Z0-9.^=-]{1,20}$")
+SEGMENT_PATTERN = re.compile(r"^(\d{8})-(\d{8})\.ts\.npy$")
+
+
+class TickStoreMetrics(BaseModel):
+    symbols: int
+    segments: int
+    rows_written: int
+    rows_read: int
+    scans: int
+    compactions: int
+
+
+class Segment:
+    """One immutable, ts-sorted columnar segment covering sequence numbers lo..hi.
+
+    Appends write segments with lo == hi; compaction replaces a run of segments
+    with one covering their whole range. Columns are memory-mapped on first read
+    and stay mapped until `release()`.
+    """
+
+    __slots__ = ("path", "lo", "hi", "start", "end", "rows", "_columns")
+
+    def __init__(self, path: Path, lo: int, hi: int, ts: np.ndarray | None = None):
+        self.path = path
+        self.lo = lo
+        self.hi = hi
+        self._columns: dict[str, np.ndarray] | None = None
+        if ts is None:
+            # Mapped only to read the bounds; unmapped again when dropped.
+            ts = np.load(self.file("ts"), mmap_mode="r")
+        self.rows = len(ts)
+        self.start = int(ts[0]) if self.rows else 0
+        self.end = int(ts[-1]) if self.rows else -1
+
+    @property
+    def name(self) -> str:
+        return f"{self.lo:08d}-{self.hi:08d}"
+
+    def file(self, column: str) -> Path:
+        return self.path / f"{self.name}.{column}.npy"
+
+    def columns(self) -> dict[str, np.ndarray]:
+        if self._columns is None:
+            self._columns = {
+                column: np.load(self.file(column), mmap_mode="r") for column in COLUMNS
+            }
+        return self._columns
+
+    def release(self) -> None:
+        # Views already handed out keep their own reference to the mapping.
+        self._columns = None
+
+    def delete(self) -> None:
+        # Open memory maps stay valid after unlink, so in-flight reads finish.
+        for column in COLUMNS:
+            self.file(column).unlink(missing_ok=True)
+
+
+def _mtime(path: Path) -> int | None:
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+class Day:
+    """A day directory's segments, as of the directory's mtime when listed."""
+
+    __slots__ = ("path", "mtime", "segments")
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.mtime: int | None = None
+        self.segments: list[Segment] = []
+
+
+class SymbolDays:
+    """A symbol's days, as of the symbol directory's mtime when listed."""
+
+    __slots__ = ("mtime", "days")
+
+    def __init__(self):
+        self.mtime: int | None = None
+        self.days: dict[int, Day] = {}
+
+
+def _write_segment(path: Path, lo: int, hi: int, columns: dict[str, np.ndarray]):
+    path.mkdir(parents=True, exist_ok=True)
+    name = f"{lo:08d}-{hi:08d}"
+    # ts is renamed into place last: a segment is visible once its ts file is.
+    for column in ("price", "size", "ts"):
+        tmp = path / f"{name}.{column}.npy.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(columns[column], dtype=COLUMNS[column]))
+        os.replace(tmp, path / f"{name}.{column}.npy")
+    return Segment(path, lo, hi, ts=columns["ts"])
+
+
+def _sort(columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    ts = columns["ts"]
+    if len(ts) > 1 and np.any(ts[1:] < ts[:-1]):
+        order = np.argsort(ts, kind="stable")
+        columns = {column: values[order] for column, values in columns.items()}
+    return columns
+
+
+def _merge(pieces: list[dict[str, np.ndarray]]) -> dict[str, np.ndarray]:
+    if len(pieces) == 1:
+        return pieces[0]
+    return _sort(
+        {
+            column: np.concatenate([piece[column] for piece in pieces])
+            for column in COLUMNS
+        }
+    )
+
+
+class TickStore:
+    """Append-only columnar tick store: root/SYMBOL/YYYY-MM-DD/<segment>.<col>.npy.
+
+    Each segment is sorted by ts and the in-memory index keeps its first and
+    last ts, so a range scan opens only overlapping segments of overlapping
+    days and binary-searches their memory-mapped ts column. A scan hitting a
+    single segment returns read-only views of the mapped files without copying.
+
+    Ticks are written by another process (kafka_test/tick_writer.py), one
+    writer per symbol. Adding or removing a file changes its directory's
+    mtime, so the index re-lists a symbol's days when the symbol directory's
+    mtime moves, and a day's segments when the day directory's does.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        max_segments: int = TICK_STORE_MAX_SEGMENTS,
+        max_mapped: int = TICK_STORE_MAX_MAPPED,
+    ):
+        self.root = Path(root)
+        self.max_segments = max_segments
+        self._index: dict[str, SymbolDays] = {}
+        self._mapped: OrderedDict[Segment, None] = OrderedDict()
+        self.max_mapped = max_mapped
+        self._lock = threading.Lock()
+        self.rows_written = 0
+        self.rows_read = 0
+        self.scans = 0
+        self.compactions = 0
+
+    @staticmethod
+    def normalize_symbol(symbol: str) -> str:
+        symbol = symbol.upper()
+        if not SYMBOL_PATTERN.match(symbol):
+            raise HTTPException(status_code=400, detail="Invalid symbol")
+        return symbol
+
+    def _day_path(self, symbol: str, day: int) -> Path:
+        name = datetime.fromtimestamp(day * DAY_MS / 1000, UTC).strftime("%Y-%m-%d")
+        return self.root / symbol / name
+
+    def _load_day(self, path: Path) -> list[Segment]:
+        segments = []
+        for entry in path.iterdir():
+            match = SEGMENT_PATTERN.match(entry.name)
+            if match:
+                segments.append(Segment(path, int(match[1]), int(match[2])))
+        # Drop segments already folded into a compacted one (interrupted compaction).
+        segments.sort(key=lambda segment: (segment.lo, -segment.hi))
+        kept: list[Segment] = []
+        for segment in segments:
+            if kept and segment.hi <= kept[-1].hi:
+                segment.delete()
+            else:
+                kept.append(segment)
+        return kept
+
+    def _days(self, symbol: str) -> dict[int, Day]:
+        """The symbol's days, re-listed if its directory changed since."""
+        symbol_days = self._index.get(symbol)
+        if symbol_days is None:
+            symbol_days = self._index[symbol] = SymbolDays()
+        directory = self.root / symbol
+        mtime = _mtime(directory)
+        if mtime != symbol_days.mtime:
+            days = {}
+            if mtime is not None:
+                for entry in directory.iterdir():
+                    try:
+                        date = datetime.strptime(entry.name, "%Y-%m-%d")
+                    except ValueError:
+                        continue
+                    day = int(date.replace(tzinfo=UTC).timestamp() * 1000) // DAY_MS
+                    days[day] = symbol_days.days.get(day) or Day(entry)
+            symbol_days.mtime = mtime
+            symbol_days.days = days
+        return symbol_days.days
+
+    def _segments(self, symbol: str, day: int) -> list[Segment]:
+        """The day's segments, reloaded if its directory changed since."""
+        days = self._days(symbol)
+        entry = days.get(day)
+        if entry is None:
+            entry = days[day] = Day(self._day_path(symbol, day))
+        mtime = _mtime(entry.path)
+        if mtime != entry.mtime:
+            self._forget(entry.segments)
+            entry.segments = self._load_day(entry.path) if mtime is not None else []
+            # _load_day may have removed leftovers, which moves the mtime again.
+            entry.mtime = _mtime(entry.path)
+        return entry.segments
+
+    def append(
+        self,
+        symbol: str,
+        ts: np.ndarray,
+        price: np.ndarray,
+        size: np.ndarray | None = None,
+    ) -> int:
+        """Write ticks as new segments (one per UTC day touched); returns row count."""
+        symbol = self.normalize_symbol(symbol)
+        ts = np.asarray(ts, dtype=COLUMNS["ts"])
+        if not len(ts):
+            return 0
+        columns = _sort(
+            {
+                "ts": ts,
+                "price": np.asarray(price, dtype=COLUMNS["price"]),
+                "size": (
+                    np.full(len(ts), np.nan)
+                    if size is None
+                    else np.asarray(size, dtype=COLUMNS["size"])
+                ),
+            }
+        )
+        with self._lock:
+            ts = columns["ts"]
+            for day in np.unique(ts // DAY_MS).tolist():
+                lo, hi = np.searchsorted(ts, [day * DAY_MS, (day + 1) * DAY_MS])
+                segments = self._segments(symbol, day)
+                seq = segments[-1].hi + 1 if segments else 0
+                segment = _write_segment(
+                    self._day_path(symbol, day),
+                    seq,
+                    seq,
+                    {column: values[lo:hi] for column, values in columns.items()},
+                )
+                segments.append(segment)
+                if len(segments) > self.max_segments:
+                    self._compact(symbol, day)
+                self._written(symbol, day)
+            self.rows_written += len(ts)
+        return len(ts)
+
+    def _open(self, segment: Segment) -> dict[str, np.ndarray]:
+        """The segment's mapped columns, unmapping the least recently read."""
+        columns = segment.columns()
+        self._mapped[segment] = None
+        self._mapped.move_to_end(segment)
+        while len(self._mapped) > self.max_mapped:
+            evicted, _ = self._mapped.popitem(last=False)
+            evicted.release()
+        return columns
+
+    def _forget(self, segments: list[Segment]) -> None:
+        for segment in segments:
+            self._mapped.pop(segment, None)
+            segment.release()
+
+    def _reindex(self, symbol: str) -> None:
+        """Drop the symbol's index, so the next read lists it from disk."""
+        symbol_days = self._index.pop(symbol, None)
+        if symbol_days is not None:
+            for entry in symbol_days.days.values():
+                self._forget(entry.segments)
+
+    def _map_range(self, symbol: str, start: int, end: int) -> list[dict]:
+        """Mapped columns of every segment overlapping start..end."""
+        segments = [
+            segment
+            for day in sorted(self._days(symbol))
+            if start // DAY_MS <= day <= (end - 1) // DAY_MS
+            for segment in self._segments(symbol, day)
+            if segment.end >= start and segment.start < end
+        ]
+        return [self._open(segment) for segment in segments]
+
+    def _written(self, symbol: str, day: int) -> None:
+        """Take this process's own writes as seen, so they cause no reload."""
+        symbol_days = self._index[symbol]
+        entry = symbol_days.days[day]
+        entry.mtime = _mtime(entry.path)
+        symbol_days.mtime = _mtime(entry.path.parent)
+
+    def _compact(self, symbol: str, day: int) -> None:
+        entry = self._index[symbol].days[day]
+        segments = entry.segments
+        if len(segments) < 2:
+            return
+        merged = _merge([segment.columns() for segment in segments])
+        compacted = _write_segment(
+            self._day_path(symbol, day), segments[0].lo, segments[-1].hi, merged
+        )
+        entry.segments = [compacted]
+        for segment in segments:
+            segment.delete()
+        self._forget(segments)
+        self.compactions += 1
+
+    def compact(self, symbol: str) -> None:
+        symbol = self.normalize_symbol(symbol)
+        with self._lock:
+            for day in list(self._days(symbol)):
+                self._segments(symbol, day)
+                self._compact(symbol, day)
+                self._written(symbol, day)
+
+    def scan(
+        self, symbol: str, start: int, end: int, limit: int | None = None
+    ) -> dict[str, np.ndarray]:
+        """Ticks with start <= ts < end (epoch ms), in ts order, at most `limit`."""
+        symbol = self.normalize_symbol(symbol)
+        with self._lock:
+            try:
+                mapped = self._map_range(symbol, start, end)
+            except FileNotFoundError:
+                # The writer compacted a day between our listing and mapping
+                # it, unlinking segments the index still had.
+                self._reindex(symbol)
+                mapped = self._map_range(symbol, start, end)
+
+        pieces = []
+        for columns in mapped:
+            lo, hi = np.searchsorted(columns["ts"], [start, end])
+            if lo < hi:
+                pieces.append(
+                    {column: values[lo:hi] for column, values in columns.items()}
+                )
+        if not pieces:
+            result = {column: np.empty(0, dtype) for column, dtype in COLUMNS.items()}
+        else:
+            result = _merge(pieces)
+        if limit is not None:
+            result = {column: values[:limit] for column, values in result.items()}
+        self.scans += 1
+        self.rows_read += len(result["ts"])
+        return result
+
+    def metrics(self) -> TickStoreMetrics:
+        with self._lock:
+            segments = [
+                segment
+                for symbol_days in self._index.values()
+                for day in symbol_days.days.values()
+                for segment in day.segments
+            ]
+            return TickStoreMetrics(
+                symbols=len(self._index),
+                segments=len(segments),
+                rows_written=self.rows_written,
+                rows_read=self.rows_read,
+                scans=self.scans,
+                compactions=self.compactions,
+            )
+
+
+tick_store = TickStore(TICK_STORE_DIR)
@@ -1 +1,5 @@
+from .alert import Alert  # noqa: F401
+from .bar import Bar  # noqa: F401
+from .rule import Rule  # noqa: F401
 from .user import User  # noqa: F401
+from .watchlist import Watchlist  # noqa: F401
@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta
+from typing import Literal
+
+from sqlalchemy import BigInteger, DateTime, Double, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+Resolution = Literal["1m", "5m", "1h", "1d"]
+
+# Each resolution is rolled up from the one before it, so each divides the next.
+RESOLUTIONS: dict[Resolution, timedelta] = {
+    "1m": timedelta(minutes=1),
+    "5m": timedelta(minutes=5),
+    "1h": timedelta(hours=1),
+    "1d": timedelta(days=1),
+}
+
+
+class Bar(Base):
+    """Pre-aggregated OHLCV bar, range-partitioned by month on `bucket`.
+
+    Written by the rollup consumer (kafka_test/rollup.py), which creates the
+    monthly partitions it needs and merges partial bars on conflict.
+    """
+
+    __tablename__ = "bars"
+    __table_args__ = {"postgresql_partition_by": "RANGE (bucket)"}
+
+    symbol: Mapped[str] = mapped_column(String(20), primary_key=True)
+    resolution: Mapped[str] = mapped_column(String(3), primary_key=True)
+    bucket: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    open: Mapped[float] = mapped_column(Double)
+    high: Mapped[float] = mapped_column(Double)
+    low: Mapped[float] = mapped_column(Double)
+    close: Mapped[float] = mapped_column(Double)
+    volume: Mapped[float] = mapped_column(Double)
+    trades: Mapped[int] = mapped_column(BigInteger)
+    open_ts: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    close_ts: Mapped[datetime] = mapped_column(DateTime(timezone=True))
@@ -0,0 +1,55 @@
+import uuid
+from datetime import datetime
+from enum import Enum
+
+from sqlalchemy import DateTime, Double, ForeignKey, Index, String, func, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class RuleKind(str, Enum):
+    PRICE_ABOVE = "price_above"
+    PRICE_BELOW = "price_below"
+    # Percent change against the reference (last close) price.
+    CHANGE_ABOVE = "change_above"
+    CHANGE_BELOW = "change_below"
+
+
+class Rule(Base):
+    """A user's price alert, matched against ticks by kafka_test/rule_engine.py.
+
+    Deletes are soft so the engine's incremental sync, which polls by
+    (updated_at, id), also sees removals.
+    """
+
+    __tablename__ = "rules"
+    __table_args__ = (
+        Index("ix_rules_user_id_created_at", "user_id", "created_at"),
+        Index("ix_rules_updated_at_id", "updated_at", "id"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        server_default=text("gen_random_uuid()"),
+    )
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE")
+    )
+    symbol: Mapped[str] = mapped_column(String(20))
+    kind: Mapped[RuleKind] = mapped_column(String(20))
+    threshold: Mapped[float] = mapped_column(Double)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+    deleted_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
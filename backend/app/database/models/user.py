@@ -1,10 +1,21 @@
 import uuid
 from datetime import datetime
 from enum import Enum
+from typing import Literal
 
 from pydantic import BaseModel
-from sqlalchemy import DateTime, Select, String, func, or_, text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import (
+    Computed,
+    DateTime,
+    Index,
+    Select,
+    String,
+    func,
+    literal,
+    or_,
+    text,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.core.database import Base
@@ -17,6 +28,30 @@ class Role(str, Enum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_created_at_id", "created_at", "id"),
+        Index(
+            "ix_users_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_users_email_trgm",
+            "email",
+            postgresql_using="gin",
+            postgresql_ops={"email": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_users_lower_name_prefix",
+            text("lower(name) text_pattern_ops"),
+        ),
+        Index(
+            "ix_users_lower_email_prefix",
+            text("lower(email) text_pattern_ops"),
+        ),
+        Index("ix_users_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
@@ -39,22 +74,65 @@ class User(Base):
     deleted_at: Mapped[datetime | None] = mapped_column(
         DateTime(timezone=True), nullable=True
     )
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(email, ''))",
+            persisted=True,
+        ),
+        deferred=True,
+    )
+
+
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
 
 
 class UserFilter(BaseModel):
     search_text: str | None = None
+    search_mode: Literal["contains", "prefix", "token"] = "contains"
+    rank: bool = False
     role: Role | None = None
     is_deleted: bool | None = None
 
-    def apply(self, stmt: Select) -> Select:
-        conditions = []
-        if self.search_text:
-            conditions.append(
+    @property
+    def is_empty(self) -> bool:
+        return not self.search_text and not self.role and self.is_deleted is None
+
+    def _search(self, stmt: Select) -> Select:
+        search_text = self.search_text or ""
+        if self.search_mode == "token":
+            query = func.websearch_to_tsquery("simple", search_text)
+            stmt = stmt.where(User.search_vector.op("@@")(query))
+            if self.rank:
+                stmt = stmt.order_by(func.ts_rank(User.search_vector, query).desc())
+            return stmt
+
+        if self.search_mode == "prefix":
+            pattern = f"{escape_like(search_text.lower())}%"
+            stmt = stmt.where(
                 or_(
-                    User.email.ilike(f"%{self.search_text}%"),
-                    User.name.ilike(f"%{self.search_text}%"),
+                    func.lower(User.email).like(pattern),
+                    func.lower(User.name).like(pattern),
                 )
             )
+        else:
+            pattern = f"%{escape_like(search_text)}%"
+            stmt = stmt.where(or_(User.email.ilike(pattern), User.name.ilike(pattern)))
+        if self.rank:
+            stmt = stmt.order_by(
+                func.greatest(
+                    func.similarity(User.email, literal(search_text)),
+                    func.similarity(User.name, literal(search_text)),
+                ).desc()
+            )
+        return stmt
+
+    def apply(self, stmt: Select) -> Select:
+        if self.search_text:
+            stmt = self._search(stmt)
+
+        conditions = []
         if self.role:
             conditions.append(User.role == self.role)
 
@@ -0,0 +1,106 @@
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import BigInteger, any_, delete, func, literal, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.database.models.alert import Alert
+
+ALERT_RETRY_BACKOFF = float(os.getenv("ALERT_RETRY_BACKOFF", 1))
+ALERT_RETRY_MAX_BACKOFF = float(os.getenv("ALERT_RETRY_MAX_BACKOFF", 300))
+
+
+class AlertRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create_many(self, values: list[dict]) -> int:
+        """Insert alerts, skipping (rule_id, triggered_at) pairs that exist."""
+        stmt = (
+            pg_insert(Alert)
+            .values(values)
+            .on_conflict_do_nothing(constraint="uq_alerts_rule_id_ts")
+            .returning(Alert.id)
+        )
+        result = await self.db.execute(stmt)
+        return len(result.scalars().all())
+
+    async def claim(self, limit: int, lease: float) -> list[Alert]:
+        """Lease up to `limit` due alerts; rows locked by another claim are skipped.
+
+        The lease is committed with the claim, so delivery runs outside any
+        transaction and unacknowledged rows come due again once it expires.
+        """
+        claimed = (
+            select(Alert.id)
+            .where(Alert.delivered_at.is_(None), Alert.available_at <= func.now())
+            .order_by(Alert.available_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .cte("claimed")
+        )
+        stmt = (
+            update(Alert)
+            .where(Alert.id == claimed.c.id)
+            .values(
+                available_at=func.now() + timedelta(seconds=lease),
+                attempts=Alert.attempts + 1,
+            )
+            .returning(Alert)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.db.execute(stmt)
+        return list(result.scalars().all())
+
+    @staticmethod
+    def _ids(alert_ids: list[int]):
+        # One array parameter however many ids; IN would bind one per id.
+        return any_(literal(alert_ids, ARRAY(BigInteger)))
+
+    async def mark_delivered(self, alert_ids: list[int]) -> None:
+        stmt = (
+            update(Alert)
+            .where(Alert.id == self._ids(alert_ids))
+            .values(delivered_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.execute(stmt)
+
+    async def release(self, alert_ids: list[int]) -> None:
+        """Make failed alerts due again after an exponential backoff."""
+        backoff = func.least(
+            ALERT_RETRY_MAX_BACKOFF,
+            ALERT_RETRY_BACKOFF * func.power(2, Alert.attempts - 1),
+        )
+        stmt = (
+            update(Alert)
+            .where(Alert.id == self._ids(alert_ids))
+            .values(available_at=func.now() + literal(timedelta(seconds=1)) * backoff)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.execute(stmt)
+
+    async def expire(self, ttl: float) -> int:
+        """Delete undelivered alerts created more than `ttl` seconds ago."""
+        stmt = (
+            delete(Alert)
+            .where(
+                Alert.delivered_at.is_(None),
+                Alert.created_at < func.now() - timedelta(seconds=ttl),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.db.execute(stmt)
+        return result.rowcount
+
+    async def pending(self) -> tuple[int, datetime | None]:
+        """Undelivered alert count and the oldest one's creation time."""
+        stmt = select(func.count(), func.min(Alert.created_at)).where(
+            Alert.delivered_at.is_(None)
+        )
+        result = await self.db.execute(stmt)
+        count, oldest = result.one()
+        return count, oldest
@@ -0,0 +1,40 @@
+from collections.abc import Sequence
+from datetime import datetime
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.api.schemas.bar import BarResponse
+from app.core.responses import columns
+from app.database.models.bar import Bar, Resolution
+
+BAR_COLUMNS = [Bar.symbol, *columns(Bar, BarResponse)]
+
+
+class BarRepository:
+    def __init__(self, db: AsyncSession, read_db: AsyncSession | None = None):
+        self.db = db
+        self.read_db = read_db if read_db is not None else db
+
+    async def get_many(
+        self,
+        symbols: list[str],
+        resolution: Resolution,
+        start: datetime,
+        end: datetime,
+    ) -> Sequence[Row]:
+        # Matches the primary key (symbol, resolution, bucket) and prunes to the
+        # monthly partitions overlapping [start, end).
+        stmt = (
+            select(*BAR_COLUMNS)
+            .where(
+                Bar.symbol.in_(symbols),
+                Bar.resolution == resolution,
+                Bar.bucket >= start,
+                Bar.bucket < end,
+            )
+            .order_by(Bar.symbol, Bar.bucket)
+        )
+        result = await self.read_db.execute(stmt)
+        return result.all()
@@ -0,0 +1,100 @@
+import uuid
+from collections.abc import Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import Row, Update, func, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.api.schemas.rule import RuleResponse, RuleUpdate
+from app.core.paging import Paging
+from app.core.responses import columns
+from app.database.models.rule import Rule, RuleKind
+
+RULE_LIST_COLUMNS = columns(Rule, RuleResponse)
+
+
+class RuleRepository:
+    def __init__(self, db: AsyncSession, read_db: AsyncSession | None = None):
+        self.db = db
+        self.read_db = read_db if read_db is not None else db
+
+    async def create(
+        self, user_id: uuid.UUID, symbol: str, kind: RuleKind, threshold: float
+    ) -> Rule:
+        stmt = (
+            insert(Rule)
+            .values(
+                user_id=user_id,
+                symbol=symbol,
+                kind=kind,
+                threshold=threshold,
+            )
+            .returning(Rule)
+        )
+        result = await self.db.execute(stmt)
+        return result.scalar_one()
+
+    async def get(self, rule_id: uuid.UUID) -> Rule:
+        stmt = select(Rule).where(Rule.id == rule_id, Rule.deleted_at.is_(None))
+        result = await self.read_db.execute(stmt)
+        rule = result.scalar_one_or_none()
+        if rule is None:
+            raise HTTPException(status_code=404, detail="Rule not found")
+        return rule
+
+    async def get_many(self, user_id: uuid.UUID, paging: Paging) -> Sequence[Row]:
+        stmt = select(*RULE_LIST_COLUMNS).where(
+            Rule.user_id == user_id, Rule.deleted_at.is_(None)
+        )
+        stmt = paging.apply(stmt, Rule.created_at)
+        result = await self.read_db.execute(stmt)
+        return result.all()
+
+    async def count(self, user_id: uuid.UUID) -> int:
+        stmt = (
+            select(func.count())
+            .select_from(Rule)
+            .where(Rule.user_id == user_id, Rule.deleted_at.is_(None))
+        )
+        result = await self.db.execute(stmt)
+        return result.scalar_one()
+
+    async def _update_or_404(self, stmt: Update) -> Rule:
+        stmt = stmt.returning(Rule).execution_options(populate_existing=True)
+        result = await self.db.execute(stmt)
+        rule = result.scalar_one_or_none()
+        if rule is None:
+            raise HTTPException(status_code=404, detail="Rule not found")
+        return rule
+
+    # Writes match on the owner too, so a rule of another user is a 404 without
+    # reading it first.
+    async def update(
+        self, user_id: uuid.UUID, rule_id: uuid.UUID, rule_update: RuleUpdate
+    ) -> Rule:
+        stmt = (
+            update(Rule)
+            .where(
+                Rule.id == rule_id,
+                Rule.user_id == user_id,
+                Rule.deleted_at.is_(None),
+            )
+            .values(
+                kind=rule_update.kind,
+                threshold=rule_update.threshold,
+            )
+        )
+        return await self._update_or_404(stmt)
+
+    async def delete(self, user_id: uuid.UUID, rule_id: uuid.UUID) -> Rule:
+        stmt = (
+            update(Rule)
+            .where(
+                Rule.id == rule_id,
+                Rule.user_id == user_id,
+                Rule.deleted_at.is_(None),
+            )
+            .values(deleted_at=func.now())
+        )
+        return await self._update_or_404(stmt)
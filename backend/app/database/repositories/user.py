@@ -1,40 +1,65 @@
+import os
 import uuid
+from collections.abc import Sequence
 from datetime import UTC, datetime
 
 from fastapi import HTTPException
-from sqlalchemy import func, insert, update
+from sqlalchemy import Row, Update, func, insert, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from app.api.schemas.user import UserUpdate
-from app.core.paging import Paging
+from app.api.schemas.user import UserResponse, UserUpdate
+from app.core.cache import InMemoryCacheBackend, LRUCache, TieredCache
+from app.core.paging import CursorPaging, Paging
 from app.core.password import hash_password
+from app.core.responses import columns
 from app.database.models.user import Role, User, UserFilter
 
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 10000))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", 300))
+USER_CACHE_SHARED = os.getenv("USER_CACHE_SHARED", "")
+# Invalidations only reach this process's LRU and the shared tier, so other
+# workers' LRUs bound their staleness with this short TTL instead.
+USER_CACHE_LOCAL_TTL = float(os.getenv("USER_CACHE_LOCAL_TTL", 5))
+
+# List reads select only what UserResponse needs and skip ORM hydration.
+USER_LIST_COLUMNS = columns(User, UserResponse)
+
+user_cache: TieredCache[UserResponse] = TieredCache(
+    UserResponse,
+    namespace="user",
+    local=LRUCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_LOCAL_TTL),
+    shared=InMemoryCacheBackend() if USER_CACHE_SHARED == "memory" else None,
+    ttl=USER_CACHE_TTL,
+)
+
 
 class UserRepository:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, read_db: AsyncSession | None = None):
         self.db = db
+        self.read_db = read_db if read_db is not None else db
 
-    async def create(
-        self, name: str, email: str, password: str, role: Role
-    ) -> uuid.UUID:
+    async def create(self, name: str, email: str, password: str, role: Role) -> User:
+        hashed_password = await hash_password(password)
         stmt = (
             insert(User)
             .values(
                 name=name,
                 email=email,
-                password=hash_password(password),
+                password=hashed_password,
                 role=role,
             )
-            .returning(User.id)
+            .returning(User)
         )
         result = await self.db.execute(stmt)
-        return result.scalar_one()
+        user = result.scalar_one()
+        await self.invalidate(user.id)
+        return user
 
     async def get(self, user_id: uuid.UUID) -> User:
         stmt = select(User).where(User.id == user_id)
-        result = await self.db.execute(stmt)
+        result = await self.read_db.execute(stmt)
         user = result.scalar_one_or_none()
         if user is None:
             raise HTTPException(status_code=404, detail="User not found")
@@ -45,20 +70,79 @@ class UserRepository:
         result = await self.db.execute(stmt)
         return result.scalar_one_or_none()
 
-    async def get_many(self, paging: Paging, filter: UserFilter) -> list[User]:
-        stmt = select(User)
+    async def get_many(self, paging: Paging, filter: UserFilter) -> Sequence[Row]:
+        stmt = select(*USER_LIST_COLUMNS)
         stmt = filter.apply(stmt)
         stmt = paging.apply(stmt, User.created_at)
-        result = await self.db.execute(stmt)
-        return list(result.scalars().all())
+        result = await self.read_db.execute(stmt)
+        return result.all()
+
+    async def get_many_with_total(
+        self, paging: Paging, filter: UserFilter
+    ) -> tuple[Sequence[Row], int | None]:
+        if paging.total == "none":
+            return await self.get_many(paging=paging, filter=filter), None
+        if paging.total == "estimated" and filter.is_empty:
+            users = await self.get_many(paging=paging, filter=filter)
+            total = await self.estimate_count()
+            if total is None:
+                total = await self.count(filter=filter)
+            return users, total
+
+        stmt = select(*USER_LIST_COLUMNS, func.count().over().label("total"))
+        stmt = filter.apply(stmt)
+        stmt = paging.apply(stmt, User.created_at)
+        result = await self.read_db.execute(stmt)
+        rows = result.all()
+        if rows:
+            # The extra "total" column is ignored when rows become models.
+            return rows, rows[0].total
+        # An out-of-range page has no rows to carry the window count.
+        if paging.page > 1:
+            return [], await self.count(filter=filter)
+        return [], 0
+
+    async def estimate_count(self) -> int | None:
+        stmt = text(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)"
+        ).bindparams(table=User.__tablename__)
+        result = await self.read_db.execute(stmt)
+        estimate = result.scalar_one_or_none()
+        # reltuples is -1 until the table has been vacuumed or analyzed.
+        if estimate is None or estimate < 0:
+            return None
+        return estimate
+
+    async def get_many_by_cursor(
+        self, paging: CursorPaging, filter: UserFilter
+    ) -> list[Row]:
+        stmt = select(*USER_LIST_COLUMNS)
+        stmt = filter.apply(stmt)
+        stmt = paging.apply(stmt, User.created_at, User.id)
+        result = await self.read_db.execute(stmt)
+        return list(result.all())
 
     async def count(self, filter: UserFilter) -> int:
         stmt = select(func.count()).select_from(User)
         stmt = filter.apply(stmt)
-        result = await self.db.execute(stmt)
+        result = await self.read_db.execute(stmt)
         return result.scalar_one()
 
-    async def update(self, user_id: uuid.UUID, user_update: UserUpdate) -> None:
+    async def invalidate(self, user_id: uuid.UUID) -> None:
+        await user_cache.delete(str(user_id))
+
+    async def _update_returning(self, stmt: Update) -> User | None:
+        stmt = stmt.returning(User).execution_options(populate_existing=True)
+        result = await self.db.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def _update_or_404(self, stmt: Update) -> User:
+        user = await self._update_returning(stmt)
+        if user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        return user
+
+    async def update(self, user_id: uuid.UUID, user_update: UserUpdate) -> User:
         stmt = (
             update(User)
             .where(User.id == user_id)
@@ -66,19 +150,24 @@ class UserRepository:
                 name=user_update.name,
             )
         )
-        await self.db.execute(stmt)
+        user = await self._update_or_404(stmt)
+        await self.invalidate(user_id)
+        return user
 
-    async def update_password(self, user_id: uuid.UUID, password: str) -> None:
+    async def update_password(self, user_id: uuid.UUID, password: str) -> User:
+        hashed_password = await hash_password(password)
         stmt = (
             update(User)
             .where(User.id == user_id)
             .values(
-                password=hash_password(password),
+                password=hashed_password,
             )
         )
-        await self.db.execute(stmt)
+        user = await self._update_or_404(stmt)
+        await self.invalidate(user_id)
+        return user
 
-    async def update_role(self, user_id: uuid.UUID, role: Role) -> None:
+    async def update_role(self, user_id: uuid.UUID, role: Role) -> User:
         stmt = (
             update(User)
             .where(User.id == user_id)
@@ -86,24 +175,76 @@ class UserRepository:
                 role=role,
             )
         )
-        await self.db.execute(stmt)
+        user = await self._update_or_404(stmt)
+        await self.invalidate(user_id)
+        return user
 
-    async def deactivate(self, user_id: uuid.UUID) -> None:
+    async def deactivate(self, user_id: uuid.UUID) -> User | None:
         stmt = (
             update(User)
-            .where(User.id == user_id)
+            .where(User.id == user_id, User.deleted_at.is_(None))
             .values(
                 deleted_at=datetime.now(UTC),
             )
         )
-        await self.db.execute(stmt)
+        user = await self._update_returning(stmt)
+        await self.invalidate(user_id)
+        return user
 
-    async def reactivate(self, user_id: uuid.UUID) -> None:
+    async def reactivate(self, user_id: uuid.UUID) -> User | None:
         stmt = (
             update(User)
-            .where(User.id == user_id)
+            .where(User.id == user_id, User.deleted_at.isnot(None))
             .values(
                 deleted_at=None,
             )
         )
-        await self.db.execute(stmt)
+        user = await self._update_returning(stmt)
+        await self.invalidate(user_id)
+        return user
+
+    async def create_many(self, values: list[dict]) -> set[str]:
+        """Insert many users in one statement, skipping emails that exist.
+
+        Returns the emails that were actually inserted.
+        """
+        stmt = (
+            pg_insert(User)
+            .values(values)
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User.email)
+        )
+        result = await self.db.execute(stmt)
+        return set(result.scalars().all())
+
+    async def _update_many(self, stmt: Update) -> list[Row]:
+        stmt = stmt.returning(*USER_LIST_COLUMNS).execution_options(
+            synchronize_session=False
+        )
+        result = await self.db.execute(stmt)
+        rows = list(result.all())
+        for row in rows:
+            await self.invalidate(row.id)
+        return rows
+
+    async def update_role_many(
+        self, user_ids: list[uuid.UUID], role: Role
+    ) -> list[Row]:
+        stmt = update(User).where(User.id.in_(user_ids)).values(role=role)
+        return await self._update_many(stmt)
+
+    async def deactivate_many(self, user_ids: list[uuid.UUID]) -> list[Row]:
+        stmt = (
+            update(User)
+            .where(User.id.in_(user_ids), User.deleted_at.is_(None))
+            .values(deleted_at=datetime.now(UTC))
+        )
+        return await self._update_many(stmt)
+
+    async def reactivate_many(self, user_ids: list[uuid.UUID]) -> list[Row]:
+        stmt = (
+            update(User)
+            .where(User.id.in_(user_ids), User.deleted_at.isnot(None))
+            .values(deleted_at=None)
+        )
+        return await self._update_many(stmt)
@@ -0,0 +1,84 @@
+import uuid
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.database.models.watchlist import Watchlist
+
+
+class WatchlistRepository:
+    def __init__(self, db: AsyncSession, read_db: AsyncSession | None = None):
+        self.db = db
+        self.read_db = read_db if read_db is not None else db
+
+    async def create(
+        self, user_id: uuid.UUID, name: str, symbols: list[str]
+    ) -> Watchlist:
+        stmt = (
+            insert(Watchlist)
+            .values(
+                user_id=user_id,
+                name=name,
+                symbols=symbols,
+            )
+            .returning(Watchlist)
+        )
+        result = await self.db.execute(stmt)
+        return result.scalar_one()
+
+    async def get(self, watchlist_id: uuid.UUID) -> Watchlist:
+        stmt = select(Watchlist).where(Watchlist.id == watchlist_id)
+        result = await self.read_db.execute(stmt)
+        watchlist = result.scalar_one_or_none()
+        if watchlist is None:
+            raise HTTPException(status_code=404, detail="Watchlist not found")
+        return watchlist
+
+    async def get_many(self, user_id: uuid.UUID) -> list[Watchlist]:
+        stmt = (
+            select(Watchlist)
+            .where(Watchlist.user_id == user_id)
+            .order_by(Watchlist.created_at)
+        )
+        result = await self.read_db.execute(stmt)
+        return list(result.scalars().all())
+
+    async def count(self, user_id: uuid.UUID) -> int:
+        stmt = (
+            select(func.count())
+            .select_from(Watchlist)
+            .where(Watchlist.user_id == user_id)
+        )
+        result = await self.db.execute(stmt)
+        return result.scalar_one()
+
+    async def update(
+        self, watchlist_id: uuid.UUID, name: str, symbols: list[str]
+    ) -> Watchlist:
+        stmt = (
+            update(Watchlist)
+            .where(Watchlist.id == watchlist_id)
+            .values(
+                name=name,
+                symbols=symbols,
+            )
+            .returning(Watchlist)
+            .execution_options(populate_existing=True)
+        )
+        result = await self.db.execute(stmt)
+        watchlist = result.scalar_one_or_none()
+        if watchlist is None:
+            raise HTTPException(status_code=404, detail="Watchlist not found")
+        return watchlist
+
+    async def delete(self, watchlist_id: uuid.UUID) -> None:
+        stmt = (
+            delete(Watchlist)
+            .where(Watchlist.id == watchlist_id)
+            .returning(Watchlist.id)
+        )
+        result = await self.db.execute(stmt)
+        if result.scalar_one_or_none() is None:
+            raise HTTPException(status_code=404, detail="Watchlist not found")
@@ -1,13 +1,41 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.routes.admin_auth import router as admin_auth_router
 from app.api.routes.admin_user import router as admin_user_router
 from app.api.routes.auth import router as auth_router
+from app.api.routes.bar import router as bar_router
+from app.api.routes.quote import router as quote_router
+from app.api.routes.rule import router as rule_router
+from app.api.routes.stream import router as stream_router
+from app.api.routes.tick import router as tick_router
 from app.api.routes.user import router as user_router
+from app.api.routes.watchlist import router as watchlist_router
+from app.core.alert_dispatcher import alert_dispatcher
+from app.core.auth import token_cache
+from app.core.database import engine, pool_metrics, read_engine
 from app.core.database import health_check as health_check_db
+from app.core.password import bulk_password_hasher, password_hasher
+from app.core.price_hub import price_hub
+from app.core.quote_cache import quote_cache
+from app.core.tick_store import tick_store
+from app.database.repositories.user import user_cache
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    price_hub.start()
+    alert_dispatcher.start()
+    yield
+    await alert_dispatcher.stop()
+    await price_hub.stop()
+    password_hasher.shutdown()
+    bulk_password_hasher.shutdown()
 
-app = FastAPI(root_path="/api")
+
+app = FastAPI(root_path="/api", lifespan=lifespan)
 
 origins = ["*"]
 
@@ -28,7 +56,29 @@ async def health_check():
     return await health_check_db()
 
 
+@app.get("/metrics")
+async def metrics():
+    return {
+        "database_pool": pool_metrics(engine),
+        "database_read_pool": pool_metrics(read_engine),
+        "password_hasher": password_hasher.metrics(),
+        "bulk_password_hasher": bulk_password_hasher.metrics(),
+        "token_cache": token_cache.stats(),
+        "user_cache": user_cache.stats(),
+        "tick_store": tick_store.metrics(),
+        "price_hub": price_hub.metrics(),
+        "quote_cache": quote_cache.metrics(),
+        "alert_dispatcher": alert_dispatcher.metrics(),
+    }
+
+
 app.include_router(user_router, prefix="/users", tags=["users"])
 app.include_router(admin_user_router, prefix="/admin/users", tags=["admin_users"])
 app.include_router(auth_router, prefix="/auth", tags=["auth"])
-app.include_router(admin_auth_router, prefix="/admin/auth", tags=["admin_auth"])
\ No newline at end of file
+app.include_router(admin_auth_router, prefix="/admin/auth", tags=["admin_auth"])
+app.include_router(tick_router, prefix="/ticks", tags=["ticks"])
+app.include_router(bar_router, prefix="/bars", tags=["bars"])
+app.include_router(stream_router, prefix="/ws", tags=["stream"])
+app.include_router(rule_router, prefix="/rules", tags=["rules"])
+app.include_router(watchlist_router, prefix="/watchlists", tags=["watchlists"])
+app.include_router(quote_router, prefix="/quotes", tags=["quotes"])
\ No newline at end of file
@@ -24,7 +24,7 @@ class AuthService:
                 status_code=401,
                 detail="Invalid credentials",
             )
-        verify_password(password, user.password)
+        await verify_password(password, user.password)
         access_token = create_access_token(user_id=str(user.id), role=user.role)
         return AuthResponse(
             access_token=access_token, user=UserResponse.model_validate(user)
@@ -0,0 +1,51 @@
+import os
+from datetime import datetime
+from typing import Annotated
+
+from fastapi import Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.schemas.bar import BarResponse, BarsResponse
+from app.core.database import DbDep, ReadDbDep
+from app.database.models.bar import RESOLUTIONS, Resolution
+from app.database.repositories.bar import BarRepository
+
+BARS_MAX_SYMBOLS = int(os.getenv("BARS_MAX_SYMBOLS", 100))
+BARS_MAX_PER_SYMBOL = int(os.getenv("BARS_MAX_PER_SYMBOL", 5000))
+
+
+class BarService:
+    def __init__(self, db: AsyncSession, read_db: AsyncSession | None = None):
+        self.bar_repository = BarRepository(db, read_db=read_db)
+
+    async def get_many(
+        self,
+        symbols: list[str],
+        resolution: Resolution,
+        start: datetime,
+        end: datetime,
+    ) -> BarsResponse:
+        symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols if symbol))
+        if not symbols:
+            raise HTTPException(status_code=400, detail="No symbols given")
+        if len(symbols) > BARS_MAX_SYMBOLS:
+            raise HTTPException(status_code=400, detail="Too many symbols")
+        if end <= start:
+            raise HTTPException(status_code=400, detail="to must be after from")
+        if (end - start) / RESOLUTIONS[resolution] > BARS_MAX_PER_SYMBOL:
+            raise HTTPException(
+                status_code=400, detail="Range too large for this resolution"
+            )
+
+        result = await self.bar_repository.get_many(symbols, resolution, start, end)
+        bars: dict[str, list[BarResponse]] = {symbol: [] for symbol in symbols}
+        for bar in result:
+            bars[bar.symbol].append(BarResponse.model_validate(bar))
+        return BarsResponse(resolution=resolution, bars=bars)
+
+
+def get_bar_service(db: DbDep, read_db: ReadDbDep) -> BarService:
+    return BarService(db, read_db=read_db)
+
+
+BarServiceDep = Annotated[BarService, Depends(get_bar_service)]
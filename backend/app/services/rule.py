@@ -0,0 +1,64 @@
+import os
+import uuid
+from typing import Annotated
+
+from fastapi import Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.schemas.rule import RuleCreate, RuleResponse, RuleUpdate
+from app.core.database import DbDep, ReadDbDep
+from app.core.paging import Paging
+from app.database.repositories.rule import RuleRepository
+from app.validations.access import validate_access
+
+RULES_MAX_PER_USER = int(os.getenv("RULES_MAX_PER_USER", 100))
+
+
+class RuleService:
+    def __init__(self, db: AsyncSession, read_db: AsyncSession | None = None):
+        self.rule_repository = RuleRepository(db, read_db=read_db)
+        self.db = db
+
+    async def create(self, user_id: uuid.UUID, rule_create: RuleCreate) -> RuleResponse:
+        if await self.rule_repository.count(user_id) >= RULES_MAX_PER_USER:
+            raise HTTPException(status_code=400, detail="Too many rules")
+        rule = await self.rule_repository.create(
+            user_id=user_id,
+            symbol=rule_create.symbol.upper(),
+            kind=rule_create.kind,
+            threshold=rule_create.threshold,
+        )
+        await self.db.commit()
+        return RuleResponse.model_validate(rule)
+
+    async def get(self, user_id: uuid.UUID, rule_id: uuid.UUID) -> RuleResponse:
+        rule = await self.rule_repository.get(rule_id)
+        validate_access(owner_id=rule.user_id, user_id=user_id)
+        return RuleResponse.model_validate(rule)
+
+    async def get_many(
+        self, user_id: uuid.UUID, paging: Paging
+    ) -> tuple[list[RuleResponse], int]:
+        rules = await self.rule_repository.get_many(user_id, paging=paging)
+        total = await self.rule_repository.count(user_id)
+        return [RuleResponse.model_validate(rule) for rule in rules], total
+
+    async def update(
+        self, user_id: uuid.UUID, rule_id: uuid.UUID, rule_update: RuleUpdate
+    ) -> RuleResponse:
+        rule = await self.rule_repository.update(
+            user_id, rule_id, rule_update=rule_update
+        )
+        await self.db.commit()
+        return RuleResponse.model_validate(rule)
+
+    async def delete(self, user_id: uuid.UUID, rule_id: uuid.UUID) -> None:
+        await self.rule_repository.delete(user_id, rule_id)
+        await self.db.commit()
+
+
+def get_rule_service(db: DbDep, read_db: ReadDbDep) -> RuleService:
+    return RuleService(db=db, read_db=read_db)
+
+
+RuleServiceDep = Annotated[RuleService, Depends(get_rule_service)]
@@ -1,85 +1,256 @@
 import uuid
+from collections.abc import AsyncIterator, Awaitable, Callable
 from typing import Annotated
 
 from fastapi import Depends, HTTPException
+from pydantic import ValidationError
+from sqlalchemy import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.schemas.user import (
+    UserBulkIds,
+    UserBulkUpdateRole,
     UserCreate,
     UserResponse,
     UserUpdate,
     UserUpdatePassword,
     UserUpdateRole,
 )
-from app.core.database import DbDep
-from app.core.paging import Paging
-from app.database.models.user import UserFilter
-from app.database.repositories.user import UserRepository
+from app.core.bulk import BULK_CHUNK_SIZE, BulkResult, BulkRowError, chunked
+from app.core.database import DbDep, ReadDbDep
+from app.core.paging import CursorPaging, CursorPagingResponse, Paging
+from app.core.password import hash_passwords
+from app.database.models.user import User, UserFilter
+from app.database.repositories.user import UserRepository, user_cache
 
 
 class UserService:
-    def __init__(self, db: AsyncSession):
-        self.user_repository = UserRepository(db)
+    def __init__(self, db: AsyncSession, read_db: AsyncSession | None = None):
+        self.user_repository = UserRepository(db, read_db=read_db)
         self.db = db
 
-    async def create(self, user_create: UserCreate) -> uuid.UUID:
+    async def create(self, user_create: UserCreate) -> UserResponse:
         user_by_email = await self.user_repository.get_by_email(user_create.email)
         if user_by_email:
             raise HTTPException(status_code=400, detail="Email already registered")
-        id = await self.user_repository.create(
+        user = await self.user_repository.create(
             name=user_create.name,
             email=user_create.email,
             password=user_create.password,
             role=user_create.role,
         )
         await self.db.commit()
-        return id
+        return await self._cache(user)
+
+    async def _cache(self, user: User | Row) -> UserResponse:
+        # Called after commit so a concurrent read that re-populated the entry
+        # between invalidation and commit is overwritten with the new row.
+        response = UserResponse.model_validate(user)
+        await user_cache.set(str(user.id), response)
+        return response
 
     async def get(self, user_id: uuid.UUID) -> UserResponse:
+        cached = await user_cache.get(str(user_id))
+        if cached is not None:
+            return cached
         user = await self.user_repository.get(user_id)
-        return UserResponse.model_validate(user)
+        return await self._cache(user)
 
     async def get_many(self, paging: Paging, filter: UserFilter) -> list[UserResponse]:
         result = await self.user_repository.get_many(paging=paging, filter=filter)
         return [UserResponse.model_validate(user) for user in result]
 
+    async def get_many_with_total(
+        self, paging: Paging, filter: UserFilter
+    ) -> tuple[list[UserResponse], int | None]:
+        result, total = await self.user_repository.get_many_with_total(
+            paging=paging, filter=filter
+        )
+        return [UserResponse.model_validate(user) for user in result], total
+
+    async def get_many_by_cursor(
+        self, paging: CursorPaging, filter: UserFilter
+    ) -> CursorPagingResponse[UserResponse]:
+        result = await self.user_repository.get_many_by_cursor(
+            paging=paging, filter=filter
+        )
+        users, next_cursor, prev_cursor = paging.paginate(
+            result, key=lambda user: (user.created_at, user.id)
+        )
+        return CursorPagingResponse[UserResponse](
+            page_size=paging.page_size,
+            next_cursor=next_cursor,
+            prev_cursor=prev_cursor,
+            items=[UserResponse.model_validate(user) for user in users],
+        )
+
     async def count(self, filter: UserFilter) -> int:
         return await self.user_repository.count(filter=filter)
 
-    async def update(self, user_id: uuid.UUID, user_update: UserUpdate) -> None:
-        await self.user_repository.update(user_id=user_id, user_update=user_update)
+    async def update(self, user_id: uuid.UUID, user_update: UserUpdate) -> UserResponse:
+        user = await self.user_repository.update(
+            user_id=user_id, user_update=user_update
+        )
         await self.db.commit()
+        return await self._cache(user)
 
     async def update_password(
         self, user_id: uuid.UUID, user_update_password: UserUpdatePassword
-    ) -> None:
-        await self.user_repository.update_password(
+    ) -> UserResponse:
+        user = await self.user_repository.update_password(
             user_id, password=user_update_password.password
         )
         await self.db.commit()
+        return await self._cache(user)
 
     async def update_role(
         self, user_id: uuid.UUID, user_update_role: UserUpdateRole
-    ) -> None:
-        await self.user_repository.update_role(user_id, role=user_update_role.role)
+    ) -> UserResponse:
+        user = await self.user_repository.update_role(
+            user_id, role=user_update_role.role
+        )
         await self.db.commit()
+        return await self._cache(user)
 
-    async def deactivate(self, user_id: uuid.UUID) -> None:
-        user = await self.user_repository.get(user_id)
-        if user.deleted_at:
+    async def deactivate(self, user_id: uuid.UUID) -> UserResponse:
+        user = await self.user_repository.deactivate(user_id)
+        if user is None:
+            # Only re-read to tell a missing user apart from an already
+            # deactivated one; raises 404 for the former.
+            await self.user_repository.get(user_id)
             raise HTTPException(status_code=400, detail="User already deactivated")
-        await self.user_repository.deactivate(user_id)
         await self.db.commit()
+        return await self._cache(user)
 
-    async def reactivate(self, user_id: uuid.UUID) -> None:
-        user = await self.user_repository.get(user_id)
-        if not user.deleted_at:
+    async def reactivate(self, user_id: uuid.UUID) -> UserResponse:
+        user = await self.user_repository.reactivate(user_id)
+        if user is None:
+            await self.user_repository.get(user_id)
             raise HTTPException(status_code=400, detail="User already reactivated")
-        await self.user_repository.reactivate(user_id)
         await self.db.commit()
+        return await self._cache(user)
+
+    async def import_users(
+        self, rows: AsyncIterator[tuple[int, dict | None]]
+    ) -> BulkResult:
+        result = BulkResult()
+        chunk: list[tuple[int, UserCreate]] = []
+        async for row, data in rows:
+            result.processed += 1
+            if data is None:
+                result.errors.append(BulkRowError(row=row, detail="Invalid row"))
+                continue
+            try:
+                chunk.append((row, UserCreate.model_validate(data)))
+            except ValidationError as e:
+                error = e.errors()[0]
+                email = data.get("email")
+                result.errors.append(
+                    BulkRowError(
+                        row=row,
+                        key=str(email) if email is not None else None,
+                        detail=f"{'.'.join(map(str, error['loc']))}: {error['msg']}",
+                    )
+                )
+                continue
+            if len(chunk) >= BULK_CHUNK_SIZE:
+                await self._import_chunk(chunk, result)
+                chunk = []
+        if chunk:
+            await self._import_chunk(chunk, result)
+        return result
+
+    async def _import_chunk(
+        self, chunk: list[tuple[int, UserCreate]], result: BulkResult
+    ) -> None:
+        unique: list[tuple[int, UserCreate]] = []
+        seen: set[str] = set()
+        for row, user_create in chunk:
+            if user_create.email in seen:
+                result.errors.append(
+                    BulkRowError(
+                        row=row, key=user_create.email, detail="Duplicate email"
+                    )
+                )
+                continue
+            seen.add(user_create.email)
+            unique.append((row, user_create))
+
+        passwords = await hash_passwords([user.password for _, user in unique])
+        created = await self.user_repository.create_many(
+            [
+                {
+                    "name": user_create.name,
+                    "email": user_create.email,
+                    "password": password,
+                    "role": user_create.role,
+                }
+                for (_, user_create), password in zip(unique, passwords, strict=True)
+            ]
+        )
+        await self.db.commit()
+
+        result.succeeded += len(created)
+        for row, user_create in unique:
+            if user_create.email not in created:
+                result.errors.append(
+                    BulkRowError(
+                        row=row,
+                        key=user_create.email,
+                        detail="Email already registered",
+                    )
+                )
+
+    async def _bulk_update(
+        self,
+        user_ids: list[uuid.UUID],
+        update: Callable[[list[uuid.UUID]], Awaitable[list[Row]]],
+        detail: str,
+    ) -> BulkResult:
+        result = BulkResult(processed=len(user_ids))
+        updated: set[uuid.UUID] = set()
+        for ids in chunked(user_ids):
+            rows = await update(list(ids))
+            await self.db.commit()
+            # Re-prime after commit, as the single-row path does.
+            for row in rows:
+                await self._cache(row)
+            updated.update(row.id for row in rows)
+        result.succeeded = len(updated)
+        result.errors = [
+            BulkRowError(row=row, key=str(user_id), detail=detail)
+            for row, user_id in enumerate(user_ids, start=1)
+            if user_id not in updated
+        ]
+        return result
+
+    async def update_role_many(
+        self, user_bulk_update_role: UserBulkUpdateRole
+    ) -> BulkResult:
+        role = user_bulk_update_role.role
+        return await self._bulk_update(
+            user_bulk_update_role.user_ids,
+            lambda ids: self.user_repository.update_role_many(ids, role=role),
+            detail="User not found",
+        )
+
+    async def deactivate_many(self, user_bulk_ids: UserBulkIds) -> BulkResult:
+        return await self._bulk_update(
+            user_bulk_ids.user_ids,
+            self.user_repository.deactivate_many,
+            detail="User not found or already deactivated",
+        )
+
+    async def reactivate_many(self, user_bulk_ids: UserBulkIds) -> BulkResult:
+        return await self._bulk_update(
+            user_bulk_ids.user_ids,
+            self.user_repository.reactivate_many,
+            detail="User not found or already reactivated",
+        )
+
 
-def get_user_service(db: DbDep) -> UserService:
-    return UserService(db=db)
+def get_user_service(db: DbDep, read_db: ReadDbDep) -> UserService:
+    return UserService(db=db, read_db=read_db)
 
 
 UserServiceDep = Annotated[UserService, Depends(get_user_service)]
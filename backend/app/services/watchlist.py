@@ -0,0 +1,87 @@
+import os
+import uuid
+from typing import Annotated
+
+from fastapi import Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.schemas.watchlist import (
+    WatchlistCreate,
+    WatchlistResponse,
+    WatchlistUpdate,
+)
+from app.core.database import DbDep, ReadDbDep
+from app.core.quote_cache import quote_cache
+from app.database.repositories.watchlist import WatchlistRepository
+from app.validations.access import validate_access
+
+WATCHLISTS_MAX_PER_USER = int(os.getenv("WATCHLISTS_MAX_PER_USER", 20))
+WATCHLIST_MAX_SYMBOLS = int(os.getenv("WATCHLIST_MAX_SYMBOLS", 200))
+
+
+def _normalize(symbols: list[str]) -> list[str]:
+    symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+    if len(symbols) > WATCHLIST_MAX_SYMBOLS:
+        raise HTTPException(status_code=400, detail="Too many symbols")
+    return symbols
+
+
+class WatchlistService:
+    def __init__(self, db: AsyncSession, read_db: AsyncSession | None = None):
+        self.watchlist_repository = WatchlistRepository(db, read_db=read_db)
+        self.db = db
+
+    async def create(
+        self, user_id: uuid.UUID, watchlist_create: WatchlistCreate
+    ) -> WatchlistResponse:
+        if await self.watchlist_repository.count(user_id) >= WATCHLISTS_MAX_PER_USER:
+            raise HTTPException(status_code=400, detail="Too many watchlists")
+        watchlist = await self.watchlist_repository.create(
+            user_id=user_id,
+            name=watchlist_create.name,
+            symbols=_normalize(watchlist_create.symbols),
+        )
+        await self.db.commit()
+        return WatchlistResponse.model_validate(watchlist)
+
+    async def get(
+        self, user_id: uuid.UUID, watchlist_id: uuid.UUID
+    ) -> WatchlistResponse:
+        watchlist = await self.watchlist_repository.get(watchlist_id)
+        validate_access(owner_id=watchlist.user_id, user_id=user_id)
+        return WatchlistResponse.model_validate(watchlist)
+
+    async def get_many(self, user_id: uuid.UUID) -> list[WatchlistResponse]:
+        result = await self.watchlist_repository.get_many(user_id)
+        return [WatchlistResponse.model_validate(watchlist) for watchlist in result]
+
+    async def update(
+        self,
+        user_id: uuid.UUID,
+        watchlist_id: uuid.UUID,
+        watchlist_update: WatchlistUpdate,
+    ) -> WatchlistResponse:
+        await self.get(user_id, watchlist_id)
+        watchlist = await self.watchlist_repository.update(
+            watchlist_id,
+            name=watchlist_update.name,
+            symbols=_normalize(watchlist_update.symbols),
+        )
+        await self.db.commit()
+        return WatchlistResponse.model_validate(watchlist)
+
+    async def delete(self, user_id: uuid.UUID, watchlist_id: uuid.UUID) -> None:
+        await self.get(user_id, watchlist_id)
+        await self.watchlist_repository.delete(watchlist_id)
+        await self.db.commit()
+
+    async def get_quotes(self, user_id: uuid.UUID, watchlist_id: uuid.UUID) -> bytes:
+        watchlist = await self.get(user_id, watchlist_id)
+        return quote_cache.get_many(watchlist.symbols)
+
+
+def get_watchlist_service(db: DbDep, read_db: ReadDbDep) -> WatchlistService:
+    return WatchlistService(db=db, read_db=read_db)
+
+
+WatchlistServiceDep = Annotated[WatchlistService, Depends(get_watchlist_service)]
@@ -0,0 +1,574 @@
+"""In-process API benchmarks; the database is replaced by canned rows.
+
+    POSTGRES_URI=... PYTHONPATH=. python bench.py users --requests 2000
+    POSTGRES_URI=... PYTHONPATH=. python bench.py ticks --ticks 5000000
+    POSTGRES_URI=... PYTHONPATH=. python bench.py hub --clients 5000
+    POSTGRES_URI=... PYTHONPATH=. python bench.py login --logins 16
+    POSTGRES_URI=... PYTHONPATH=. python bench.py token --calls 100000
+    POSTGRES_URI=... PYTHONPATH=. python bench.py search --users 1000000
+    POSTGRES_URI=... PYTHONPATH=. python bench.py pool --concurrency 50
+
+Only `search` and `pool` connect to POSTGRES_URI; `search` writes only to
+its own schema and `pool` only reads. The rest need it to import the app.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+import uuid
+from collections import namedtuple
+from datetime import UTC, datetime
+
+import httpx
+import numpy as np
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.api.routes import tick as tick_routes
+from app.core import auth, database, password
+from app.core.cache import LRUCache
+from app.core.paging import Paging
+from app.core.price_hub import PriceHub
+from app.core.tick_store import TickStore
+from app.database.models.user import Role, User, UserFilter
+from app.database.repositories.user import USER_LIST_COLUMNS, UserRepository
+from app.main import app
+
+
+class FakeResult:
+    def __init__(self, rows: list[tuple]):
+        self.rows = rows
+
+    def all(self) -> list[tuple]:
+        return self.rows
+
+    def scalar_one_or_none(self):
+        return self.rows[0] if self.rows else None
+
+
+class FakeSession:
+    """Answers every statement with the same rows, as result.all()."""
+
+    def __init__(self, rows: list[tuple]):
+        self.rows = rows
+
+    async def __aenter__(self) -> "FakeSession":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        pass
+
+    async def execute(self, stmt) -> FakeResult:
+        return FakeResult(self.rows)
+
+
+# Named tuples stand in for sqlalchemy Rows: both read by attribute.
+UserRow = namedtuple(
+    "UserRow",
+    "id name email role created_at updated_at deleted_at total",
+)
+
+
+LoginRow = namedtuple(
+    "LoginRow",
+    "id name email role password created_at updated_at deleted_at",
+)
+
+
+def user_rows(count: int, total: int) -> list[UserRow]:
+    now = datetime.now(UTC)
+    return [
+        UserRow(
+            id=uuid.uuid4(),
+            name=f"User {i}",
+            email=f"user{i}@example.com",
+            role="user",
+            created_at=now,
+            updated_at=now,
+            deleted_at=None,
+            total=total,
+        )
+        for i in range(count)
+    ]
+
+
+async def bench_users(requests: int, page_size: int):
+    session = FakeSession(user_rows(page_size, total=100_000))
+    # Patched at the source rather than with dependency_overrides, which make
+    # FastAPI re-analyze the overridden dependencies on every request.
+    database.SessionLocal = lambda: session
+    url = f"/admin/users/?page_size={page_size}"
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        response = await c.get(url)
+        response.raise_for_status()
+        assert len(response.json()["items"]) == page_size
+        for _ in range(requests // 10):
+            await c.get(url)
+        latencies = []
+        started_at = time.perf_counter()
+        for _ in range(requests):
+            sent_at = time.perf_counter()
+            await c.get(url)
+            latencies.append(time.perf_counter() - sent_at)
+        elapsed = time.perf_counter() - started_at
+    latencies.sort()
+    print(
+        f"GET {url}: {requests / elapsed:,.0f} req/s, "
+        f"p50 {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms, "
+        f"{len(response.content):,} bytes"
+    )
+
+
+def _percentile(latencies: list[float], p: float) -> float:
+    latencies = sorted(latencies)
+    return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+
+async def _login_storm(c: httpx.AsyncClient, logins: int, duration: float):
+    body = {"email": "bench@example.com", "password": "bench-password"}
+    stop_at = time.perf_counter() + duration
+    done = 0
+
+    async def login():
+        nonlocal done
+        while time.perf_counter() < stop_at:
+            response = await c.post("/auth/login", json=body)
+            response.raise_for_status()
+            done += 1
+
+    async def probe():
+        latencies = []
+        while time.perf_counter() < stop_at:
+            sent_at = time.perf_counter()
+            await c.get("/")
+            latencies.append(time.perf_counter() - sent_at)
+            await asyncio.sleep(0.01)
+        return latencies
+
+    results = await asyncio.gather(probe(), *(login() for _ in range(logins)))
+    return done / duration, results[0]
+
+
+async def bench_login(logins: int, duration: float):
+    now = datetime.now(UTC)
+    user = LoginRow(
+        id=uuid.uuid4(),
+        name="Bench",
+        email="bench@example.com",
+        role="user",
+        password=password.pwd_context.hash("bench-password"),
+        created_at=now,
+        updated_at=now,
+        deleted_at=None,
+    )
+    session = FakeSession([user])
+    database.SessionLocal = lambda: session
+    hasher = password.password_hasher
+    pooled = hasher._run
+
+    async def inline(fn, *args):
+        # What the routes did before the pool: bcrypt on the event loop.
+        return fn(*args)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        for label, run in (("inline", inline), ("pool", pooled)):
+            hasher._run = run
+            # Warm the pool's processes outside the measurement.
+            await c.post(
+                "/auth/login",
+                json={"email": user.email, "password": "bench-password"},
+            )
+            rate, latencies = await _login_storm(c, logins, duration)
+            print(
+                f"login storm ({label}, {logins} concurrent): {rate:,.1f} logins/s; "
+                f"GET / p50 {_percentile(latencies, 0.5):.1f} ms, "
+                f"p99 {_percentile(latencies, 0.99):.1f} ms, "
+                f"max {max(latencies) * 1000:.1f} ms over {len(latencies)} probes"
+            )
+    hasher._run = pooled
+    print(f"pool: {hasher.metrics().model_dump()}")
+    hasher.shutdown()
+
+
+def bench_token(calls: int):
+    token = auth.create_access_token(user_id=str(uuid.uuid4()), role=Role.USER)
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    # What AuthPayloadDep runs per request once HTTPBearer has parsed the header.
+    dependency = auth.get_auth_payload_with_roles([Role.USER]).dependency
+    cached = auth.token_cache
+    for label, cache in (
+        ("uncached", LRUCache(maxsize=0)),
+        ("cached", LRUCache(maxsize=auth.TOKEN_CACHE_SIZE, ttl=auth.TOKEN_CACHE_TTL)),
+    ):
+        auth.token_cache = cache
+        for name, call in (
+            ("decode_access_token", lambda: auth.decode_access_token(token)),
+            ("auth dependency", lambda: dependency(credentials)),
+        ):
+            call()
+            started_at = time.perf_counter()
+            for _ in range(calls):
+                call()
+            elapsed = time.perf_counter() - started_at
+            print(
+                f"{name} ({label}): {elapsed / calls * 1e6:.2f} us/call, "
+                f"{calls / elapsed:,.0f} calls/s"
+            )
+    print(f"token_cache: {cache.stats().model_dump()}")
+    auth.token_cache = cached
+
+
+SEARCH_SCHEMA = "bench_search"
+
+FIRST_NAMES = "James Mary John Patricia Robert Jennifer Michael Linda William Karen"
+LAST_NAMES = "Smith Johnson Brown Jones Garcia Miller Davis Wilson Moore Taylor"
+
+
+async def _fill_users(engine, users: int):
+    async with engine.begin() as conn:
+        result = await conn.execute(
+            text("SELECT to_regclass(:table) IS NOT NULL"),
+            {"table": f"{SEARCH_SCHEMA}.users"},
+        )
+        if result.scalar_one():
+            result = await conn.execute(
+                text(f"SELECT count(*) FROM {SEARCH_SCHEMA}.users")
+            )
+            if result.scalar_one() == users:
+                return
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SEARCH_SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SEARCH_SCHEMA}"))
+        # Same columns, generated search_vector and indexes as the real table.
+        await conn.execute(
+            text(
+                f"CREATE TABLE {SEARCH_SCHEMA}.users (LIKE public.users INCLUDING ALL)"
+            )
+        )
+        started_at = time.perf_counter()
+        await conn.execute(
+            text(
+                f"""
+                INSERT INTO {SEARCH_SCHEMA}.users (name, email, password, role)
+                SELECT f || ' ' || l, lower(f || '.' || l || i || '@example.com'),
+                       'x', 'user'
+                FROM generate_series(1, :users) AS i,
+                     LATERAL (SELECT (string_to_array(:firsts, ' '))[1 + i % 10] AS f,
+                                     (string_to_array(:lasts, ' '))[1 + i / 10 % 10] AS l) n
+                """
+            ),
+            {"users": users, "firsts": FIRST_NAMES, "lasts": LAST_NAMES},
+        )
+        await conn.execute(text(f"ANALYZE {SEARCH_SCHEMA}.users"))
+    elapsed = time.perf_counter() - started_at
+    print(f"search: filled {users:,} users in {elapsed:.0f} s")
+
+
+async def _time_search(bind, filter: UserFilter, repeat: int):
+    paging = Paging(page=1, page_size=20, sort="desc")
+    latencies = []
+    async with AsyncSession(bind) as session:
+        repository = UserRepository(session)
+        for _ in range(repeat + 1):
+            started_at = time.perf_counter()
+            _, total = await repository.get_many_with_total(paging, filter)
+            latencies.append(time.perf_counter() - started_at)
+    # The first run warms the buffer cache and is dropped.
+    return _percentile(latencies[1:], 0.5), total
+
+
+async def bench_search(users: int, repeat: int, drop: bool):
+    engine = create_async_engine(
+        database.DATABASE_URL,
+        connect_args={"server_settings": {"search_path": f"{SEARCH_SCHEMA}, public"}},
+    )
+    await _fill_users(engine, users)
+    contains = [
+        ("contains, 1 match", UserFilter(search_text="karen.wilson123479")),
+        (
+            "contains, 1 match, rank",
+            UserFilter(search_text="karen.wilson123479", rank=True),
+        ),
+        ("contains, 10% match", UserFilter(search_text="wilson")),
+    ]
+    searches = [
+        *contains,
+        (
+            "prefix, 0.1% match",
+            UserFilter(search_text="karen.wilson1", search_mode="prefix"),
+        ),
+        ("prefix, 10% match", UserFilter(search_text="karen", search_mode="prefix")),
+        ("token, 10% match", UserFilter(search_text="wilson", search_mode="token")),
+        (
+            "token, 1% match, rank",
+            UserFilter(search_text="karen wilson", search_mode="token", rank=True),
+        ),
+    ]
+    for label, filter in searches:
+        median, total = await _time_search(engine, filter, repeat)
+        print(f"search ({label}): {median:.1f} ms, total {total:,}")
+
+    # Without the trigram indexes contains is the leading-wildcard ILIKE seq
+    # scan it was before them. DDL is transactional: the drop is rolled back.
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            text(
+                "SELECT indexname FROM pg_indexes WHERE schemaname = :schema "
+                "AND indexdef LIKE '%gin_trgm_ops%'"
+            ),
+            {"schema": SEARCH_SCHEMA},
+        )
+        for (index,) in result.all():
+            await conn.execute(text(f"DROP INDEX {SEARCH_SCHEMA}.{index}"))
+        for label, filter in contains:
+            median, total = await _time_search(conn, filter, repeat)
+            print(
+                f"search ({label}, no trigram index): {median:.1f} ms, total {total:,}"
+            )
+        await conn.rollback()
+
+    if drop:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA {SEARCH_SCHEMA} CASCADE"))
+    await engine.dispose()
+
+
+POOL_SCENARIOS = {
+    "default": {},
+    "no pre-ping": {"DB_POOL_PRE_PING": "never"},
+    "no statement cache": {"DB_STATEMENT_CACHE_SIZE": 0},
+    "pool 2, no overflow": {"DB_POOL_SIZE": 2, "DB_MAX_OVERFLOW": 0},
+    "pool 20, no pre-ping": {"DB_POOL_SIZE": 20, "DB_POOL_PRE_PING": "never"},
+}
+
+
+async def _pool_client(engine, stmt, count: int, latencies: list[float]):
+    for _ in range(count):
+        sent_at = time.perf_counter()
+        async with AsyncSession(engine) as session:
+            (await session.execute(stmt)).one()
+        latencies.append(time.perf_counter() - sent_at)
+
+
+async def bench_pool(concurrency: int, queries: int):
+    async with database.engine.connect() as conn:
+        user_id = (await conn.execute(select(User.id).limit(1))).scalar_one()
+    await database.engine.dispose()
+    # The shape of a user lookup by id, one session per request.
+    stmt = select(*USER_LIST_COLUMNS).where(User.id == user_id)
+    count = queries // concurrency
+    defaults = {
+        name: getattr(database, name)
+        for settings in POOL_SCENARIOS.values()
+        for name in settings
+    }
+    for label, settings in POOL_SCENARIOS.items():
+        for name, value in settings.items():
+            setattr(database, name, value)
+        engine = database._create_engine(database.DATABASE_URL)
+        latencies = []
+        await _pool_client(engine, stmt, count, latencies)
+        latencies.clear()
+        started_at = time.perf_counter()
+        await asyncio.gather(
+            *(_pool_client(engine, stmt, count, latencies) for _ in range(concurrency))
+        )
+        elapsed = time.perf_counter() - started_at
+        metrics = database.pool_metrics(engine)
+        print(
+            f"pool ({label}): {len(latencies) / elapsed:,.0f} queries/s, "
+            f"p50 {_percentile(latencies, 0.5):.1f} ms, "
+            f"p99 {_percentile(latencies, 0.99):.1f} ms; "
+            f"checkout avg {metrics.avg_checkout_ms:.2f} ms, "
+            f"max {metrics.max_checkout_ms:.1f} ms, {metrics.connects} connects"
+        )
+        await engine.dispose()
+        for name, value in defaults.items():
+            setattr(database, name, value)
+
+
+def _scan_rates(store: TickStore, ts: np.ndarray, scans: int, width: int):
+    started_at = time.perf_counter()
+    for _ in range(5):
+        columns = store.scan("BENCH", int(ts[0]), int(ts[-1]) + 1)
+        # A single segment comes back as a view of the mapping; read it.
+        columns["price"].sum()
+        rows = len(columns["ts"])
+    full = rows * 5 / (time.perf_counter() - started_at)
+    starts = np.random.default_rng(0).integers(0, len(ts) - width, scans)
+    started_at = time.perf_counter()
+    for i in starts.tolist():
+        store.scan("BENCH", int(ts[i]), int(ts[i + width]))
+    narrow = scans / (time.perf_counter() - started_at)
+    return full, narrow
+
+
+async def bench_ticks(ticks: int, segments: int, scans: int, width: int):
+    with tempfile.TemporaryDirectory() as root:
+        store = TickStore(root, max_segments=segments + 1)
+        # One day of ticks, appended in `segments` batches.
+        ts = np.sort(
+            np.random.default_rng(0).integers(0, 86_400_000, ticks) + 1_700_006_400_000
+        )
+        price = 100 + np.random.default_rng(1).standard_normal(ticks).cumsum() * 0.01
+        started_at = time.perf_counter()
+        for chunk in np.array_split(np.arange(ticks), segments):
+            store.append("BENCH", ts[chunk], price[chunk])
+        elapsed = time.perf_counter() - started_at
+        print(f"append: {ticks / elapsed:,.0f} ticks/s in {segments} segments")
+
+        for label in (f"{segments} segments", "compacted"):
+            if label == "compacted":
+                store.compact("BENCH")
+            full, narrow = _scan_rates(store, ts, scans, width)
+            print(
+                f"scan ({label}): full range {full:,.0f} ticks/s, "
+                f"{width}-tick ranges {narrow:,.0f} scans/s"
+            )
+
+        tick_routes.tick_store = store
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+            starts = np.random.default_rng(2).integers(0, ticks - width, scans // 10)
+            started_at = time.perf_counter()
+            for i in starts.tolist():
+                response = await c.get(
+                    "/ticks/BENCH",
+                    params={
+                        "start": datetime.fromtimestamp(ts[i] / 1000, UTC).isoformat(),
+                        "end": datetime.fromtimestamp(
+                            ts[i + width] / 1000, UTC
+                        ).isoformat(),
+                        "limit": width,
+                    },
+                )
+                response.raise_for_status()
+            elapsed = time.perf_counter() - started_at
+        print(
+            f"GET /ticks/BENCH: {len(starts) / elapsed:,.0f} req/s for "
+            f"{width}-tick ranges, {len(response.content):,} bytes"
+        )
+
+
+async def bench_hub(clients: int, symbols: int, per_client: int, rounds: int):
+    hub = PriceHub(listeners=())
+    names = [f"SYM{i}" for i in range(symbols)]
+    received = 0
+    messages = 0
+
+    async def send(message: str):
+        nonlocal received, messages
+        messages += 1
+        received += message.count('"events"')
+
+    rng = random.Random(0)
+    subscribers = []
+    for _ in range(clients):
+        subscriber = hub.connect(send)
+        hub.subscribe(subscriber, rng.sample(names, per_client))
+        subscriber.task = asyncio.create_task(subscriber.run())
+        subscribers.append(subscriber)
+
+    # One tick and one indicator row per symbol per round, as the processor
+    # sends them: a JSON array per message.
+    payload = json.dumps(
+        [
+            event
+            for name in names
+            for event in (
+                {"symbol": name, "type": "tick", "price": 100.0, "ts": 0},
+                {"symbol": name, "type": "indicators", "sma_1m": 100.0, "ts": 0},
+            )
+        ]
+    )
+    publish_time = 0.0
+    started_at = time.perf_counter()
+    for _ in range(rounds):
+        sent_at = time.perf_counter()
+        hub.publish(payload)
+        publish_time += time.perf_counter() - sent_at
+        hub.flush()
+        # Let every sender drain before the next flush.
+        while any(subscriber.pending for subscriber in subscribers):
+            await asyncio.sleep(0)
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - started_at
+    for subscriber in subscribers:
+        hub.disconnect(subscriber)
+    await asyncio.gather(*(subscriber.task for subscriber in subscribers))
+
+    metrics = hub.metrics()
+    print(
+        f"hub: {clients:,} clients x {per_client} of {symbols:,} symbols, "
+        f"{rounds} rounds: publish {publish_time / rounds * 1000:.2f} ms, "
+        f"flush {metrics.avg_flush_ms:.2f} ms, round {elapsed / rounds * 1000:.2f} ms"
+    )
+    print(
+        f"hub: {received / elapsed:,.0f} symbol frames/s delivered in "
+        f"{messages / elapsed:,.0f} messages/s, {metrics.frames / rounds:,.0f} "
+        f"frames serialized per round"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    users_parser = subparsers.add_parser("users")
+    users_parser.add_argument("--requests", type=int, default=2000)
+    users_parser.add_argument("--page-size", type=int, default=100)
+
+    ticks_parser = subparsers.add_parser("ticks")
+    ticks_parser.add_argument("--ticks", type=int, default=5_000_000)
+    ticks_parser.add_argument("--segments", type=int, default=16)
+    ticks_parser.add_argument("--scans", type=int, default=20_000)
+    ticks_parser.add_argument("--width", type=int, default=1000)
+
+    hub_parser = subparsers.add_parser("hub")
+    hub_parser.add_argument("--clients", type=int, default=5000)
+    hub_parser.add_argument("--symbols", type=int, default=1000)
+    hub_parser.add_argument("--per-client", type=int, default=20)
+    hub_parser.add_argument("--rounds", type=int, default=50)
+
+    login_parser = subparsers.add_parser("login")
+    login_parser.add_argument("--logins", type=int, default=16)
+    login_parser.add_argument("--duration", type=float, default=10.0)
+
+    token_parser = subparsers.add_parser("token")
+    token_parser.add_argument("--calls", type=int, default=100_000)
+
+    search_parser = subparsers.add_parser("search")
+    search_parser.add_argument("--users", type=int, default=1_000_000)
+    search_parser.add_argument("--repeat", type=int, default=5)
+    # The filled table is kept for the next run unless dropped.
+    search_parser.add_argument("--drop", action="store_true")
+
+    pool_parser = subparsers.add_parser("pool")
+    pool_parser.add_argument("--concurrency", type=int, default=50)
+    pool_parser.add_argument("--queries", type=int, default=20_000)
+
+    args = parser.parse_args()
+    if args.command == "users":
+        asyncio.run(bench_users(args.requests, args.page_size))
+    elif args.command == "ticks":
+        asyncio.run(bench_ticks(args.ticks, args.segments, args.scans, args.width))
+    elif args.command == "login":
+        asyncio.run(bench_login(args.logins, args.duration))
+    elif args.command == "token":
+        bench_token(args.calls)
+    elif args.command == "search":
+        asyncio.run(bench_search(args.users, args.repeat, args.drop))
+    elif args.command == "pool":
+        asyncio.run(bench_pool(args.concurrency, args.queries))
+    elif args.command == "hub":
+        asyncio.run(bench_hub(args.clients, args.symbols, args.per_client, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
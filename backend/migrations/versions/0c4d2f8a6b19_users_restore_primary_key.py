@@ -0,0 +1,44 @@
+"""users restore primary key
+
+Revision ID: 0c4d2f8a6b19
+Revises: 5d0b7e3a61c2
+Create Date: 2026-10-18 18:05:37.104226
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0c4d2f8a6b19'
+down_revision: Union[str, Sequence[str], None] = '5d0b7e3a61c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # b237408d20ee re-added users.id without its primary key; the rules,
+    # alerts and watchlists foreign keys need one. Skipped where it was
+    # already restored by hand.
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_constraint
+                WHERE conrelid = 'users'::regclass AND contype = 'p'
+            ) THEN
+                ALTER TABLE users ADD CONSTRAINT users_pkey PRIMARY KEY (id);
+            END IF;
+        END $$
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Left in place: it may predate this migration.
+    pass
@@ -0,0 +1,43 @@
+"""add bars table
+
+Revision ID: 5d0b7e3a61c2
+Revises: c81e4b27a9d3
+Create Date: 2026-10-18 14:21:48.530127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d0b7e3a61c2'
+down_revision: Union[str, Sequence[str], None] = 'c81e4b27a9d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Monthly partitions are created on demand by the rollup writer.
+    op.execute("""
+        CREATE TABLE bars (
+            symbol VARCHAR(20) NOT NULL,
+            resolution VARCHAR(3) NOT NULL,
+            bucket TIMESTAMP WITH TIME ZONE NOT NULL,
+            open DOUBLE PRECISION NOT NULL,
+            high DOUBLE PRECISION NOT NULL,
+            low DOUBLE PRECISION NOT NULL,
+            close DOUBLE PRECISION NOT NULL,
+            volume DOUBLE PRECISION NOT NULL,
+            trades BIGINT NOT NULL,
+            open_ts TIMESTAMP WITH TIME ZONE NOT NULL,
+            close_ts TIMESTAMP WITH TIME ZONE NOT NULL,
+            PRIMARY KEY (symbol, resolution, bucket)
+        ) PARTITION BY RANGE (bucket)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TABLE bars")
@@ -0,0 +1,43 @@
+"""add rules table
+
+Revision ID: 7a3e9c52d1f4
+Revises: 0c4d2f8a6b19
+Create Date: 2026-10-18 16:02:11.284913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a3e9c52d1f4'
+down_revision: Union[str, Sequence[str], None] = '0c4d2f8a6b19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('rules',
+    sa.Column('id', sa.UUID(), server_default=sa.text('gen_random_uuid()'), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('symbol', sa.String(length=20), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('threshold', sa.Double(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_rules_user_id_created_at', 'rules', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_rules_updated_at_id', 'rules', ['updated_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_rules_updated_at_id', table_name='rules')
+    op.drop_index('ix_rules_user_id_created_at', table_name='rules')
+    op.drop_table('rules')
@@ -0,0 +1,49 @@
+"""add alerts table
+
+Revision ID: b4f1d6e2c9a8
+Revises: 7a3e9c52d1f4
+Create Date: 2026-10-18 17:40:27.913552
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4f1d6e2c9a8'
+down_revision: Union[str, Sequence[str], None] = '7a3e9c52d1f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('alerts',
+    sa.Column('id', sa.BigInteger(), sa.Identity(always=False), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('rule_id', sa.UUID(), nullable=False),
+    sa.Column('symbol', sa.String(length=20), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('threshold', sa.Double(), nullable=False),
+    sa.Column('value', sa.Double(), nullable=False),
+    sa.Column('triggered_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('available_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('delivered_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['rule_id'], ['rules.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('rule_id', 'triggered_at', name='uq_alerts_rule_id_ts')
+    )
+    # Only undelivered rows are indexed, so the claim scan stays small however
+    # much delivered history accumulates.
+    op.create_index('ix_alerts_pending_available_at', 'alerts', ['available_at'], unique=False, postgresql_where=sa.text('delivered_at IS NULL'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_alerts_pending_available_at', table_name='alerts', postgresql_where=sa.text('delivered_at IS NULL'))
+    op.drop_table('alerts')
@@ -0,0 +1,52 @@
+"""users add search indexes
+
+Revision ID: c81e4b27a9d3
+Revises: 3f2a9c1d7e54
+Create Date: 2026-10-18 10:03:17.264810
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81e4b27a9d3'
+down_revision: Union[str, Sequence[str], None] = '3f2a9c1d7e54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column('users', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(email, ''))",
+            persisted=True,
+        ),
+        nullable=True,
+    ))
+    op.create_index('ix_users_name_trgm', 'users', ['name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('ix_users_email_trgm', 'users', ['email'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'})
+    op.create_index('ix_users_lower_name_prefix', 'users',
+                    [sa.text('lower(name) text_pattern_ops')], unique=False)
+    op.create_index('ix_users_lower_email_prefix', 'users',
+                    [sa.text('lower(email) text_pattern_ops')], unique=False)
+    op.create_index('ix_users_search_vector', 'users', ['search_vector'], unique=False,
+                    postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_search_vector', table_name='users')
+    op.drop_index('ix_users_lower_email_prefix', table_name='users')
+    op.drop_index('ix_users_lower_name_prefix', table_name='users')
+    op.drop_index('ix_users_email_trgm', table_name='users')
+    op.drop_index('ix_users_name_trgm', table_name='users')
+    op.drop_column('users', 'search_vector')
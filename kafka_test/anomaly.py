@@ -0,0 +1,212 @@
+"""Per-symbol streaming anomaly detection on tick-to-tick returns.
+
+Two detectors run side by side over the same last `window` returns, both in
+constant memory per symbol:
+
+- z-score against a rolling mean/variance, maintained with Welford's update
+  (and its inverse when a value leaves the window);
+- IQR fences from the exact Q1 and Q3 of the window, read off a sorted copy
+  of it that is kept up to date with one bisect removal and one insertion.
+  Those shift the list, so an update is O(window), but as one memmove; the
+  window is capped at ANOMALY_MAX_WINDOW, below which that stays cheap
+  (`bench.py anomaly --window`), and the quantiles are exact, not sketched.
+
+A tick whose previous price is missing, zero or NaN has no return; it is not
+scored and not learned, by either entry point.
+
+`SymbolDetector.score` scores one tick against the state before it and is what
+a PyFlink `KeyedProcessFunction` should call. `AnomalyDetector.score_batch`
+scores a whole tick_codec batch with NumPy against each symbol's state at the
+start of the batch, then folds the batch into the state.
+"""
+
+import math
+from bisect import bisect_left, insort
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import numpy as np
+
+# Bounds the sorted window's memmove and keeps state under ~80 KB per symbol
+# (the ring and the sorted copy share float objects); past it 1,000 symbols
+# fall below 100k ticks/s in `bench.py anomaly`.
+ANOMALY_MAX_WINDOW = 2048
+
+ANOMALY_Z = 1
+ANOMALY_IQR = 2
+
+ANOMALY_DTYPE = np.dtype(
+    [
+        ("symbol", "<u2"),
+        ("ts", "<i8"),
+        ("price", "<f8"),
+        ("ret", "<f8"),
+        ("zscore", "<f8"),
+        ("iqr_low", "<f8"),
+        ("iqr_high", "<f8"),
+        ("flags", "u1"),  # ANOMALY_Z | ANOMALY_IQR
+    ]
+)
+
+
+@dataclass(frozen=True)
+class Thresholds:
+    z: float = 4.0
+    iqr_multiplier: float = 3.0
+    min_samples: int = 30
+
+
+class SymbolDetector:
+    __slots__ = (
+        "window",
+        "ring",
+        "index",
+        "count",
+        "mean",
+        "m2",
+        "last_price",
+        "sorted",
+    )
+
+    def __init__(self, window: int):
+        if not 0 < window <= ANOMALY_MAX_WINDOW:
+            raise ValueError(f"window must be 1..{ANOMALY_MAX_WINDOW}, got {window}")
+        self.window = window
+        self.ring = [0.0] * window
+        self.index = 0
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.last_price: float | None = None
+        self.sorted: list[float] = []
+
+    @property
+    def std(self) -> float:
+        if self.count < 2:
+            return 0.0
+        return math.sqrt(max(self.m2, 0.0) / (self.count - 1))
+
+    def quantile(self, p: float) -> float:
+        """The window's p-quantile, interpolated linearly like numpy's default."""
+        values = self.sorted
+        if not values:
+            return math.nan
+        position = p * (len(values) - 1)
+        lower = int(position)
+        upper = min(lower + 1, len(values) - 1)
+        return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+    def fences(self, multiplier: float) -> tuple[float, float]:
+        q1, q3 = self.quantile(0.25), self.quantile(0.75)
+        iqr = q3 - q1
+        return q1 - multiplier * iqr, q3 + multiplier * iqr
+
+    def push(self, ret: float) -> None:
+        if self.count < self.window:
+            self.count += 1
+            delta = ret - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (ret - self.mean)
+        else:
+            # Replace the oldest return: Welford remove + add in one step.
+            old = self.ring[self.index]
+            mean = self.mean + (ret - old) / self.window
+            self.m2 += (ret - old) * (ret - mean + old - self.mean)
+            self.mean = mean
+            del self.sorted[bisect_left(self.sorted, old)]
+        self.ring[self.index] = ret
+        self.index = (self.index + 1) % self.window
+        insort(self.sorted, ret)
+
+    def score(self, price: float, thresholds: Thresholds) -> tuple[float, float, int]:
+        """Returns (return, z-score, flags) for a new price, then learns it."""
+        last_price = self.last_price
+        self.last_price = price
+        if not last_price or not math.isfinite(ret := price / last_price - 1.0):
+            return 0.0, 0.0, 0
+        flags = 0
+        zscore = 0.0
+        if self.count >= thresholds.min_samples:
+            std = self.std
+            zscore = (ret - self.mean) / std if std > 0 else 0.0
+            if abs(zscore) >= thresholds.z:
+                flags |= ANOMALY_Z
+            low, high = self.fences(thresholds.iqr_multiplier)
+            if ret < low or ret > high:
+                flags |= ANOMALY_IQR
+        self.push(ret)
+        return ret, zscore, flags
+
+
+class AnomalyDetector:
+    def __init__(
+        self,
+        window: int = 500,
+        thresholds: Thresholds | None = None,
+        overrides: dict[str, Thresholds] | None = None,
+    ):
+        SymbolDetector(window)  # validate the window up front
+        self.window = window
+        self.thresholds = thresholds or Thresholds()
+        self.overrides = overrides or {}
+        self.symbols: dict[str, SymbolDetector] = {}
+
+    def state(self, symbol: str) -> SymbolDetector:
+        state = self.symbols.get(symbol)
+        if state is None:
+            state = self.symbols[symbol] = SymbolDetector(self.window)
+        return state
+
+    def thresholds_for(self, symbol: str) -> Thresholds:
+        return self.overrides.get(symbol, self.thresholds)
+
+    def score(self, symbol: str, price: float) -> tuple[float, float, int]:
+        return self.state(symbol).score(price, self.thresholds_for(symbol))
+
+    def score_batch(self, records: np.ndarray, strings: Sequence[str]) -> np.ndarray:
+        """Score a tick_codec TICK_DTYPE array (ticks in time order per symbol)."""
+        out = np.zeros(len(records), dtype=ANOMALY_DTYPE)
+        out["symbol"] = records["symbol"]
+        out["ts"] = records["ts"]
+        out["price"] = records["price"]
+        if not len(records):
+            return out
+
+        order = np.argsort(records["symbol"], kind="stable")
+        symbols = records["symbol"][order]
+        starts = np.flatnonzero(np.r_[True, symbols[1:] != symbols[:-1]])
+        ends = np.r_[starts[1:], len(order)]
+        for start, end in zip(starts.tolist(), ends.tolist(), strict=True):
+            rows = order[start:end]
+            symbol = strings[symbols[start]]
+            state = self.state(symbol)
+            thresholds = self.thresholds_for(symbol)
+            prices = records["price"][rows]
+
+            previous = np.empty_like(prices)
+            previous[0] = state.last_price if state.last_price else np.nan
+            previous[1:] = prices[:-1]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                returns = prices / previous - 1.0
+            # As in SymbolDetector.score: no return, no score, nothing learned.
+            valid = np.isfinite(returns)
+            returns[~valid] = 0.0
+            out["ret"][rows] = returns
+
+            if state.count >= thresholds.min_samples:
+                std = state.std
+                zscores = (returns - state.mean) / std if std > 0 else returns * 0.0
+                zscores[~valid] = 0.0
+                low, high = state.fences(thresholds.iqr_multiplier)
+                flags = np.where(np.abs(zscores) >= thresholds.z, ANOMALY_Z, 0)
+                flags |= np.where((returns < low) | (returns > high), ANOMALY_IQR, 0)
+                flags[~valid] = 0
+                out["zscore"][rows] = zscores
+                out["iqr_low"][rows] = low
+                out["iqr_high"][rows] = high
+                out["flags"][rows] = flags
+
+            for ret in returns[valid].tolist():
+                state.push(ret)
+            state.last_price = float(prices[-1])
+        return out
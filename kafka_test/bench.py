@@ -0,0 +1,516 @@
+import argparse
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from anomaly import AnomalyDetector
+from consumer import ConsumerRuntime, Record
+from fetcher import Fetcher, Provider, start_stub
+from indicators import IndicatorEngine
+from producer import AsyncProducer
+from rollup import rollup_all
+from rule_engine import KINDS, Rule, RuleEngine
+from tick_codec import (
+    TICK_DTYPE,
+    Tick,
+    decode_batch,
+    decode_json,
+    encode_array,
+    encode_batch,
+    encode_json,
+)
+
+
+class FakeProducer:
+    """In-process stand-in for confluent_kafka.Producer.
+
+    Buffers up to `capacity` messages and "delivers" them on poll/flush.
+    """
+
+    def __init__(self, capacity: int = 100_000):
+        self.capacity = capacity
+        self.delivered = 0
+        self._pending: deque = deque()
+        self._lock = threading.Lock()
+
+    def produce(self, topic, value=None, key=None, on_delivery=None):
+        with self._lock:
+            if len(self._pending) >= self.capacity:
+                raise BufferError("Local: Queue full")
+            self._pending.append((on_delivery, value))
+
+    def poll(self, timeout=None):
+        with self._lock:
+            batch = list(self._pending)
+            self._pending.clear()
+        for on_delivery, _ in batch:
+            if on_delivery is not None:
+                on_delivery(None, None)
+        self.delivered += len(batch)
+        if not batch and timeout:
+            time.sleep(timeout)
+        return len(batch)
+
+    def flush(self, timeout=None):
+        while self._pending:
+            self.poll(0)
+        return 0
+
+
+async def bench_producer(messages: int, max_in_flight: int, broker: str | None):
+    if broker:
+        producer = AsyncProducer({"bootstrap.servers": broker}, max_in_flight)
+    else:
+        producer = AsyncProducer(max_in_flight=max_in_flight, producer=FakeProducer())
+    value = b"x" * 64
+    async with producer:
+        started_at = time.perf_counter()
+        for i in range(messages):
+            await producer.send("stock-prices", value=value, key=str(i % 5000))
+        await producer.flush()
+        elapsed = time.perf_counter() - started_at
+    metrics = producer.metrics.snapshot()
+    print(f"producer: {messages / elapsed:,.0f} msgs/s")
+    print(f"  enqueue p50 {metrics['enqueue_p50_ms']:.4f} ms")
+    print(f"  enqueue p99 {metrics['enqueue_p99_ms']:.4f} ms")
+    print(f"  backpressure waits {metrics['backpressure_waits']}")
+
+
+class FakeMessage:
+    def __init__(self, topic, partition, offset, key, value):
+        self._topic = topic
+        self._partition = partition
+        self._offset = offset
+        self._key = key
+        self._value = value
+
+    def topic(self):
+        return self._topic
+
+    def partition(self):
+        return self._partition
+
+    def offset(self):
+        return self._offset
+
+    def key(self):
+        return self._key
+
+    def value(self):
+        return self._value
+
+    def timestamp(self):
+        return (1, 0)
+
+    def error(self):
+        return None
+
+
+class FakeConsumer:
+    """Serves `total` pre-built messages round-robin over `partitions`."""
+
+    def __init__(self, total: int, partitions: int, value: bytes):
+        self.total = total
+        self.partitions = partitions
+        self.value = value
+        self.served = 0
+        self.committed = 0
+
+    def subscribe(self, topics, on_assign=None, on_revoke=None):
+        self.topic = topics[0]
+
+    def consume(self, num_messages=1, timeout=-1):
+        count = min(num_messages, self.total - self.served)
+        messages = [
+            FakeMessage(
+                self.topic,
+                (self.served + i) % self.partitions,
+                (self.served + i) // self.partitions,
+                None,
+                self.value,
+            )
+            for i in range(count)
+        ]
+        self.served += count
+        return messages
+
+    def commit(self, offsets=None, asynchronous=True):
+        self.committed += 1
+
+    def seek(self, partition):
+        pass
+
+    def get_watermark_offsets(self, partition, cached=False):
+        return 0, self.served // self.partitions
+
+    def close(self):
+        pass
+
+
+def count_ticks_handler(topic: str, partition: int, records: list[Record]) -> int:
+    return sum(len(decode_batch(record.value)) for record in records)
+
+
+def bench_consumer(messages: int, partitions: int, workers: int, batch_size: int):
+    value = encode_batch(random_ticks(100, symbols=10))
+    fake = FakeConsumer(messages, partitions, value)
+    runtime = ConsumerRuntime(
+        ["stock-prices"],
+        count_ticks_handler,
+        batch_size=batch_size,
+        workers=workers,
+        consumer=fake,
+    )
+    fake.subscribe(["stock-prices"])
+    started_at = time.perf_counter()
+    while fake.served < messages:
+        runtime.process_batch(fake.consume(batch_size))
+    elapsed = time.perf_counter() - started_at
+    stats = runtime.stats()
+    runtime.close()
+    print(
+        f"consumer: {messages / elapsed:,.0f} msgs/s "
+        f"({messages * 100 / elapsed:,.0f} ticks/s) with {workers} workers"
+    )
+    print(f"  {stats}")
+
+
+def random_ticks(count: int, symbols: int) -> list[Tick]:
+    names = [f"SYM{i}" for i in range(symbols)]
+    return [
+        Tick(
+            symbol=random.choice(names),
+            ts=1_700_000_000_000 + i,
+            price=random.uniform(1, 500),
+            source="bench",
+            size=random.choice([None, 100.0]),
+            exchange=random.choice([None, "NASDAQ", "NYSE"]),
+        )
+        for i in range(count)
+    ]
+
+
+def bench_codec(batches: int, batch_size: int):
+    ticks = random_ticks(batch_size, symbols=50)
+    for name, encode, decode in (
+        ("json", encode_json, decode_json),
+        ("binary", encode_batch, decode_batch),
+    ):
+        started_at = time.perf_counter()
+        for _ in range(batches):
+            data = encode(ticks)
+        encode_elapsed = time.perf_counter() - started_at
+        started_at = time.perf_counter()
+        for _ in range(batches):
+            decode(data)
+        decode_elapsed = time.perf_counter() - started_at
+        total = batches * batch_size
+        print(
+            f"{name:>6}: {len(data) / batch_size:6.1f} B/tick, "
+            f"encode {total / encode_elapsed:,.0f} ticks/s, "
+            f"decode {total / decode_elapsed:,.0f} ticks/s"
+        )
+
+
+def random_tick_array(count: int, symbols: int, rate: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    records = np.zeros(count, dtype=TICK_DTYPE)
+    records["symbol"] = rng.integers(0, symbols, count)
+    # `rate` ticks per second overall, in time order.
+    records["ts"] = 1_700_000_000_000 + np.arange(count) * 1000 // rate
+    records["price"] = 100 + rng.standard_normal(count).cumsum() * 0.01
+    return records
+
+
+def run_indicators(records: np.ndarray, symbols: int, batch_size: int) -> float:
+    strings = [f"SYM{i}" for i in range(symbols)]
+    engine = IndicatorEngine()
+    started_at = time.perf_counter()
+    for i in range(0, len(records), batch_size):
+        engine.update_batch(records[i : i + batch_size], strings)
+    return time.perf_counter() - started_at
+
+
+def bench_indicators(
+    ticks: int, symbols: int, rate: int, batch_size: int, workers: int
+):
+    records = random_tick_array(ticks, symbols, rate)
+    if workers <= 1:
+        elapsed = run_indicators(records, symbols, batch_size)
+    else:
+        # Symbols sharded over processes, as partitions are over the
+        # ConsumerRuntime's pinned workers; all shards run at once.
+        shards = [records[records["symbol"] % workers == i] for i in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            elapsed = max(
+                pool.map(
+                    run_indicators,
+                    shards,
+                    [symbols] * workers,
+                    [batch_size // workers] * workers,
+                )
+            )
+    print(
+        f"indicators: {ticks / elapsed:,.0f} ticks/s over {symbols:,} symbols "
+        f"with {workers} worker(s) (target {rate:,} ticks/s)"
+    )
+
+
+def bench_anomaly(ticks: int, symbols: int, batch_size: int, window: int):
+    records = random_tick_array(ticks, symbols, rate=100_000)
+    strings = [f"SYM{i}" for i in range(symbols)]
+    detector = AnomalyDetector(window=window)
+    # Fill every symbol's window first: updates cost the most once it is full.
+    warmup = random_tick_array(symbols * (window + 1), symbols, rate=100_000)
+    for i in range(0, len(warmup), batch_size):
+        detector.score_batch(warmup[i : i + batch_size], strings)
+    started_at = time.perf_counter()
+    flagged = 0
+    for i in range(0, ticks, batch_size):
+        flagged += int(
+            np.count_nonzero(
+                detector.score_batch(records[i : i + batch_size], strings)["flags"]
+            )
+        )
+    elapsed = time.perf_counter() - started_at
+    print(
+        f"anomaly: {ticks / elapsed:,.0f} ticks/s over {symbols:,} symbols, "
+        f"window {window}, {flagged} flagged"
+    )
+
+    # One tick at a time, as the PyFlink AnomalyFunction scores them.
+    state = detector.state(strings[0])
+    prices = records["price"][: min(ticks, 200_000)].tolist()
+    started_at = time.perf_counter()
+    for price in prices:
+        state.score(price, detector.thresholds)
+    elapsed = time.perf_counter() - started_at
+    print(f"anomaly: {len(prices) / elapsed:,.0f} ticks/s one at a time")
+
+
+def bench_rollup(ticks: int, symbols: int, batch_size: int):
+    records = random_tick_array(ticks, symbols, rate=100_000)
+    records["size"] = 100.0
+    started_at = time.perf_counter()
+    bars = 0
+    for i in range(0, ticks, batch_size):
+        bars += sum(len(b) for b in rollup_all(records[i : i + batch_size]).values())
+    elapsed = time.perf_counter() - started_at
+    print(
+        f"rollup: {ticks / elapsed:,.0f} ticks/s over {symbols:,} symbols, "
+        f"{bars:,} partial bars to upsert"
+    )
+
+
+def random_walk_ticks(count: int, symbols: int) -> np.ndarray:
+    """Ticks with an independent random walk around 100 per symbol."""
+    records = random_tick_array(count, symbols, rate=100_000)
+    rng = np.random.default_rng(1)
+    steps = rng.standard_normal(count) * 0.001
+    order = np.argsort(records["symbol"], kind="stable")
+    walk = steps[order].cumsum()
+    starts = np.flatnonzero(np.r_[True, np.diff(records["symbol"][order]) != 0])
+    walk -= np.repeat(
+        walk[starts] - steps[order][starts], np.diff(np.r_[starts, count])
+    )
+    records["price"][order] = 100 * np.exp(walk)
+    return records
+
+
+def random_rules(count: int, symbols: int) -> list[Rule]:
+    rng = random.Random(0)
+    rules = []
+    for i in range(count):
+        kind = rng.choice(KINDS)
+        offset = rng.uniform(-5, 5)  # percent from the starting price
+        threshold = offset if kind.startswith("change") else 100 * (1 + offset / 100)
+        rules.append(
+            Rule(str(i), f"user{i % 10_000}", f"SYM{i % symbols}", kind, threshold)
+        )
+    return rules
+
+
+def bench_rules(rules: int, ticks: int, symbols: int, batch_size: int):
+    started_at = time.perf_counter()
+    engine = RuleEngine()
+    engine.load(random_rules(rules, symbols))
+    print(f"rules: loaded {rules:,} in {time.perf_counter() - started_at:.1f}s")
+
+    records = random_walk_ticks(ticks, symbols)
+    strings = [f"SYM{i}" for i in range(symbols)]
+    started_at = time.perf_counter()
+    triggers = 0
+    for i in range(0, ticks, batch_size):
+        triggers += len(engine.evaluate_batch(records[i : i + batch_size], strings))
+    elapsed = time.perf_counter() - started_at
+    print(
+        f"rules: {ticks / elapsed:,.0f} ticks/s against {rules:,} rules over "
+        f"{symbols:,} symbols, {triggers:,} triggers"
+    )
+
+    # Baseline: test every rule of the tick's symbol.
+    by_symbol: dict[str, list[Rule]] = {}
+    for rule in engine.rules.values():
+        by_symbol.setdefault(rule.symbol, []).append(rule)
+    sample = records[:10_000]
+    started_at = time.perf_counter()
+    for symbol, price in zip(
+        sample["symbol"].tolist(), sample["price"].tolist(), strict=True
+    ):
+        change = price - 100
+        for rule in by_symbol.get(strings[symbol], ()):
+            value = price if rule.kind[0] == "p" else change
+            _ = (
+                value > rule.threshold
+                if rule.kind[-1] == "e"
+                else value < rule.threshold
+            )
+    elapsed = time.perf_counter() - started_at
+    print(f"rules: linear scan {len(sample) / elapsed:,.0f} ticks/s")
+
+
+def bench_ticks(ticks: int, symbols: int, depth: int):
+    """tick_writer.ticks_handler into a temporary TickStore, `depth` ticks per
+    symbol per batch."""
+    import tempfile
+
+    import tick_writer
+
+    records = random_tick_array(ticks, symbols, rate=100_000)
+    strings = [f"SYM{i}" for i in range(symbols)]
+    messages = [
+        Record(i, None, encode_array(records[start : start + 500], strings), 0)
+        for i, start in enumerate(range(0, ticks, 500))
+    ]
+    per_batch = max(1, depth * symbols // 500)
+    with tempfile.TemporaryDirectory() as root:
+        tick_writer._store = store = tick_writer.TickStore(root)
+        started_at = time.perf_counter()
+        for i in range(0, len(messages), per_batch):
+            tick_writer.ticks_handler("stock-prices", 0, messages[i : i + per_batch])
+        elapsed = time.perf_counter() - started_at
+        print(
+            f"ticks: {ticks / elapsed:,.0f} ticks/s written over {symbols:,} "
+            f"symbols at {depth} ticks/symbol/batch, {store.compactions} compactions"
+        )
+
+
+async def bench_fetcher(
+    symbols: int, cycles: int, rate: float, batch_size: int, encoding: str
+):
+    # The stub allows 20% more than the fetcher's budget, like a real provider.
+    runner, url = await start_stub(rate=rate * 1.2)
+    provider = Provider("stub", url, rate=rate, burst=10, batch_size=batch_size)
+    universe = [f"SYM{i}" for i in range(symbols)]
+    async with AsyncProducer(producer=FakeProducer()) as producer:
+        async with Fetcher(
+            universe, [provider], producer, interval=1.0, encoding=encoding
+        ) as fetcher:
+            started_at = time.perf_counter()
+            await fetcher.run(cycles=cycles)
+            elapsed = time.perf_counter() - started_at
+    await runner.cleanup()
+    stats = fetcher.metrics.snapshot()
+    print(
+        f"fetcher: {symbols:,} symbols in {len(fetcher.batches)} requests/cycle, "
+        f"{stats['ticks'] / elapsed:,.0f} ticks/s, "
+        f"cycle p50 {stats['cycle_p50_ms']:.0f} ms p99 {stats['cycle_p99_ms']:.0f} ms"
+    )
+    print(f"  {stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="bench", required=True)
+
+    producer_parser = subparsers.add_parser("producer")
+    producer_parser.add_argument("--messages", type=int, default=200_000)
+    producer_parser.add_argument("--max-in-flight", type=int, default=50_000)
+    producer_parser.add_argument("--broker", help="bootstrap servers; fake if unset")
+
+    codec_parser = subparsers.add_parser("codec")
+    codec_parser.add_argument("--batches", type=int, default=200)
+    codec_parser.add_argument("--batch-size", type=int, default=1000)
+
+    consumer_parser = subparsers.add_parser("consumer")
+    consumer_parser.add_argument("--messages", type=int, default=20_000)
+    consumer_parser.add_argument("--partitions", type=int, default=8)
+    consumer_parser.add_argument("--workers", type=int, default=4)
+    consumer_parser.add_argument("--batch-size", type=int, default=1000)
+
+    indicators_parser = subparsers.add_parser("indicators")
+    indicators_parser.add_argument("--ticks", type=int, default=1_000_000)
+    indicators_parser.add_argument("--symbols", type=int, default=10_000)
+    indicators_parser.add_argument("--rate", type=int, default=100_000)
+    indicators_parser.add_argument("--batch-size", type=int, default=10_000)
+    indicators_parser.add_argument("--workers", type=int, default=1)
+
+    anomaly_parser = subparsers.add_parser("anomaly")
+    anomaly_parser.add_argument("--ticks", type=int, default=1_000_000)
+    anomaly_parser.add_argument("--symbols", type=int, default=1_000)
+    anomaly_parser.add_argument("--batch-size", type=int, default=10_000)
+    anomaly_parser.add_argument("--window", type=int, default=500)
+
+    rollup_parser = subparsers.add_parser("rollup")
+    rollup_parser.add_argument("--ticks", type=int, default=1_000_000)
+    rollup_parser.add_argument("--symbols", type=int, default=1_000)
+    rollup_parser.add_argument("--batch-size", type=int, default=10_000)
+
+    rules_parser = subparsers.add_parser("rules")
+    rules_parser.add_argument("--rules", type=int, default=1_000_000)
+    rules_parser.add_argument("--ticks", type=int, default=1_000_000)
+    rules_parser.add_argument("--symbols", type=int, default=5_000)
+    rules_parser.add_argument("--batch-size", type=int, default=10_000)
+
+    ticks_parser = subparsers.add_parser("ticks")
+    ticks_parser.add_argument("--ticks", type=int, default=400_000)
+    ticks_parser.add_argument("--symbols", type=int, default=1_000)
+    ticks_parser.add_argument("--depth", type=int, default=50)
+
+    fetcher_parser = subparsers.add_parser("fetcher")
+    fetcher_parser.add_argument("--symbols", type=int, default=5000)
+    fetcher_parser.add_argument("--cycles", type=int, default=10)
+    fetcher_parser.add_argument("--rate", type=float, default=100.0)
+    fetcher_parser.add_argument("--batch-size", type=int, default=100)
+    fetcher_parser.add_argument(
+        "--encoding", choices=["binary", "json"], default="binary"
+    )
+
+    args = parser.parse_args()
+    if args.bench == "producer":
+        asyncio.run(bench_producer(args.messages, args.max_in_flight, args.broker))
+    elif args.bench == "codec":
+        bench_codec(args.batches, args.batch_size)
+    elif args.bench == "consumer":
+        bench_consumer(args.messages, args.partitions, args.workers, args.batch_size)
+    elif args.bench == "indicators":
+        bench_indicators(
+            args.ticks, args.symbols, args.rate, args.batch_size, args.workers
+        )
+    elif args.bench == "anomaly":
+        bench_anomaly(args.ticks, args.symbols, args.batch_size, args.window)
+    elif args.bench == "rollup":
+        bench_rollup(args.ticks, args.symbols, args.batch_size)
+    elif args.bench == "rules":
+        bench_rules(args.rules, args.ticks, args.symbols, args.batch_size)
+    elif args.bench == "ticks":
+        bench_ticks(args.ticks, args.symbols, args.depth)
+    elif args.bench == "fetcher":
+        asyncio.run(
+            bench_fetcher(
+                args.symbols,
+                args.cycles,
+                args.rate,
+                args.batch_size,
+                args.encoding,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
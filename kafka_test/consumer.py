@@ -1,19 +1,331 @@
-from confluent_kafka import Consumer
+import os
+import signal
+import time
+import zlib
+from collections import defaultdict
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import NamedTuple
 
-conf = {
+from confluent_kafka import Consumer, KafkaError, Producer, TopicPartition
+
+DEFAULT_CONFIG = {
     "bootstrap.servers": "localhost:9092",
     "group.id": "my-group",
     "auto.offset.reset": "earliest",
+    # Offsets are committed by the runtime after a batch is processed.
+    "enable.auto.commit": False,
+    "enable.auto.offset.store": False,
+    "fetch.min.bytes": 64 * 1024,
+    "fetch.wait.max.ms": 100,
 }
 
-consumer = Consumer(conf)
-consumer.subscribe(["my_topic"])
-
-while True:
-    msg = consumer.poll(1.0)
-    if msg is None:
-        continue
-    if msg.error():
-        print(f"❌ {msg.error()}")
-        continue
-    print(f"✅ Received: {msg.value().decode('utf-8')} (key={msg.key()})")
+
+class Record(NamedTuple):
+    offset: int
+    key: bytes | None
+    value: bytes | None
+    timestamp: int
+
+
+# handler(topic, partition, records) runs in a worker process and must be a
+# picklable top-level function. Raising makes the partition's batch retry; an
+# int it returns (e.g. rows written) is added to ConsumerMetrics.results.
+Handler = Callable[[str, int, list[Record]], object]
+
+
+@dataclass
+class ConsumerMetrics:
+    started_at: float = field(default_factory=time.monotonic)
+    messages: int = 0
+    batches: int = 0
+    commits: int = 0
+    failures: int = 0
+    dead_lettered: int = 0
+    results: int = 0
+    errors: int = 0
+    rebalances: int = 0
+    processing_time: float = 0.0
+    # Wall-clock time the poll loop last came round; a hung handler stops it.
+    checked_in: float = field(default_factory=time.time)
+    positions: dict[tuple[str, int], int] = field(default_factory=dict)
+
+    def snapshot(self) -> dict:
+        elapsed = time.monotonic() - self.started_at
+        return {
+            "messages": self.messages,
+            "batches": self.batches,
+            "commits": self.commits,
+            "failures": self.failures,
+            "dead_lettered": self.dead_lettered,
+            "results": self.results,
+            "errors": self.errors,
+            "rebalances": self.rebalances,
+            "throughput": self.messages / elapsed if elapsed else 0.0,
+            "avg_batch_ms": (
+                self.processing_time / self.batches * 1000 if self.batches else 0.0
+            ),
+        }
+
+
+def _run_partition(
+    handler: Handler, topic: str, partition: int, records: list[Record]
+) -> object:
+    return handler(topic, partition, records)
+
+
+class ConsumerRuntime:
+    """Batch-consuming Kafka runtime with per-partition parallel dispatch.
+
+    Each `consume()` batch is split by partition and the partitions are handled
+    concurrently; records within a partition stay in order, and since ticks
+    are keyed by symbol so does each symbol. By default there are `workers`
+    single-process pools and a partition is always sent to the same one, so a
+    handler may keep per-partition state in its process. A given `executor`
+    handles every partition as it sees fit.
+
+    Offsets are committed only for partitions whose handler succeeded; a
+    failed partition is rewound to its first offset in the batch and
+    redelivered. A batch that fails `max_retries` times in a row is sent to
+    `dead_letter_topic` if set, or else logged and skipped, and its offsets
+    are committed. Failures raising one of `transient` (e.g. a lost database
+    connection) are retried after `retry_backoff` seconds for as long as they
+    last, and never count towards `max_retries`.
+    """
+
+    def __init__(
+        self,
+        topics: list[str],
+        handler: Handler,
+        config: dict | None = None,
+        batch_size: int = 1000,
+        batch_timeout: float = 0.5,
+        executor: Executor | None = None,
+        workers: int | None = None,
+        consumer: Consumer | None = None,
+        max_retries: int = 5,
+        dead_letter_topic: str | None = None,
+        dead_letter: Producer | None = None,
+        transient: tuple[type[BaseException], ...] = (),
+        retry_backoff: float = 1.0,
+    ):
+        self.topics = topics
+        self.handler = handler
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.max_retries = max_retries
+        self.dead_letter_topic = dead_letter_topic
+        self.transient = transient
+        self.retry_backoff = retry_backoff
+        self.metrics = ConsumerMetrics()
+        config = {**DEFAULT_CONFIG, **(config or {})}
+        self._consumer = consumer or Consumer(config)
+        self._owns_executor = executor is None
+        if executor is not None:
+            self._executors = [executor]
+        else:
+            self._executors = [
+                ProcessPoolExecutor(max_workers=1)
+                for _ in range(workers or os.cpu_count() or 1)
+            ]
+        if dead_letter is None and dead_letter_topic:
+            dead_letter = Producer({"bootstrap.servers": config["bootstrap.servers"]})
+        self._dead_letter = dead_letter
+        # (topic, partition) -> (first offset of the failing batch, failures)
+        self._retries: dict[tuple[str, int], tuple[int, int]] = {}
+        self._running = False
+
+    def _executor(self, topic: str, partition: int) -> Executor:
+        index = (zlib.crc32(topic.encode()) + partition) % len(self._executors)
+        return self._executors[index]
+
+    def _on_assign(self, consumer, partitions: list[TopicPartition]) -> None:
+        self.metrics.rebalances += 1
+
+    def _on_revoke(self, consumer, partitions: list[TopicPartition]) -> None:
+        # Batches are fully processed before the next consume(), which is where
+        # this callback fires; only the async commits may still be in flight.
+        self.metrics.rebalances += 1
+        revoked = []
+        for tp in partitions:
+            position = self.metrics.positions.pop((tp.topic, tp.partition), None)
+            if position is not None:
+                revoked.append(TopicPartition(tp.topic, tp.partition, position))
+        self._commit_sync(revoked)
+
+    def _commit_sync(self, offsets: list[TopicPartition]) -> None:
+        if not offsets:
+            return
+        try:
+            self._consumer.commit(offsets=offsets, asynchronous=False)
+            self.metrics.commits += 1
+        except Exception as e:
+            self.metrics.errors += 1
+            print(f"❌ Commit failed: {e}")
+
+    def _failed(
+        self, topic: str, partition: int, records: list[Record], error: Exception
+    ) -> bool:
+        """Count a failure; returns whether the batch should be retried."""
+        self.metrics.failures += 1
+        if isinstance(error, self.transient):
+            print(f"❌ {topic}[{partition}] failed, retrying batch: {error}")
+            return True
+        key = (topic, partition)
+        offset, failures = self._retries.get(key, (records[0].offset, 0))
+        failures = failures + 1 if offset == records[0].offset else 1
+        if failures < self.max_retries:
+            self._retries[key] = (records[0].offset, failures)
+            print(f"❌ {topic}[{partition}] failed, retrying batch: {error}")
+            return True
+        first, last = records[0].offset, records[-1].offset
+        if self._dead_letter is None:
+            print(
+                f"❌ {topic}[{partition}] offsets {first}-{last} failed "
+                f"{failures} times, skipping: {error}"
+            )
+            self._retries.pop(key, None)
+            self.metrics.dead_lettered += len(records)
+            return False
+        print(
+            f"❌ {topic}[{partition}] offsets {first}-{last} failed "
+            f"{failures} times, sending to {self.dead_letter_topic}: {error}"
+        )
+        for record in records:
+            self._dead_letter.produce(
+                self.dead_letter_topic,
+                value=record.value,
+                key=record.key,
+                headers={
+                    "topic": topic,
+                    "partition": str(partition),
+                    "offset": str(record.offset),
+                    "error": str(error)[:1000],
+                },
+            )
+        # Delivered before the offsets move past the records; if not, the
+        # batch comes back and is dead-lettered again.
+        if self._dead_letter.flush(30) > 0:
+            self.metrics.errors += 1
+            self._retries[key] = (records[0].offset, failures)
+            return True
+        self._retries.pop(key, None)
+        self.metrics.dead_lettered += len(records)
+        return False
+
+    def lag(self) -> dict[str, int]:
+        lag = {}
+        for (topic, partition), position in self.metrics.positions.items():
+            tp = TopicPartition(topic, partition)
+            try:
+                _, high = self._consumer.get_watermark_offsets(tp, cached=True)
+            except Exception:
+                continue
+            if high >= 0:
+                lag[f"{topic}[{partition}]"] = max(high - position, 0)
+        return lag
+
+    def stats(self) -> dict:
+        return {**self.metrics.snapshot(), "lag": self.lag()}
+
+    def process_batch(self, messages: list) -> None:
+        started_at = time.perf_counter()
+        groups: dict[tuple[str, int], list[Record]] = defaultdict(list)
+        for message in messages:
+            error = message.error()
+            if error is not None:
+                if error.code() != KafkaError._PARTITION_EOF:
+                    self.metrics.errors += 1
+                    print(f"❌ {error}")
+                continue
+            groups[(message.topic(), message.partition())].append(
+                Record(
+                    offset=message.offset(),
+                    key=message.key(),
+                    value=message.value(),
+                    timestamp=message.timestamp()[1],
+                )
+            )
+
+        futures = {
+            key: self._executor(*key).submit(
+                _run_partition, self.handler, key[0], key[1], records
+            )
+            for key, records in groups.items()
+        }
+        commits = []
+        transient = False
+        for (topic, partition), future in futures.items():
+            records = groups[(topic, partition)]
+            try:
+                result = future.result()
+            except Exception as e:
+                if self._failed(topic, partition, records, e):
+                    transient = transient or isinstance(e, self.transient)
+                    self._consumer.seek(
+                        TopicPartition(topic, partition, records[0].offset)
+                    )
+                    continue
+            else:
+                self._retries.pop((topic, partition), None)
+                if isinstance(result, int):
+                    self.metrics.results += result
+            next_offset = records[-1].offset + 1
+            commits.append(TopicPartition(topic, partition, next_offset))
+            self.metrics.positions[(topic, partition)] = next_offset
+            self.metrics.messages += len(records)
+
+        if commits:
+            self._consumer.commit(offsets=commits, asynchronous=True)
+            self.metrics.commits += 1
+        self.metrics.batches += 1
+        self.metrics.processing_time += time.perf_counter() - started_at
+        if transient:
+            # Give the database time to come back rather than spin on it.
+            time.sleep(self.retry_backoff)
+
+    def run(self) -> None:
+        self._running = True
+        self._consumer.subscribe(
+            self.topics, on_assign=self._on_assign, on_revoke=self._on_revoke
+        )
+        try:
+            while self._running:
+                self.metrics.checked_in = time.time()
+                messages = self._consumer.consume(
+                    num_messages=self.batch_size, timeout=self.batch_timeout
+                )
+                if messages:
+                    self.process_batch(messages)
+        finally:
+            self.close()
+
+    def stop(self) -> None:
+        self._running = False
+
+    def close(self) -> None:
+        self._commit_sync(
+            [
+                TopicPartition(topic, partition, position)
+                for (topic, partition), position in self.metrics.positions.items()
+            ]
+        )
+        self._consumer.close()
+        if self._owns_executor:
+            for executor in self._executors:
+                executor.shutdown(wait=True)
+
+
+def print_handler(topic: str, partition: int, records: list[Record]) -> None:
+    for record in records:
+        value = record.value.decode("utf-8") if record.value else None
+        print(f"✅ Received: {value} (key={record.key})")
+
+
+if __name__ == "__main__":
+    runtime = ConsumerRuntime(["my_topic"], print_handler, workers=2)
+    signal.signal(signal.SIGTERM, lambda *_: runtime.stop())
+    signal.signal(signal.SIGINT, lambda *_: runtime.stop())
+    runtime.run()
+    print(runtime.stats())
@@ -0,0 +1,53 @@
+"""Postgres access shared by the consumers that write to the database."""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+import psycopg2
+
+# A lost or refused connection; retrying the batch later can succeed, so
+# ConsumerRuntime treats these as transient instead of skipping the batch.
+CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+
+class Connection:
+    """A psycopg2 connection that is reopened after it breaks.
+
+    A connection error closes it and propagates, failing the handler so its
+    batch is redelivered; the next use connects again.
+    """
+
+    def __init__(self, dsn: str, autocommit: bool = False):
+        self.dsn = dsn
+        self.autocommit = autocommit
+        self._connection = None
+
+    def _connect(self):
+        if self._connection is None or self._connection.closed:
+            self._connection = psycopg2.connect(self.dsn)
+            self._connection.autocommit = self.autocommit
+        return self._connection
+
+    @contextmanager
+    def cursor(self) -> Iterator:
+        try:
+            with self._connect().cursor() as cursor:
+                yield cursor
+        except CONNECTION_ERRORS:
+            self.close()
+            raise
+
+    @contextmanager
+    def transaction(self) -> Iterator:
+        """A cursor whose statements commit together, or roll back on error."""
+        try:
+            connection = self._connect()
+            with connection, connection.cursor() as cursor:
+                yield cursor
+        except CONNECTION_ERRORS:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
@@ -0,0 +1,448 @@
+"""Price fetcher: polls market-data providers and publishes ticks to stock-prices.
+
+Every `interval` the symbol universe is split into per-provider batches (one
+request carries `batch_size` symbols). Requests share one pooled aiohttp
+session and wait on a per-provider token bucket, so a cycle spreads itself
+over the provider's rate limit instead of bursting into 429s. Failed requests
+are retried with full-jitter exponential backoff, honouring Retry-After.
+
+Ticks go straight into an AsyncProducer. stock-prices is partitioned by
+symbol, so ticks are buffered in `key_shards` groups by a stable hash of the
+symbol and each group is sent as one message keyed by its shard: a symbol
+always lands on the same partition while messages stay batched. A group is
+sent when it reaches `max_batch` ticks or when the cycle ends. Messages are
+binary by default; every reader (the consumers and the Flink job) also
+accepts the JSON encoding.
+
+A request's failure, or a malformed quote, is counted and skipped; neither
+aborts the rest of the cycle.
+
+`stub_app` is a local quote server with its own rate limit, used by
+`bench.py fetcher` and for running the fetcher without a real provider.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import zlib
+from collections import deque
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+from typing import Literal
+
+import aiohttp
+from aiohttp import web
+
+from producer import AsyncProducer
+from tick_codec import Tick, encode_batch, encode_json
+
+Encoding = Literal["binary", "json"]
+ENCODERS = {"binary": encode_batch, "json": encode_json}
+
+
+@dataclass(frozen=True)
+class Provider:
+    name: str
+    url: str  # GET {url}?symbols=A,B,C -> {"quotes": [{"symbol", "price", ...}]}
+    rate: float  # requests per second
+    burst: int = 1
+    batch_size: int = 100
+    timeout: float = 5.0
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        # The lock makes waiters take tokens in arrival order.
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def block(self, seconds: float) -> None:
+        """Stop handing out tokens for `seconds` (e.g. on Retry-After)."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+
+class RetryableError(Exception):
+    pass
+
+
+@dataclass
+class FetcherMetrics:
+    cycles: int = 0
+    late_cycles: int = 0
+    skipped_cycles: int = 0
+    requests: int = 0
+    retries: int = 0
+    rate_limited: int = 0
+    failures: int = 0
+    malformed: int = 0
+    cycle_errors: int = 0
+    ticks: int = 0
+    messages: int = 0
+    # Wall-clock time the last cycle started; stops while one hangs.
+    checked_in: float = field(default_factory=time.time)
+    request_latencies: deque = field(default_factory=lambda: deque(maxlen=10_000))
+    cycle_latencies: deque = field(default_factory=lambda: deque(maxlen=1_000))
+
+    @staticmethod
+    def _percentile(samples: deque, percentile: float) -> float:
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percentile / 100))]
+
+    def snapshot(self) -> dict:
+        return {
+            "cycles": self.cycles,
+            "late_cycles": self.late_cycles,
+            "skipped_cycles": self.skipped_cycles,
+            "requests": self.requests,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "failures": self.failures,
+            "malformed": self.malformed,
+            "cycle_errors": self.cycle_errors,
+            "ticks": self.ticks,
+            "messages": self.messages,
+            "request_p50_ms": self._percentile(self.request_latencies, 50) * 1000,
+            "request_p99_ms": self._percentile(self.request_latencies, 99) * 1000,
+            "cycle_p50_ms": self._percentile(self.cycle_latencies, 50) * 1000,
+            "cycle_p99_ms": self._percentile(self.cycle_latencies, 99) * 1000,
+        }
+
+
+def parse_retry_after(value: str) -> float | None:
+    """Seconds to wait from a Retry-After header: delay-seconds or an HTTP-date."""
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=UTC)
+    return max(0.0, (retry_at - datetime.now(UTC)).total_seconds())
+
+
+def parse_quotes(provider: Provider, payload: dict) -> tuple[list[Tick], int]:
+    """Ticks from a provider response, and how many quotes were malformed."""
+    quotes = payload.get("quotes", ()) if isinstance(payload, dict) else None
+    if not isinstance(quotes, list | tuple):
+        return [], 1
+    now = int(time.time() * 1000)
+    ticks = []
+    malformed = 0
+    for quote in quotes:
+        try:
+            if quote.get("price") is None:
+                continue
+            ticks.append(
+                Tick(
+                    symbol=str(quote["symbol"]),
+                    ts=int(quote.get("ts") or now),
+                    price=float(quote["price"]),
+                    source=provider.name,
+                    size=quote.get("size"),
+                    exchange=quote.get("exchange"),
+                )
+            )
+        except (AttributeError, KeyError, TypeError, ValueError):
+            malformed += 1
+    return ticks, malformed
+
+
+class Fetcher:
+    def __init__(
+        self,
+        symbols: Sequence[str],
+        providers: Sequence[Provider],
+        producer: AsyncProducer,
+        topic: str = "stock-prices",
+        interval: float = 1.0,
+        encoding: Encoding = "binary",
+        key_shards: int = 64,
+        max_batch: int = 500,
+        max_retries: int = 3,
+        backoff: float = 0.1,
+        max_backoff: float = 2.0,
+        max_connections: int = 100,
+        session: aiohttp.ClientSession | None = None,
+    ):
+        self.providers = list(providers)
+        self.producer = producer
+        self.topic = topic
+        self.interval = interval
+        self.encode = ENCODERS[encoding]
+        self.key_shards = key_shards
+        self.max_batch = max_batch
+        self._pending: dict[int, list[Tick]] = {}
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_connections = max_connections
+        self.metrics = FetcherMetrics()
+        self.buckets = {p.name: TokenBucket(p.rate, p.burst) for p in self.providers}
+        self.batches = self._plan(list(symbols))
+        self._session = session
+        self._owns_session = session is None
+        self._running = False
+
+    def _plan(self, symbols: list[str]) -> list[tuple[Provider, list[str]]]:
+        """Split symbols over providers in proportion to their request rate."""
+        total_rate = sum(p.rate * p.batch_size for p in self.providers)
+        batches = []
+        start = 0
+        for i, provider in enumerate(self.providers):
+            share = provider.rate * provider.batch_size / total_rate
+            end = (
+                len(symbols)
+                if i == len(self.providers) - 1
+                else start + round(len(symbols) * share)
+            )
+            for j in range(start, end, provider.batch_size):
+                batches.append(
+                    (provider, symbols[j : min(j + provider.batch_size, end)])
+                )
+            start = end
+        return batches
+
+    async def start(self) -> None:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.max_connections, ttl_dns_cache=300
+                )
+            )
+        self._running = True
+
+    async def close(self) -> None:
+        self._running = False
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self) -> "Fetcher":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def _request(self, provider: Provider, symbols: list[str]) -> list[Tick]:
+        assert self._session is not None
+        bucket = self.buckets[provider.name]
+        await bucket.acquire()
+        started_at = time.perf_counter()
+        self.metrics.requests += 1
+        async with self._session.get(
+            provider.url,
+            params={"symbols": ",".join(symbols)},
+            timeout=aiohttp.ClientTimeout(total=provider.timeout),
+        ) as response:
+            if response.status == 429:
+                self.metrics.rate_limited += 1
+                retry_after = parse_retry_after(response.headers.get("Retry-After", ""))
+                if retry_after is not None:
+                    bucket.block(retry_after)
+                raise RetryableError("429 Too Many Requests")
+            if response.status >= 500:
+                raise RetryableError(f"{response.status} from {provider.name}")
+            response.raise_for_status()
+            payload = await response.json()
+        self.metrics.request_latencies.append(time.perf_counter() - started_at)
+        ticks, malformed = parse_quotes(provider, payload)
+        if malformed:
+            self.metrics.malformed += malformed
+            print(f"⚠️ {provider.name} returned {malformed} malformed quotes")
+        return ticks
+
+    async def fetch(self, provider: Provider, symbols: list[str]) -> list[Tick]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self._request(provider, symbols)
+            except (RetryableError, aiohttp.ClientError, TimeoutError) as e:
+                if attempt == self.max_retries:
+                    self.metrics.failures += 1
+                    print(f"❌ {provider.name} failed for {len(symbols)} symbols: {e}")
+                    return []
+                self.metrics.retries += 1
+                # Full jitter: spreads retries from one burst of failures apart.
+                cap = min(self.max_backoff, self.backoff * 2**attempt)
+                await asyncio.sleep(random.uniform(0, cap))
+        return []  # unreachable; keeps type checkers happy
+
+    async def _send(self, shard: int) -> None:
+        group = self._pending.pop(shard)
+        await self.producer.send(self.topic, self.encode(group), key=str(shard))
+        self.metrics.messages += 1
+
+    async def publish(self, ticks: list[Tick]) -> None:
+        """Buffer ticks per key shard; a shard is sent once it has `max_batch`."""
+        for tick in ticks:
+            shard = zlib.crc32(tick.symbol.encode()) % self.key_shards
+            group = self._pending.setdefault(shard, [])
+            group.append(tick)
+            if len(group) >= self.max_batch:
+                await self._send(shard)
+        self.metrics.ticks += len(ticks)
+
+    async def flush(self) -> None:
+        for shard in list(self._pending):
+            await self._send(shard)
+
+    async def _fetch_and_publish(self, provider: Provider, symbols: list[str]):
+        ticks = await self.fetch(provider, symbols)
+        if ticks:
+            await self.publish(ticks)
+
+    async def run_cycle(self) -> int:
+        """Fetch and publish every batch once; returns the batches that raised."""
+        started_at = time.perf_counter()
+        results = await asyncio.gather(
+            *(self._fetch_and_publish(provider, s) for provider, s in self.batches),
+            return_exceptions=True,
+        )
+        errors = [result for result in results if isinstance(result, Exception)]
+        for error in errors[:3]:
+            print(f"❌ Batch failed: {error!r}")
+        self.metrics.cycle_errors += len(errors)
+        await self.flush()
+        elapsed = time.perf_counter() - started_at
+        self.metrics.cycles += 1
+        self.metrics.cycle_latencies.append(elapsed)
+        if elapsed > self.interval:
+            self.metrics.late_cycles += 1
+        return len(errors)
+
+    def _reap(self, cycle: asyncio.Task) -> None:
+        """Retrieve a finished cycle's exception, e.g. from a failed flush."""
+        if not cycle.cancelled() and cycle.exception() is not None:
+            self.metrics.cycle_errors += 1
+            print(f"❌ Cycle failed: {cycle.exception()!r}")
+
+    async def run(self, cycles: int | None = None) -> None:
+        """Start a cycle every `interval`; a cycle still running is not doubled."""
+        current: asyncio.Task | None = None
+        next_at = time.monotonic()
+        started = 0
+        while self._running and (cycles is None or started < cycles):
+            if current is None or current.done():
+                self.metrics.checked_in = time.time()
+                current = asyncio.create_task(self.run_cycle())
+                current.add_done_callback(self._reap)
+                started += 1
+            else:
+                self.metrics.skipped_cycles += 1
+            next_at += self.interval
+            await asyncio.sleep(max(0.0, next_at - time.monotonic()))
+        if current is not None:
+            await asyncio.wait([current])
+
+    def stop(self) -> None:
+        self._running = False
+
+
+def stub_app(rate: float = 1000.0, burst: int = 100) -> web.Application:
+    """A quote provider with a random walk per symbol and a token-bucket limit."""
+    prices: dict[str, float] = {}
+    limit = {"tokens": float(burst), "updated": time.monotonic()}
+
+    async def quotes(request: web.Request) -> web.Response:
+        now = time.monotonic()
+        limit["tokens"] = min(burst, limit["tokens"] + (now - limit["updated"]) * rate)
+        limit["updated"] = now
+        if limit["tokens"] < 1:
+            return web.json_response(
+                {"error": "rate limited"},
+                status=429,
+                headers={"Retry-After": f"{(1 - limit['tokens']) / rate:.3f}"},
+            )
+        limit["tokens"] -= 1
+        ts = int(time.time() * 1000)
+        result = []
+        for symbol in filter(None, request.query.get("symbols", "").split(",")):
+            price = prices.get(symbol) or random.uniform(10, 500)
+            price = prices[symbol] = max(0.01, price * (1 + random.gauss(0, 0.001)))
+            result.append(
+                {"symbol": symbol, "price": round(price, 4), "size": 100, "ts": ts}
+            )
+        return web.json_response({"quotes": result})
+
+    app = web.Application()
+    app.router.add_get("/quotes", quotes)
+    return app
+
+
+async def start_stub(
+    host: str = "127.0.0.1", port: int = 0, rate: float = 1000.0
+) -> tuple[web.AppRunner, str]:
+    runner = web.AppRunner(stub_app(rate=rate), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    bound_port = runner.addresses[0][1]
+    return runner, f"http://{host}:{bound_port}/quotes"
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=5000, help="SYM0..SYMn")
+    parser.add_argument("--provider-url", help="quote endpoint; local stub if unset")
+    parser.add_argument("--rate", type=float, default=100.0)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--interval", type=float, default=1.0)
+    parser.add_argument("--encoding", choices=list(ENCODERS), default="binary")
+    parser.add_argument("--broker", default="localhost:9092")
+    args = parser.parse_args()
+
+    runner = None
+    url = args.provider_url
+    if url is None:
+        runner, url = await start_stub(rate=args.rate * 2)
+    provider = Provider(
+        "stub", url, rate=args.rate, burst=10, batch_size=args.batch_size
+    )
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+    async with AsyncProducer({"bootstrap.servers": args.broker}) as producer:
+        async with Fetcher(
+            symbols,
+            [provider],
+            producer,
+            interval=args.interval,
+            encoding=args.encoding,
+        ) as fetcher:
+            try:
+                await fetcher.run()
+            finally:
+                print(fetcher.metrics.snapshot())
+    if runner is not None:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
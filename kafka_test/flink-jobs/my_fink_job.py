@@ -1,18 +1,369 @@
-from pyflink.datastream import StreamExecutionEnvironment
-from pyflink.datastream.connectors.kafka import KafkaOffsetsInitializer, KafkaSource
-
-env = StreamExecutionEnvironment.get_execution_environment()
-
-source = (
-    KafkaSource.builder()
-    .set_bootstrap_servers("kafka:29092")
-    .set_topics("my_topic")
-    .set_group_id("flink_consumer")
-    .set_starting_offsets(KafkaOffsetsInitializer.earliest())
-    .build()
+"""stock-prices -> keyed sliding windows + anomalies -> processed-prices.
+
+Ticks are read in either tick_codec encoding, binary or JSON. PyFlink's Kafka
+source only hands Python strings, so messages are decoded as ISO-8859-1, which
+maps every byte to one character, and encoded back to the original bytes
+before tick_codec sees them. They are stamped with event time from `ts` under
+a bounded-out-of-orderness watermark, keyed by symbol, and aggregated over
+sliding 1m/5m/1h windows. Two keyed process functions handle every tick: one
+updates the symbol's indicators.SymbolIndicators (time-window SMA, EMA and %
+change from the previous session's close), the other scores it for anomalies.
+All outputs are written as JSON to the processed-prices topic.
+
+On the docker-compose cluster the jobmanager and taskmanager run the
+kafka_test/Dockerfile image, which has the Python runtime the functions need;
+submit with `flink run -m jobmanager:8081 -py /jobs/my_fink_job.py` from the
+pyflink container. The kafka_test modules travel with the job (configure).
+
+Run `python my_fink_job.py --local` to execute the same pipeline on a local
+mini-cluster against a bounded in-memory source and check its output. It
+needs apache-flink==1.18.1 (as in the Dockerfile) and a Java 11 or 17 runtime;
+Flink's Python workers use the `python` on PATH.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from pyflink.common import Duration, Types, WatermarkStrategy
+from pyflink.common.serialization import SimpleStringSchema
+from pyflink.common.time import Time
+from pyflink.common.watermark_strategy import TimestampAssigner
+from pyflink.datastream import (
+    KeyedProcessFunction,
+    RuntimeContext,
+    StreamExecutionEnvironment,
+)
+from pyflink.datastream.connectors.base import DeliveryGuarantee
+from pyflink.datastream.connectors.kafka import (
+    KafkaOffsetsInitializer,
+    KafkaRecordSerializationSchema,
+    KafkaSink,
+    KafkaSource,
+)
+from pyflink.datastream.functions import AggregateFunction, ProcessWindowFunction
+from pyflink.datastream.state import ValueStateDescriptor
+from pyflink.datastream.state_backend import (
+    EmbeddedRocksDBStateBackend,
+    HashMapStateBackend,
 )
+from pyflink.datastream.window import SlidingEventTimeWindows
+
+# tick_codec / anomaly live next to the producer and consumer in kafka_test/.
+MODULES_DIR = os.getenv(
+    "KAFKA_TEST_DIR", os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+sys.path.insert(0, MODULES_DIR)
+
+from anomaly import SymbolDetector, Thresholds  # noqa: E402
+from indicators import DEFAULT_WINDOWS, SymbolIndicators  # noqa: E402
+from tick_codec import Tick, decode_batch, encode_batch, encode_json  # noqa: E402
+
+KAFKA_BOOTSTRAP_SERVERS = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "kafka:29092")
+SOURCE_TOPIC = os.getenv("SOURCE_TOPIC", "stock-prices")
+SINK_TOPIC = os.getenv("SINK_TOPIC", "processed-prices")
+GROUP_ID = os.getenv("GROUP_ID", "flink_consumer")
+# Defaults to the task slots of the single taskmanager in docker-compose.yml.
+PARALLELISM = int(os.getenv("PARALLELISM", 2))
+CHECKPOINT_INTERVAL_MS = int(os.getenv("CHECKPOINT_INTERVAL_MS", 10_000))
+CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", "")
+STATE_BACKEND = os.getenv("STATE_BACKEND", "hashmap")  # hashmap | rocksdb
+MAX_OUT_OF_ORDERNESS_MS = int(os.getenv("MAX_OUT_OF_ORDERNESS_MS", 2_000))
+# pct_change is measured from the last price of the previous session (UTC day).
+SESSION_MS = int(os.getenv("SESSION_MS", 86_400_000))
+KAFKA_CONNECTOR_JAR = os.getenv("KAFKA_CONNECTOR_JAR", "")
+
+# name -> (size, slide)
+WINDOWS = {
+    "1m": (Time.minutes(1), Time.seconds(10)),
+    "5m": (Time.minutes(5), Time.minutes(1)),
+    "1h": (Time.hours(1), Time.minutes(5)),
+}
+
+# Byte-transparent charset for the source; see the module docstring.
+RAW_CHARSET = "ISO-8859-1"
+
+TICK_TYPE = Types.TUPLE([Types.STRING(), Types.LONG(), Types.DOUBLE(), Types.DOUBLE()])
+
+
+def parse_ticks(value: str):
+    for tick in decode_batch(value.encode(RAW_CHARSET)):
+        yield tick.symbol, tick.ts, tick.price, tick.size or 0.0
+
+
+class TickTimestampAssigner(TimestampAssigner):
+    def extract_timestamp(self, value, record_timestamp: int) -> int:
+        return value[1]
+
+
+class OhlcvAggregate(AggregateFunction):
+    # accumulator: (count, price_sum, volume, first_ts, open, last_ts, close, high, low)
+
+    def create_accumulator(self):
+        return 0, 0.0, 0.0, None, None, None, None, float("-inf"), float("inf")
+
+    def add(self, value, accumulator):
+        count, total, volume, first_ts, open_, last_ts, close, high, low = accumulator
+        _, ts, price, size = value
+        if first_ts is None or ts < first_ts:
+            first_ts, open_ = ts, price
+        if last_ts is None or ts >= last_ts:
+            last_ts, close = ts, price
+        return (
+            count + 1,
+            total + price,
+            volume + size,
+            first_ts,
+            open_,
+            last_ts,
+            close,
+            max(high, price),
+            min(low, price),
+        )
+
+    def get_result(self, accumulator):
+        count, total, volume, _, open_, _, close, high, low = accumulator
+        return count, total / count if count else 0.0, volume, open_, close, high, low
+
+    def merge(self, a, b):
+        first = a if a[3] is not None and (b[3] is None or a[3] <= b[3]) else b
+        last = a if a[5] is not None and (b[5] is None or a[5] >= b[5]) else b
+        return (
+            a[0] + b[0],
+            a[1] + b[1],
+            a[2] + b[2],
+            first[3],
+            first[4],
+            last[5],
+            last[6],
+            max(a[7], b[7]),
+            min(a[8], b[8]),
+        )
+
+
+class WindowResult(ProcessWindowFunction):
+    def __init__(self, name: str):
+        self.name = name
+
+    def process(self, key, context, elements):
+        for count, sma, volume, open_, close, high, low in elements:
+            window = context.window()
+            yield json.dumps(
+                {
+                    "type": "window",
+                    "symbol": key,
+                    "window": self.name,
+                    "start": window.start,
+                    "end": window.end,
+                    "count": count,
+                    "sma": sma,
+                    "open": open_,
+                    "high": high,
+                    "low": low,
+                    "close": close,
+                    "volume": volume,
+                }
+            )
+
+
+class IndicatorFunction(KeyedProcessFunction):
+    """Updates a per-symbol indicators.SymbolIndicators in keyed state.
+
+    The close rolls on the first tick of each session, in event time. Until a
+    symbol's first roll, pct_change is measured from the first price seen.
+    """
+
+    def __init__(
+        self, windows: dict[str, int] | None = None, session_ms: int = SESSION_MS
+    ):
+        self.windows = windows or DEFAULT_WINDOWS
+        self.session_ms = session_ms
+        self.state = None
+
+    def open(self, runtime_context: RuntimeContext):
+        self.state = runtime_context.get_state(
+            ValueStateDescriptor("indicators", Types.PICKLED_BYTE_ARRAY())
+        )
+
+    def process_element(self, value, ctx: "KeyedProcessFunction.Context"):
+        symbol, ts, price, _ = value
+        indicators = self.state.value() or SymbolIndicators(list(self.windows.values()))
+        last_ts = indicators.last_ts
+        if last_ts is not None and ts // self.session_ms > last_ts // self.session_ms:
+            indicators.roll_close()
+        smas, emas, pct_change = indicators.update(ts, price)
+        self.state.update(indicators)
+        result = {"type": "indicators", "symbol": symbol, "ts": ts, "price": price}
+        for name, sma, ema in zip(self.windows, smas, emas, strict=True):
+            result[f"sma_{name}"] = sma
+            result[f"ema_{name}"] = ema
+        result["pct_change"] = pct_change
+        yield json.dumps(result)
+
+
+class AnomalyFunction(KeyedProcessFunction):
+    """Scores each tick with a per-symbol anomaly.SymbolDetector in keyed state."""
+
+    def __init__(self, window: int = 500, thresholds: Thresholds | None = None):
+        self.window = window
+        self.thresholds = thresholds or Thresholds()
+        self.state = None
+
+    def open(self, runtime_context: RuntimeContext):
+        self.state = runtime_context.get_state(
+            ValueStateDescriptor("anomaly", Types.PICKLED_BYTE_ARRAY())
+        )
+
+    def process_element(self, value, ctx: "KeyedProcessFunction.Context"):
+        symbol, ts, price, _ = value
+        detector = self.state.value() or SymbolDetector(self.window)
+        ret, zscore, flags = detector.score(price, self.thresholds)
+        self.state.update(detector)
+        if flags:
+            yield json.dumps(
+                {
+                    "type": "anomaly",
+                    "symbol": symbol,
+                    "ts": ts,
+                    "price": price,
+                    "ret": ret,
+                    "zscore": zscore,
+                    "flags": flags,
+                }
+            )
+
+
+def configure(env: StreamExecutionEnvironment) -> None:
+    env.set_parallelism(PARALLELISM)
+    if CHECKPOINT_INTERVAL_MS > 0:
+        env.enable_checkpointing(CHECKPOINT_INTERVAL_MS)
+        if CHECKPOINT_DIR:
+            env.get_checkpoint_config().set_checkpoint_storage_dir(CHECKPOINT_DIR)
+    if STATE_BACKEND == "rocksdb":
+        env.set_state_backend(
+            EmbeddedRocksDBStateBackend(enable_incremental_checkpointing=True)
+        )
+    else:
+        env.set_state_backend(HashMapStateBackend())
+    for module in ("tick_codec.py", "anomaly.py", "indicators.py"):
+        env.add_python_file(os.path.join(MODULES_DIR, module))
+    if KAFKA_CONNECTOR_JAR:
+        env.add_jars(f"file://{KAFKA_CONNECTOR_JAR}")
+
+
+def build_pipeline(raw, parse_parallelism: int | None = None):
+    """raw: DataStream of RAW_CHARSET tick messages -> DataStream of JSON strings.
+
+    The process functions see each symbol's ticks in arrival order, which is
+    the source's order only while parsing is chained to it; set
+    `parse_parallelism` to the source's if that differs from PARALLELISM.
+    """
+    watermarks = WatermarkStrategy.for_bounded_out_of_orderness(
+        Duration.of_millis(MAX_OUT_OF_ORDERNESS_MS)
+    ).with_timestamp_assigner(TickTimestampAssigner())
+    ticks = raw.flat_map(parse_ticks, output_type=TICK_TYPE)
+    if parse_parallelism is not None:
+        ticks = ticks.set_parallelism(parse_parallelism)
+    keyed = ticks.assign_timestamps_and_watermarks(watermarks).key_by(
+        lambda tick: tick[0], key_type=Types.STRING()
+    )
+
+    outputs = [
+        keyed.window(SlidingEventTimeWindows.of(size, slide)).aggregate(
+            OhlcvAggregate(),
+            WindowResult(name),
+            output_type=Types.STRING(),
+        )
+        for name, (size, slide) in WINDOWS.items()
+    ]
+    outputs.append(keyed.process(IndicatorFunction(), output_type=Types.STRING()))
+    outputs.append(keyed.process(AnomalyFunction(), output_type=Types.STRING()))
+    return outputs[0].union(*outputs[1:])
+
+
+def run_kafka() -> None:
+    env = StreamExecutionEnvironment.get_execution_environment()
+    configure(env)
+
+    source = (
+        KafkaSource.builder()
+        .set_bootstrap_servers(KAFKA_BOOTSTRAP_SERVERS)
+        .set_topics(SOURCE_TOPIC)
+        .set_group_id(GROUP_ID)
+        .set_starting_offsets(KafkaOffsetsInitializer.earliest())
+        .set_value_only_deserializer(SimpleStringSchema(RAW_CHARSET))
+        .build()
+    )
+    sink = (
+        KafkaSink.builder()
+        .set_bootstrap_servers(KAFKA_BOOTSTRAP_SERVERS)
+        .set_record_serializer(
+            KafkaRecordSerializationSchema.builder()
+            .set_topic(SINK_TOPIC)
+            .set_value_serialization_schema(SimpleStringSchema())
+            .build()
+        )
+        .set_delivery_guarantee(DeliveryGuarantee.AT_LEAST_ONCE)
+        .build()
+    )
+
+    # Watermarks are assigned after parsing, since one message carries a batch.
+    raw = env.from_source(source, WatermarkStrategy.no_watermarks(), "Kafka Source")
+    build_pipeline(raw).sink_to(sink)
+    env.execute("stock-prices processor")
+
+
+def run_local() -> None:
+    """Run the pipeline on a local mini-cluster over a bounded source.
+
+    Messages alternate between the binary and the JSON encoding, and the ticks
+    cross a session boundary halfway through.
+    """
+    env = StreamExecutionEnvironment.get_execution_environment()
+    configure(env)
+
+    base = (1_700_000_000_000 // SESSION_MS + 1) * SESSION_MS - 300_000
+    messages = []
+    for i in range(600):
+        ticks = [
+            Tick(symbol, base + i * 1000, 100.0 + i % 7, "local", size=10.0)
+            for symbol in ("AAPL", "MSFT")
+        ]
+        encode = encode_batch if i % 2 else encode_json
+        messages.append(encode(ticks).decode(RAW_CHARSET))
+    raw = env.from_collection(messages, type_info=Types.STRING())
+    # from_collection is a single-task source.
+    outputs = build_pipeline(raw, parse_parallelism=1)
+    results = [json.loads(line) for line in outputs.execute_and_collect()]
+
+    windows = [r for r in results if r["type"] == "window"]
+    assert {r["symbol"] for r in windows} == {"AAPL", "MSFT"}
+    assert {r["window"] for r in windows} == set(WINDOWS)
+    full_minute = [r for r in windows if r["window"] == "1m" and r["count"] == 60]
+    assert full_minute, "expected complete 1m windows"
+    assert all(r["volume"] == 600.0 for r in full_minute)
+
+    indicators = [r for r in results if r["type"] == "indicators"]
+    assert len(indicators) == 2 * len(messages), "one indicator row per tick"
+    last = max((r for r in indicators if r["symbol"] == "AAPL"), key=lambda r: r["ts"])
+    # The 1m SMA at the last tick covers the last 60 one-second ticks.
+    expected = sum(100.0 + i % 7 for i in range(540, 600)) / 60
+    assert abs(last["sma_1m"] - expected) < 1e-9, last
+    # The close rolled to the last price of the first session, tick 299.
+    close = 100.0 + 299 % 7
+    assert abs(last["pct_change"] - (last["price"] - close) / close * 100) < 1e-9
+    anomalies = len(results) - len(windows) - len(indicators)
+    print(
+        f"✅ {len(windows)} window results, {len(indicators)} indicator rows, "
+        f"{anomalies} anomalies"
+    )
 
-ds = env.from_source(source, WatermarkStrategy.no_watermarks(), "Kafka Source")
-ds.print()
 
-env.execute("Kafka-PyFlink Example")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--local", action="store_true", help="bounded local run")
+    if parser.parse_args().local:
+        run_local()
+    else:
+        run_kafka()
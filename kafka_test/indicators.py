@@ -0,0 +1,193 @@
+"""Incremental per-symbol indicators: time-window SMA, EMA and % change.
+
+Each symbol keeps one ring buffer of (ts, price) covering the longest window,
+with a tail pointer and running sum per window, so an update appends once and
+evicts expired ticks from each window in amortized O(1). EMAs are time-aware
+(alpha = 1 - exp(-dt / window)) and need no history at all.
+
+`SymbolIndicators` is self-contained and picklable, so it can live in a PyFlink
+`ValueState` inside a `KeyedProcessFunction`; `IndicatorEngine` holds one per
+symbol for the plain consumer and updates whole decoded tick batches.
+"""
+
+import math
+from collections.abc import Sequence
+
+import numpy as np
+
+DEFAULT_WINDOWS = {"1m": 60_000, "5m": 300_000, "1h": 3_600_000}  # milliseconds
+
+
+def indicator_dtype(windows: Sequence[str]) -> np.dtype:
+    return np.dtype(
+        [("symbol", "<u2"), ("ts", "<i8"), ("price", "<f8")]
+        + [(f"sma_{name}", "<f8") for name in windows]
+        + [(f"ema_{name}", "<f8") for name in windows]
+        + [("pct_change", "<f8")]
+    )
+
+
+class SymbolIndicators:
+    __slots__ = (
+        "durations",
+        "longest",
+        "mask",
+        "ts",
+        "prices",
+        "head",
+        "tails",
+        "sums",
+        "emas",
+        "last_ts",
+        "close",
+    )
+
+    def __init__(self, durations: Sequence[int], capacity: int = 64):
+        self.durations = list(durations)
+        # The longest window's tail is the oldest tick still in the ring.
+        self.longest = self.durations.index(max(self.durations))
+        # Capacity stays a power of two, so slot = index & mask.
+        self.mask = (1 << max(capacity - 1, 1).bit_length()) - 1
+        self.ts = [0] * (self.mask + 1)
+        self.prices = [0.0] * (self.mask + 1)
+        # Absolute sequence numbers.
+        self.head = 0
+        self.tails = [0] * len(self.durations)
+        self.sums = [0.0] * len(self.durations)
+        self.emas = [0.0] * len(self.durations)
+        self.last_ts: int | None = None
+        self.close: float | None = None
+
+    @property
+    def capacity(self) -> int:
+        return self.mask + 1
+
+    def _grow(self) -> None:
+        old = self.mask
+        mask = old * 2 + 1
+        ts = [0] * (mask + 1)
+        prices = [0.0] * (mask + 1)
+        for index in range(self.tails[self.longest], self.head):
+            ts[index & mask] = self.ts[index & old]
+            prices[index & mask] = self.prices[index & old]
+        self.mask, self.ts, self.prices = mask, ts, prices
+
+    def update(self, ts: int, price: float) -> tuple[list[float], list[float], float]:
+        """Add a tick; returns (smas, emas, pct_change) after it."""
+        out: list[float] = []
+        self.update_into(ts, price, out)
+        n = len(self.durations)
+        return out[:n], out[n : 2 * n], out[-1]
+
+    def update_into(self, ts: int, price: float, out: list[float]) -> None:
+        """Add a tick; appends its smas, emas and pct_change to `out`.
+
+        The batch path calls this for every tick, so it is written for
+        CPython: locals over attributes and one pass over the windows.
+        """
+        head = self.head
+        tails = self.tails
+        if head - tails[self.longest] > self.mask:
+            self._grow()
+        mask = self.mask
+        ts_ring = self.ts
+        price_ring = self.prices
+        ts_ring[head & mask] = ts
+        price_ring[head & mask] = price
+        self.head = head + 1
+
+        sums = self.sums
+        emas = self.emas
+        last_ts = self.last_ts
+        self.last_ts = ts
+        if last_ts is None:
+            emas[:] = [price] * len(emas)
+            dt = 0
+        else:
+            dt = ts - last_ts if ts > last_ts else 0
+        i = 0
+        for duration in self.durations:
+            tail = tails[i]
+            total = sums[i] + price
+            cutoff = ts - duration
+            while tail < head and ts_ring[tail & mask] <= cutoff:
+                total -= price_ring[tail & mask]
+                tail += 1
+            if tail == head:
+                total = price  # reset float drift whenever the window restarts
+            tails[i] = tail
+            sums[i] = total
+            out.append(total / (head + 1 - tail))
+            if dt:
+                ema = emas[i]
+                emas[i] = ema + (1.0 - math.exp(-dt / duration)) * (price - ema)
+            i += 1
+        out.extend(emas)
+
+        close = self.close
+        if close is None:
+            close = self.close = price
+        out.append((price - close) / close * 100 if close else 0.0)
+
+    def roll_close(self) -> None:
+        """Start a new session: the last price becomes the close."""
+        if self.head:
+            self.close = self.prices[(self.head - 1) & self.mask]
+
+
+class IndicatorEngine:
+    def __init__(self, windows: dict[str, int] | None = None):
+        self.windows = windows or DEFAULT_WINDOWS
+        self.dtype = indicator_dtype(list(self.windows))
+        self.symbols: dict[str, SymbolIndicators] = {}
+
+    def state(self, symbol: str) -> SymbolIndicators:
+        state = self.symbols.get(symbol)
+        if state is None:
+            state = SymbolIndicators(list(self.windows.values()))
+            self.symbols[symbol] = state
+        return state
+
+    def set_close(self, symbol: str, price: float) -> None:
+        self.state(symbol).close = price
+
+    def roll_close(self) -> None:
+        """Start a new session: each symbol's last price becomes its close."""
+        for state in self.symbols.values():
+            state.roll_close()
+
+    def update(self, symbol: str, ts: int, price: float) -> dict:
+        smas, emas, pct_change = self.state(symbol).update(ts, price)
+        result = {"symbol": symbol, "ts": ts, "price": price}
+        for name, sma, ema in zip(self.windows, smas, emas, strict=True):
+            result[f"sma_{name}"] = sma
+            result[f"ema_{name}"] = ema
+        result["pct_change"] = pct_change
+        return result
+
+    def update_batch(self, records: np.ndarray, strings: Sequence[str]) -> np.ndarray:
+        """Update from a tick_codec TICK_DTYPE array (ticks in time order).
+
+        Returns one indicator row per tick; `symbol` indexes into `strings`.
+        """
+        states = {}
+        values: list[float] = []
+        for symbol, ts, price in zip(
+            records["symbol"].tolist(),
+            records["ts"].tolist(),
+            records["price"].tolist(),
+            strict=True,
+        ):
+            state = states.get(symbol)
+            if state is None:
+                state = states[symbol] = self.state(strings[symbol])
+            state.update_into(ts, price, values)
+
+        out = np.empty(len(records), dtype=self.dtype)
+        out["symbol"] = records["symbol"]
+        out["ts"] = records["ts"]
+        out["price"] = records["price"]
+        columns = np.array(values, dtype=np.float64).reshape(len(records), -1)
+        for i, name in enumerate(self.dtype.names[3:]):
+            out[name] = columns[:, i]
+        return out
@@ -1,27 +1,192 @@
-from confluent_kafka import Producer
+import asyncio
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
 
-# Configure producer
-conf = {"bootstrap.servers": "localhost:9092"}
+from confluent_kafka import KafkaException, Producer
 
-producer = Producer(conf)
+DEFAULT_CONFIG = {
+    "bootstrap.servers": "localhost:9092",
+    # Idempotent delivery: no duplicates or reordering on retries.
+    "enable.idempotence": True,
+    "acks": "all",
+    "linger.ms": 5,
+    "batch.size": 256 * 1024,
+    "compression.type": "lz4",
+    "queue.buffering.max.messages": 500_000,
+}
 
 
-# Delivery report callback
-def delivery_report(err, msg):
-    if err is not None:
-        print(f"❌ Delivery failed: {err}")
-    else:
-        print(f"✅ Message delivered to {msg.topic()} [{msg.partition()}]")
+@dataclass
+class ProducerMetrics:
+    enqueued: int = 0
+    delivered: int = 0
+    failed: int = 0
+    bytes: int = 0
+    backpressure_waits: int = 0
+    last_error: str | None = None
+    enqueue_latencies: deque = field(default_factory=lambda: deque(maxlen=10_000))
 
+    @property
+    def in_flight(self) -> int:
+        return self.enqueued - self.delivered - self.failed
 
-# Send messages
-for i in range(10, 15):
-    producer.produce(
-        topic="my_topic",
-        key=str(i),
-        value=f"hello world {i}",
-        callback=delivery_report,
-    )
+    def enqueue_latency_ms(self, percentile: float) -> float:
+        if not self.enqueue_latencies:
+            return 0.0
+        samples = sorted(self.enqueue_latencies)
+        index = min(len(samples) - 1, int(len(samples) * percentile / 100))
+        return samples[index] * 1000
 
-# Wait for any outstanding messages to be delivered
-producer.flush()
+    def snapshot(self) -> dict:
+        return {
+            "enqueued": self.enqueued,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "in_flight": self.in_flight,
+            "bytes": self.bytes,
+            "backpressure_waits": self.backpressure_waits,
+            "enqueue_p50_ms": self.enqueue_latency_ms(50),
+            "enqueue_p99_ms": self.enqueue_latency_ms(99),
+            "last_error": self.last_error,
+        }
+
+
+class AsyncProducer:
+    """asyncio wrapper around confluent_kafka.Producer.
+
+    A background thread polls for delivery reports. At most `max_in_flight`
+    messages may be awaiting delivery; `send` waits for a slot instead of
+    failing with BufferError when the buffer is full.
+    """
+
+    def __init__(
+        self,
+        config: dict | None = None,
+        max_in_flight: int = 100_000,
+        producer: Producer | None = None,
+    ):
+        self._producer = producer or Producer({**DEFAULT_CONFIG, **(config or {})})
+        self.max_in_flight = max_in_flight
+        self.metrics = ProducerMetrics()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._running = False
+        self._poller: threading.Thread | None = None
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._running = True
+        self._poller = threading.Thread(target=self._poll_loop, daemon=True)
+        self._poller.start()
+
+    async def close(self, timeout: float = 30.0) -> None:
+        await self.flush(timeout)
+        self._running = False
+        if self._poller is not None:
+            await asyncio.to_thread(self._poller.join)
+            self._poller = None
+
+    async def __aenter__(self) -> "AsyncProducer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    def _poll_loop(self) -> None:
+        while self._running:
+            self._producer.poll(0.05)
+
+    def _release(self, future: asyncio.Future | None, err, msg) -> None:
+        assert self._slots is not None
+        self._slots.release()
+        if err is not None:
+            self.metrics.failed += 1
+            self.metrics.last_error = str(err)
+            if future is not None and not future.done():
+                future.set_exception(KafkaException(err))
+            return
+        self.metrics.delivered += 1
+        if future is not None and not future.done():
+            future.set_result(msg)
+
+    def _on_delivery(self, future: asyncio.Future | None):
+        loop = self._loop
+        assert loop is not None
+
+        def callback(err, msg):
+            # Runs on the poll thread; hand the result back to the event loop.
+            loop.call_soon_threadsafe(self._release, future, err, msg)
+
+        return callback
+
+    async def _produce(
+        self,
+        topic: str,
+        value: bytes,
+        key: bytes | str | None,
+        future: asyncio.Future | None,
+    ) -> None:
+        if self._slots is None:
+            raise RuntimeError("AsyncProducer.start() must be awaited first")
+        started_at = time.perf_counter()
+        if self._slots.locked():
+            self.metrics.backpressure_waits += 1
+        await self._slots.acquire()
+        try:
+            while True:
+                try:
+                    self._producer.produce(
+                        topic,
+                        value=value,
+                        key=key,
+                        on_delivery=self._on_delivery(future),
+                    )
+                    break
+                except BufferError:
+                    # librdkafka's own queue is full; give the poll thread a
+                    # moment.
+                    self.metrics.backpressure_waits += 1
+                    await asyncio.sleep(0.001)
+        except BaseException:
+            # Never enqueued (KafkaException, bad arguments, cancellation), so
+            # no delivery report will come back to release the slot.
+            self._slots.release()
+            raise
+        self.metrics.enqueued += 1
+        self.metrics.bytes += len(value)
+        self.metrics.enqueue_latencies.append(time.perf_counter() - started_at)
+
+    async def send(
+        self, topic: str, value: bytes, key: bytes | str | None = None
+    ) -> None:
+        """Enqueue a message; returns once it is buffered, not delivered."""
+        await self._produce(topic, value, key, None)
+
+    async def send_and_wait(
+        self, topic: str, value: bytes, key: bytes | str | None = None
+    ):
+        """Enqueue a message and wait for its delivery report."""
+        assert self._loop is not None
+        future = self._loop.create_future()
+        await self._produce(topic, value, key, future)
+        return await future
+
+    async def flush(self, timeout: float = 30.0) -> int:
+        return await asyncio.to_thread(self._producer.flush, timeout)
+
+
+async def main():
+    async with AsyncProducer() as producer:
+        for i in range(10, 15):
+            await producer.send(
+                "my_topic", key=str(i), value=f"hello world {i}".encode()
+            )
+    print(producer.metrics.snapshot())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
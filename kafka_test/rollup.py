@@ -0,0 +1,223 @@
+"""OHLCV rollups from stock-prices into the partitioned `bars` table.
+
+Every consumed batch is rolled up in NumPy: ticks become 1m bars, 1m bars
+become 5m bars, 5m become 1h and 1h become 1d, so each resolution is built
+from the one below it and never rescans ticks. The batch's partial bars are
+then upserted with a merge (earliest open, latest close, max high, min low,
+summed volume/trades), which keeps the handler stateless: any worker process
+can take any partition's batch, and the database holds the running bar.
+
+Bars are keyed by symbol and stock-prices is partitioned by symbol, so two
+workers never upsert the same row concurrently. Delivery is at-least-once: a
+batch redelivered after a failed commit is counted twice. A lost database
+connection is reopened on the next batch, and the failed batch is retried
+until it is written rather than skipped.
+"""
+
+import os
+import signal
+from datetime import UTC, datetime
+
+import numpy as np
+from psycopg2.extras import execute_values
+
+from consumer import ConsumerRuntime, Record
+from db import CONNECTION_ERRORS, Connection
+from tick_codec import (
+    TICK_DTYPE,
+    StringTable,
+    decode_array,
+    decode_json,
+    encode_batch,
+)
+
+# Each resolution must divide the next one.
+RESOLUTIONS = {"1m": 60_000, "5m": 300_000, "1h": 3_600_000, "1d": 86_400_000}
+
+BAR_DTYPE = np.dtype(
+    [
+        ("symbol", "<u2"),
+        ("bucket", "<i8"),  # epoch milliseconds
+        ("open_ts", "<i8"),
+        ("close_ts", "<i8"),
+        ("open", "<f8"),
+        ("high", "<f8"),
+        ("low", "<f8"),
+        ("close", "<f8"),
+        ("volume", "<f8"),
+        ("trades", "<i8"),
+    ]
+)
+
+UPSERT_SQL = """
+    INSERT INTO bars AS b (
+        symbol, resolution, bucket, open_ts, close_ts,
+        open, high, low, close, volume, trades
+    )
+    VALUES %s
+    ON CONFLICT (symbol, resolution, bucket) DO UPDATE SET
+        open = CASE WHEN EXCLUDED.open_ts < b.open_ts
+            THEN EXCLUDED.open ELSE b.open END,
+        open_ts = LEAST(b.open_ts, EXCLUDED.open_ts),
+        close = CASE WHEN EXCLUDED.close_ts >= b.close_ts
+            THEN EXCLUDED.close ELSE b.close END,
+        close_ts = GREATEST(b.close_ts, EXCLUDED.close_ts),
+        high = GREATEST(b.high, EXCLUDED.high),
+        low = LEAST(b.low, EXCLUDED.low),
+        volume = b.volume + EXCLUDED.volume,
+        trades = b.trades + EXCLUDED.trades
+"""
+UPSERT_TEMPLATE = (
+    "(%s, %s, to_timestamp(%s / 1000.0), to_timestamp(%s / 1000.0), "
+    "to_timestamp(%s / 1000.0), %s, %s, %s, %s, %s, %s)"
+)
+
+
+def ticks_to_bars(records: np.ndarray) -> np.ndarray:
+    """One single-tick bar per TICK_DTYPE record; missing size counts as 0."""
+    bars = np.empty(len(records), dtype=BAR_DTYPE)
+    bars["symbol"] = records["symbol"]
+    for field in ("bucket", "open_ts", "close_ts"):
+        bars[field] = records["ts"]
+    for field in ("open", "high", "low", "close"):
+        bars[field] = records["price"]
+    bars["volume"] = np.nan_to_num(records["size"], nan=0.0)
+    bars["trades"] = 1
+    return bars
+
+
+def rollup(bars: np.ndarray, resolution_ms: int) -> np.ndarray:
+    """Aggregate bars (or single-tick bars) into `resolution_ms` buckets."""
+    if not len(bars):
+        return np.empty(0, dtype=BAR_DTYPE)
+    buckets = bars["bucket"] // resolution_ms * resolution_ms
+    # Input bars within a bucket never overlap, so open_ts order is time order.
+    order = np.lexsort((bars["open_ts"], buckets, bars["symbol"]))
+    bars = bars[order]
+    buckets = buckets[order]
+    symbols = bars["symbol"]
+    starts = np.flatnonzero(
+        np.r_[True, (symbols[1:] != symbols[:-1]) | (buckets[1:] != buckets[:-1])]
+    )
+    ends = np.r_[starts[1:], len(bars)] - 1
+
+    out = np.empty(len(starts), dtype=BAR_DTYPE)
+    out["symbol"] = symbols[starts]
+    out["bucket"] = buckets[starts]
+    out["open_ts"] = bars["open_ts"][starts]
+    out["open"] = bars["open"][starts]
+    out["close_ts"] = bars["close_ts"][ends]
+    out["close"] = bars["close"][ends]
+    out["high"] = np.maximum.reduceat(bars["high"], starts)
+    out["low"] = np.minimum.reduceat(bars["low"], starts)
+    out["volume"] = np.add.reduceat(bars["volume"], starts)
+    out["trades"] = np.add.reduceat(bars["trades"], starts)
+    return out
+
+
+def rollup_all(records: np.ndarray) -> dict[str, np.ndarray]:
+    """Bars for every resolution from one TICK_DTYPE batch."""
+    result = {}
+    bars = ticks_to_bars(records)
+    for name, resolution_ms in RESOLUTIONS.items():
+        bars = rollup(bars, resolution_ms)
+        result[name] = bars
+    return result
+
+
+def merge_records(values: list[bytes]) -> tuple[np.ndarray, list[str]]:
+    """Decode several tick messages into one array over a shared string table."""
+    table = StringTable()
+    arrays = []
+    for value in values:
+        if value[:1] in (b"{", b"["):
+            value = encode_batch(decode_json(value))
+        records, strings = decode_array(value)
+        mapping = np.array([table.intern(s) for s in strings], dtype="<u2")
+        records = records.copy()
+        if len(mapping):
+            records["symbol"] = mapping[records["symbol"]]
+        arrays.append(records)
+    if not arrays:
+        return np.empty(0, dtype=TICK_DTYPE), table.strings
+    return np.concatenate(arrays), table.strings
+
+
+class BarWriter:
+    """Upserts rolled-up bars, creating monthly `bars` partitions on first use."""
+
+    def __init__(self, dsn: str):
+        self._connection = Connection(dsn)
+        self._partitions: set[tuple[int, int]] = set()
+
+    def _ensure_partitions(self, cursor, buckets: np.ndarray) -> set[tuple[int, int]]:
+        months = {
+            (moment.year, moment.month)
+            for moment in (
+                datetime.fromtimestamp(ms / 1000, UTC)
+                for ms in np.unique(buckets // RESOLUTIONS["1d"] * RESOLUTIONS["1d"])
+            )
+        }
+        created = months - self._partitions
+        for year, month in sorted(created):
+            start = f"{year:04d}-{month:02d}-01"
+            end = f"{year + month // 12:04d}-{month % 12 + 1:02d}-01"
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS bars_{year:04d}_{month:02d} "
+                f"PARTITION OF bars FOR VALUES FROM ('{start}') TO ('{end}')"
+            )
+        return created
+
+    def write(self, bars: dict[str, np.ndarray], strings: list[str]) -> int:
+        # BAR_DTYPE field order matches UPSERT_TEMPLATE after symbol, resolution.
+        rows = [
+            (strings[symbol], name, *values)
+            for name, array in bars.items()
+            for symbol, *values in array.tolist()
+        ]
+        if not rows:
+            return 0
+        rows.sort(key=lambda row: row[:3])  # stable lock order
+        with self._connection.transaction() as cursor:
+            created = self._ensure_partitions(cursor, bars["1d"]["bucket"])
+            execute_values(
+                cursor, UPSERT_SQL, rows, template=UPSERT_TEMPLATE, page_size=1000
+            )
+        # Only remembered once committed; a rolled-back batch recreates them.
+        self._partitions |= created
+        return len(rows)
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+_writer: BarWriter | None = None
+
+
+def rollup_handler(topic: str, partition: int, records: list[Record]) -> int:
+    """ConsumerRuntime handler; one BarWriter connection per worker process."""
+    global _writer
+    if _writer is None:
+        _writer = BarWriter(os.environ["ROLLUP_DATABASE_URI"])
+    ticks, strings = merge_records([r.value for r in records if r.value])
+    return _writer.write(rollup_all(ticks), strings)
+
+
+def rollup_runtime(**kwargs) -> ConsumerRuntime:
+    return ConsumerRuntime(
+        ["stock-prices"],
+        rollup_handler,
+        config={"group.id": "rollup"},
+        batch_size=5000,
+        batch_timeout=1.0,
+        transient=CONNECTION_ERRORS,
+        **kwargs,
+    )
+
+
+if __name__ == "__main__":
+    runtime = rollup_runtime()
+    signal.signal(signal.SIGTERM, lambda *_: runtime.stop())
+    signal.signal(signal.SIGINT, lambda *_: runtime.stop())
+    runtime.run()
+    print(runtime.stats())
@@ -0,0 +1,444 @@
+"""Price alert matching: ticks from stock-prices against the backend's `rules`.
+
+Rules are indexed per symbol and kind in threshold-sorted lists. A tick moves
+the symbol's value (price, or % change against its close) from `previous` to
+`value`; the rules whose condition flips are exactly the thresholds between
+the two, found with two bisects. A tick costs O(log n + crossed) however many
+rules its symbol has.
+
+Each rule keeps one state byte: whether its condition currently holds. It
+fires when that goes from false to true and is re-armed when the value moves
+back, so an alert fires once per crossing, not once per tick above the line.
+A new rule starts in the state given by the symbol's last value, so creating
+"AAPL above 200" while AAPL trades at 210 waits for the next crossing.
+
+RuleSync mirrors the table into the engine by polling (updated_at, id). State
+is per process; stock-prices is keyed by symbol, so each symbol is matched by
+the one consumer that owns its partition. Triggers go to the backend's
+`alerts` outbox, which the API's alert dispatcher delivers.
+"""
+
+import os
+import signal
+import time
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime, timedelta
+from typing import NamedTuple
+
+import numpy as np
+from psycopg2.extras import execute_values
+
+from consumer import ConsumerRuntime, Record
+from db import CONNECTION_ERRORS, Connection
+from rollup import merge_records
+
+KINDS = ("price_above", "price_below", "change_above", "change_below")
+
+
+class Rule(NamedTuple):
+    id: str
+    user_id: str
+    symbol: str
+    kind: str
+    threshold: float
+
+
+class Trigger(NamedTuple):
+    rule: Rule
+    value: float
+    ts: int
+
+
+class RuleIndex:
+    """One symbol's rules of one kind, sorted by threshold, with their state."""
+
+    __slots__ = ("above", "rules", "thresholds", "state")
+
+    def __init__(self, rules: list[Rule], above: bool, value: float | None):
+        self.above = above
+        self.rules = sorted(rules, key=lambda rule: rule.threshold)
+        self.thresholds = [rule.threshold for rule in self.rules]
+        self.reset(value)
+
+    def reset(self, value: float | None) -> None:
+        """Set every rule's state from `value` without firing."""
+        self.state = bytearray(len(self.rules))
+        if value is None:
+            return
+        if self.above:  # holds for threshold < value
+            lo, hi = 0, bisect_left(self.thresholds, value)
+        else:  # holds for threshold > value
+            lo, hi = bisect_right(self.thresholds, value), len(self.thresholds)
+        self.state[lo:hi] = b"\x01" * (hi - lo)
+
+    def move(self, previous: float, value: float, ts: int, out: list[Trigger]):
+        if self.above:
+            lo = bisect_left(self.thresholds, previous)
+            hi = bisect_left(self.thresholds, value)
+        else:
+            lo = bisect_right(self.thresholds, value)
+            hi = bisect_right(self.thresholds, previous)
+        if lo < hi:  # [lo, hi) now holds
+            state = self.state
+            for i in range(lo, hi):
+                if not state[i]:
+                    state[i] = 1
+                    out.append(Trigger(self.rules[i], value, ts))
+        elif hi < lo:  # [hi, lo) no longer holds
+            self.state[hi:lo] = bytes(lo - hi)
+
+
+class SymbolRules:
+    __slots__ = ("rules", "price_indexes", "change_indexes", "price", "close", "dirty")
+
+    def __init__(self):
+        self.rules: dict[str, Rule] = {}
+        self.price_indexes: list[RuleIndex] = []
+        self.change_indexes: list[RuleIndex] = []
+        self.price: float | None = None
+        self.close: float | None = None
+        self.dirty = False
+
+    def change(self, price: float | None) -> float | None:
+        if price is None or not self.close:
+            return None
+        return (price / self.close - 1) * 100
+
+    def reset(self, price: float | None) -> None:
+        for index in self.price_indexes:
+            index.reset(price)
+        change = self.change(price)
+        for index in self.change_indexes:
+            index.reset(change)
+
+
+class RuleEngine:
+    """Single-threaded: call evaluate and the mutators from one thread."""
+
+    def __init__(self):
+        self.symbols: dict[str, SymbolRules] = {}
+        self.rules: dict[str, Rule] = {}
+        self.ticks = 0
+        self.triggers = 0
+        self.rebuilds = 0
+
+    def upsert(self, rule: Rule) -> None:
+        old = self.rules.get(rule.id)
+        if old == rule:
+            return
+        if old is not None and old.symbol != rule.symbol:
+            self.remove(rule.id)
+        self.rules[rule.id] = rule
+        entry = self.symbols.get(rule.symbol)
+        if entry is None:
+            entry = self.symbols[rule.symbol] = SymbolRules()
+        entry.rules[rule.id] = rule
+        entry.dirty = True
+
+    def remove(self, rule_id: str) -> None:
+        rule = self.rules.pop(rule_id, None)
+        if rule is not None:
+            entry = self.symbols[rule.symbol]
+            del entry.rules[rule_id]
+            entry.dirty = True
+
+    def load(self, rules: Iterable[Rule]) -> None:
+        for rule in rules:
+            self.upsert(rule)
+        self.build()
+
+    def _rebuild(self, entry: SymbolRules) -> None:
+        by_kind: dict[str, list[Rule]] = {}
+        for rule in entry.rules.values():
+            by_kind.setdefault(rule.kind, []).append(rule)
+        indexes = {
+            kind: RuleIndex(rules, kind.endswith("above"), None)
+            for kind, rules in by_kind.items()
+        }
+        entry.price_indexes = [
+            index for kind, index in indexes.items() if kind.startswith("price")
+        ]
+        entry.change_indexes = [
+            index for kind, index in indexes.items() if kind.startswith("change")
+        ]
+        entry.reset(entry.price)
+        entry.dirty = False
+        self.rebuilds += 1
+
+    def build(self) -> None:
+        """Rebuild every changed symbol now instead of on its next tick."""
+        for entry in self.symbols.values():
+            if entry.dirty:
+                self._rebuild(entry)
+
+    def set_close(self, symbol: str, price: float) -> None:
+        """Set the reference for % change rules; re-bases their state silently."""
+        entry = self.symbols.get(symbol)
+        if entry is None:
+            entry = self.symbols[symbol] = SymbolRules()
+        entry.close = price
+        entry.dirty = True
+
+    def evaluate(self, symbol: str, ts: int, price: float) -> list[Trigger]:
+        out: list[Trigger] = []
+        self._evaluate(symbol, ts, price, out)
+        return out
+
+    def _evaluate(self, symbol: str, ts: int, price: float, out: list[Trigger]):
+        self.ticks += 1
+        entry = self.symbols.get(symbol)
+        if entry is None:
+            return
+        previous = entry.price
+        if entry.close is None:
+            # No prior close (RuleSync found no daily bar): the first price
+            # seen is the reference.
+            entry.close = price
+        if entry.dirty:
+            self._rebuild(entry)  # states as of `previous`
+        entry.price = price
+        if previous is None:
+            entry.reset(price)
+            return
+        if price == previous:
+            return
+        before = len(out)
+        for index in entry.price_indexes:
+            index.move(previous, price, ts, out)
+        if entry.change_indexes and entry.close:
+            previous_change = entry.change(previous)
+            change = entry.change(price)
+            for index in entry.change_indexes:
+                index.move(previous_change, change, ts, out)
+        self.triggers += len(out) - before
+
+    def evaluate_batch(
+        self, records: np.ndarray, strings: Sequence[str]
+    ) -> list[Trigger]:
+        """Evaluate a tick_codec TICK_DTYPE array (ticks in time order)."""
+        out: list[Trigger] = []
+        for symbol, ts, price in zip(
+            records["symbol"].tolist(),
+            records["ts"].tolist(),
+            records["price"].tolist(),
+            strict=True,
+        ):
+            self._evaluate(strings[symbol], ts, price, out)
+        return out
+
+    def stats(self) -> dict:
+        return {
+            "rules": len(self.rules),
+            "symbols": len(self.symbols),
+            "ticks": self.ticks,
+            "triggers": self.triggers,
+            "rebuilds": self.rebuilds,
+        }
+
+
+SYNC_SQL = """
+    SELECT id::text, user_id::text, symbol, kind, threshold,
+        deleted_at IS NOT NULL, updated_at
+    FROM rules
+    WHERE (updated_at, id) > (%s, %s::uuid)
+    ORDER BY updated_at, id
+    LIMIT %s
+"""
+_ZERO_UUID = "00000000-0000-0000-0000-000000000000"
+
+# The last daily bar (kafka_test/rollup.py) before today is the prior close.
+CLOSE_SQL = """
+    SELECT DISTINCT ON (symbol) symbol, close
+    FROM bars
+    WHERE resolution = '1d' AND symbol = ANY(%s) AND bucket >= %s AND bucket < %s
+    ORDER BY symbol, bucket DESC
+"""
+# Far enough back to span weekends and holidays.
+CLOSE_LOOKBACK = timedelta(days=10)
+
+
+class RuleSync:
+    """Mirrors the `rules` table into a RuleEngine.
+
+    updated_at is the writing transaction's start time, so a row can commit
+    with a timestamp behind the last one seen. Each poll therefore re-reads
+    `overlap` back from the watermark; re-applying a rule is a no-op.
+
+    Each poll also sets the % change reference of symbols that do not have
+    one for the current UTC day yet, from the `bars` table.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        engine: RuleEngine,
+        interval: float = 5.0,
+        overlap: float = 60.0,
+        batch_size: int = 10000,
+    ):
+        self._connection = Connection(dsn, autocommit=True)
+        self.engine = engine
+        self.interval = interval
+        self.overlap = timedelta(seconds=overlap)
+        self.batch_size = batch_size
+        self.watermark: datetime | None = None
+        self._polled_at = 0.0
+        self._closes_day: datetime | None = None
+        self._closed: set[str] = set()
+
+    def poll(self) -> int:
+        """Apply every change since the watermark; returns rows applied."""
+        if self.watermark is None:
+            after = (datetime(1970, 1, 1, tzinfo=UTC), _ZERO_UUID)
+        else:
+            after = (self.watermark - self.overlap, _ZERO_UUID)
+        applied = 0
+        with self._connection.cursor() as cursor:
+            while True:
+                cursor.execute(SYNC_SQL, (*after, self.batch_size))
+                rows = cursor.fetchall()
+                for id, user_id, symbol, kind, threshold, deleted, _ in rows:
+                    if deleted or kind not in KINDS:
+                        self.engine.remove(id)
+                    else:
+                        self.engine.upsert(Rule(id, user_id, symbol, kind, threshold))
+                applied += len(rows)
+                if rows:
+                    after = (rows[-1][6], rows[-1][0])
+                    if self.watermark is None or after[0] > self.watermark:
+                        self.watermark = after[0]
+                if len(rows) < self.batch_size:
+                    break
+        self.poll_closes()
+        self._polled_at = time.monotonic()
+        return applied
+
+    def poll_closes(self) -> int:
+        """Set prior closes for symbols not yet looked up today; returns found."""
+        today = datetime.now(UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+        if today != self._closes_day:
+            self._closes_day = today
+            self._closed = set()
+        symbols = [
+            symbol for symbol in self.engine.symbols if symbol not in self._closed
+        ]
+        if not symbols:
+            return 0
+        with self._connection.cursor() as cursor:
+            cursor.execute(CLOSE_SQL, (symbols, today - CLOSE_LOOKBACK, today))
+            rows = cursor.fetchall()
+        for symbol, close in rows:
+            self.engine.set_close(symbol, close)
+        # Symbols with no daily bar keep falling back to their first price.
+        self._closed.update(symbols)
+        return len(rows)
+
+    def maybe_poll(self) -> int:
+        if time.monotonic() - self._polled_at < self.interval:
+            return 0
+        return self.poll()
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+ALERT_SQL = """
+    INSERT INTO alerts (
+        user_id, rule_id, symbol, kind, threshold, value, triggered_at
+    )
+    VALUES %s
+    ON CONFLICT ON CONSTRAINT uq_alerts_rule_id_ts DO NOTHING
+"""
+ALERT_TEMPLATE = "(%s, %s, %s, %s, %s, %s, to_timestamp(%s / 1000.0))"
+
+
+class AlertWriter:
+    """Writes triggers into the backend's `alerts` outbox.
+
+    The handler returns, and the batch's offsets are committed, only after
+    this commits; a redelivered batch re-inserts nothing thanks to the
+    (rule_id, triggered_at) constraint.
+    """
+
+    def __init__(self, dsn: str):
+        self._connection = Connection(dsn)
+
+    def write(self, triggers: list[Trigger]) -> int:
+        if not triggers:
+            return 0
+        rows = [
+            (
+                trigger.rule.user_id,
+                trigger.rule.id,
+                trigger.rule.symbol,
+                trigger.rule.kind,
+                trigger.rule.threshold,
+                trigger.value,
+                trigger.ts,
+            )
+            for trigger in triggers
+        ]
+        with self._connection.transaction() as cursor:
+            execute_values(
+                cursor, ALERT_SQL, rows, template=ALERT_TEMPLATE, page_size=1000
+            )
+        return len(rows)
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+_engine = RuleEngine()
+_sync: RuleSync | None = None
+_writer: AlertWriter | None = None
+# Per partition: the next offset the engine has not seen, and the triggers
+# evaluated but not yet written. evaluate_batch moves rule state, so a batch
+# whose write failed is not evaluated again on redelivery; only the write is
+# retried, with whatever its new records add.
+_evaluated: dict[tuple[str, int], int] = {}
+_pending: dict[tuple[str, int], list[Trigger]] = {}
+
+
+def rules_handler(topic: str, partition: int, records: list[Record]) -> int:
+    """ConsumerRuntime handler; needs a single-threaded in-process executor."""
+    global _sync, _writer
+    if _sync is None:
+        _sync = RuleSync(os.environ["RULES_DATABASE_URI"], _engine)
+        _writer = AlertWriter(os.environ["RULES_DATABASE_URI"])
+    _sync.maybe_poll()
+    key = (topic, partition)
+    triggers = _pending.pop(key, [])
+    start = _evaluated.get(key, -1)
+    fresh = [r.value for r in records if r.offset >= start and r.value]
+    if fresh:
+        ticks, strings = merge_records(fresh)
+        triggers += _engine.evaluate_batch(ticks, strings)
+    if records:
+        _evaluated[key] = max(start, records[-1].offset + 1)
+    try:
+        return _writer.write(triggers)
+    except Exception:
+        _pending[key] = triggers
+        raise
+
+
+def rules_runtime() -> ConsumerRuntime:
+    # Engine state lives in this process, so partitions are handled in order
+    # on one thread rather than on the default process pool.
+    return ConsumerRuntime(
+        ["stock-prices"],
+        rules_handler,
+        config={"group.id": "rules"},
+        executor=ThreadPoolExecutor(max_workers=1),
+        transient=CONNECTION_ERRORS,
+    )
+
+
+if __name__ == "__main__":
+    runtime = rules_runtime()
+    signal.signal(signal.SIGTERM, lambda *_: runtime.stop())
+    signal.signal(signal.SIGINT, lambda *_: runtime.stop())
+    runtime.run()
+    print(runtime.stats(), _engine.stats())
@@ -0,0 +1,446 @@
+"""Supervised worker processes for the fetcher and consumer roles.
+
+The supervisor runs `count` processes per role. Worker `index` of `count`
+owns the symbols with crc32(symbol) % count == index, so fetchers split the
+universe without coordinating. Kafka consumers already share partitions
+through their group.
+
+- Workers report a processed count and a heartbeat through shared memory.
+  The heartbeat is the last time the worker's main loop checked in, so a
+  worker that dies, or hangs and lets its heartbeat go stale, is restarted with
+  exponential backoff. The backoff resets once a worker has stayed up for
+  `stable_after` seconds.
+- SIGTERM/SIGINT (or "stop" on the control socket) sets every worker's stop
+  event and waits `drain_timeout` for in-flight work to finish before
+  terminating stragglers.
+- A Unix control socket answers "stats" with per-worker JSON metrics.
+
+    python supervisor.py run --role dummy=4 --role fetcher=2
+    python supervisor.py stats
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+import zlib
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from functools import partial
+
+SUPERVISOR_SOCKET = os.getenv("SUPERVISOR_SOCKET", "/tmp/stock-supervisor.sock")
+
+# spawn: workers must not inherit the supervisor's threads and sockets.
+_mp = multiprocessing.get_context("spawn")
+
+
+class WorkerContext:
+    def __init__(self, role: str, index: int, count: int, stop, processed, heartbeat):
+        self.role = role
+        self.index = index
+        self.count = count
+        self.stop = stop
+        self._processed = processed
+        self._heartbeat = heartbeat
+
+    @property
+    def stopping(self) -> bool:
+        return self.stop.is_set()
+
+    def owns(self, symbol: str) -> bool:
+        return zlib.crc32(symbol.encode()) % self.count == self.index
+
+    def partition(self, symbols: Iterable[str]) -> list[str]:
+        return [symbol for symbol in symbols if self.owns(symbol)]
+
+    def report(self, processed: int, heartbeat: float | None = None) -> None:
+        """Publish the total processed so far and the heartbeat (default now)."""
+        self._processed.value = processed
+        self._heartbeat.value = time.time() if heartbeat is None else heartbeat
+
+    def watch(
+        self,
+        progress: Callable[[], int],
+        heartbeat: Callable[[], float],
+        on_stop: Callable[[], None],
+        interval: float = 1.0,
+    ) -> threading.Thread:
+        """Report `progress()` every `interval` and call `on_stop` once stopping.
+
+        `heartbeat()` is the wall-clock time the worker's main loop last checked
+        in; it is forwarded rather than stamped here, so a worker whose loop
+        hangs goes stale even though this thread keeps running.
+        """
+
+        def loop():
+            while not self.stop.wait(interval):
+                self.report(progress(), heartbeat())
+            on_stop()
+            self.report(progress(), heartbeat())
+
+        thread = threading.Thread(target=loop, name="supervisor-watch", daemon=True)
+        thread.start()
+        return thread
+
+
+Target = Callable[[WorkerContext], None]
+
+
+@dataclass(frozen=True)
+class Role:
+    name: str
+    target: Target
+    count: int = 1
+
+
+def _worker_main(role, target, index, count, stop, processed, heartbeat) -> None:
+    # Ctrl-C reaches the whole process group; only the supervisor reacts to it.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    context = WorkerContext(role, index, count, stop, processed, heartbeat)
+    context.report(0)
+    target(context)
+
+
+class Worker:
+    def __init__(self, role: Role, index: int):
+        self.role = role
+        self.index = index
+        self.process = None
+        self.stop = _mp.Event()
+        self.processed = _mp.Value("q", 0, lock=False)
+        self.heartbeat = _mp.Value("d", 0.0, lock=False)
+        self.started_at = 0.0
+        self.restarts = 0
+        self.backoff = 0.0
+        self.restart_at: float | None = None
+        self.last_exitcode: int | None = None
+        self.total = 0  # processed by earlier incarnations
+        self.rate = 0.0
+        self._last_sample = (0, 0.0)
+
+    @property
+    def name(self) -> str:
+        return f"{self.role.name}-{self.index}"
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def start(self) -> None:
+        self.stop.clear()
+        self.processed.value = 0
+        self.heartbeat.value = time.time()
+        self.process = _mp.Process(
+            target=_worker_main,
+            args=(
+                self.role.name,
+                self.role.target,
+                self.index,
+                self.role.count,
+                self.stop,
+                self.processed,
+                self.heartbeat,
+            ),
+            name=self.name,
+            daemon=False,
+        )
+        self.process.start()
+        self.started_at = time.monotonic()
+        self.restart_at = None
+        self._last_sample = (0, self.started_at)
+
+    def sample(self, now: float) -> None:
+        processed = self.processed.value
+        last_processed, last_time = self._last_sample
+        if now > last_time:
+            rate = (processed - last_processed) / (now - last_time)
+            self.rate = rate if self.rate == 0 else 0.7 * self.rate + 0.3 * rate
+        self._last_sample = (processed, now)
+
+    def stats(self) -> dict:
+        return {
+            "pid": self.process.pid if self.process is not None else None,
+            "alive": self.alive,
+            "processed": self.total + self.processed.value,
+            "rate": round(self.rate, 1),
+            "heartbeat_age": (
+                round(time.time() - self.heartbeat.value, 2) if self.alive else None
+            ),
+            "uptime": round(time.monotonic() - self.started_at, 1) if self.alive else 0,
+            "restarts": self.restarts,
+            "last_exitcode": self.last_exitcode,
+        }
+
+
+class Supervisor:
+    def __init__(
+        self,
+        roles: Iterable[Role],
+        socket_path: str = SUPERVISOR_SOCKET,
+        heartbeat_timeout: float = 30.0,
+        drain_timeout: float = 10.0,
+        backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        stable_after: float = 30.0,
+    ):
+        self.workers = [
+            Worker(role, index) for role in roles for index in range(role.count)
+        ]
+        self.socket_path = socket_path
+        self.heartbeat_timeout = heartbeat_timeout
+        self.drain_timeout = drain_timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.started_at = time.monotonic()
+        self._stop_requested = threading.Event()
+        self._server: socketserver.BaseServer | None = None
+
+    def start(self) -> None:
+        for worker in self.workers:
+            worker.start()
+        self._serve_control()
+
+    def _on_exit(self, worker: Worker, now: float) -> None:
+        worker.last_exitcode = worker.process.exitcode
+        worker.total += worker.processed.value
+        worker.process = None
+        worker.rate = 0.0
+        if now - worker.started_at >= self.stable_after:
+            worker.backoff = 0.0
+        worker.backoff = min(self.max_backoff, worker.backoff * 2 or self.backoff)
+        worker.restart_at = now + worker.backoff
+        print(
+            f"❌ {worker.name} exited with {worker.last_exitcode}, "
+            f"restarting in {worker.backoff:.1f}s"
+        )
+
+    def check(self) -> None:
+        now = time.monotonic()
+        for worker in self.workers:
+            if worker.process is not None:
+                if not worker.process.is_alive():
+                    worker.process.join()
+                    self._on_exit(worker, now)
+                    continue
+                worker.sample(now)
+                if time.time() - worker.heartbeat.value > self.heartbeat_timeout:
+                    print(f"❌ {worker.name} heartbeat is stale, killing it")
+                    worker.process.kill()
+            elif worker.restart_at is not None and now >= worker.restart_at:
+                worker.restarts += 1
+                worker.start()
+
+    def stats(self) -> dict:
+        return {
+            "uptime": round(time.monotonic() - self.started_at, 1),
+            "stopping": self._stop_requested.is_set(),
+            "workers": {worker.name: worker.stats() for worker in self.workers},
+        }
+
+    def request_stop(self) -> None:
+        self._stop_requested.set()
+
+    def shutdown(self) -> None:
+        """Ask every worker to drain, then terminate whatever is left."""
+        running = [worker for worker in self.workers if worker.process is not None]
+        for worker in running:
+            worker.stop.set()
+        deadline = time.monotonic() + self.drain_timeout
+        for worker in running:
+            worker.process.join(max(0.0, deadline - time.monotonic()))
+        for worker in running:
+            if worker.process.is_alive():
+                print(f"❌ {worker.name} did not drain in time, terminating")
+                worker.process.terminate()
+                worker.process.join(5)
+                if worker.process.is_alive():
+                    worker.process.kill()
+                    worker.process.join()
+            worker.last_exitcode = worker.process.exitcode
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def run(self, interval: float = 0.5) -> None:
+        signal.signal(signal.SIGTERM, lambda *_: self.request_stop())
+        signal.signal(signal.SIGINT, lambda *_: self.request_stop())
+        self.start()
+        try:
+            while not self._stop_requested.wait(interval):
+                self.check()
+        finally:
+            self.shutdown()
+
+    def _serve_control(self) -> None:
+        supervisor = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                command = self.rfile.readline().decode().strip()
+                if command == "stats":
+                    response = supervisor.stats()
+                elif command == "stop":
+                    supervisor.request_stop()
+                    response = {"stopping": True}
+                else:
+                    response = {"error": f"unknown command {command!r}"}
+                self.wfile.write(json.dumps(response).encode() + b"\n")
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        self._server.daemon_threads = True
+        threading.Thread(
+            target=self._server.serve_forever, name="supervisor-control", daemon=True
+        ).start()
+
+
+def control(command: str, socket_path: str = SUPERVISOR_SOCKET) -> dict:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall(command.encode() + b"\n")
+        return json.loads(client.makefile().readline())
+
+
+def dummy_worker(
+    context: WorkerContext,
+    symbols: int = 1000,
+    per_second: int = 1000,
+    crash_after: float | None = None,
+) -> None:
+    """Processes its share of SYM0..SYMn; crashes after `crash_after` seconds."""
+    owned = context.partition(f"SYM{i}" for i in range(symbols))
+    started_at = time.monotonic()
+    processed = 0
+    while not context.stopping:
+        time.sleep(0.01)
+        processed += per_second // 100
+        context.report(processed)
+        if crash_after is not None and time.monotonic() - started_at > crash_after:
+            raise RuntimeError(f"dummy crash in {context.role}-{context.index}")
+    time.sleep(0.1)  # pretend to drain in-flight work
+    context.report(processed)
+    print(f"✅ {context.role}-{context.index} drained after {processed} ({len(owned)})")
+
+
+def fetcher_worker(context: WorkerContext, symbols: int = 5000) -> None:
+    import asyncio
+
+    from fetcher import Fetcher, Provider
+    from producer import AsyncProducer
+
+    async def main():
+        provider = Provider(
+            "stub",
+            os.getenv("FETCHER_PROVIDER_URL", "http://127.0.0.1:8080/quotes"),
+            rate=float(os.getenv("FETCHER_RATE", 100)) / context.count,
+            burst=10,
+        )
+        universe = context.partition(f"SYM{i}" for i in range(symbols))
+        async with AsyncProducer() as producer:
+            async with Fetcher(universe, [provider], producer) as fetcher:
+                loop = asyncio.get_running_loop()
+                context.watch(
+                    lambda: fetcher.metrics.ticks,
+                    lambda: fetcher.metrics.checked_in,
+                    lambda: loop.call_soon_threadsafe(fetcher.stop),
+                )
+                await fetcher.run()
+
+    asyncio.run(main())
+
+
+def rollup_worker(context: WorkerContext) -> None:
+    from concurrent.futures import ThreadPoolExecutor
+
+    from rollup import rollup_runtime
+
+    # One process per worker already; handle partitions on threads in-process.
+    runtime = rollup_runtime(executor=ThreadPoolExecutor(max_workers=1))
+    context.watch(
+        lambda: runtime.metrics.messages,
+        lambda: runtime.metrics.checked_in,
+        runtime.stop,
+    )
+    runtime.run()
+
+
+def ticks_worker(context: WorkerContext) -> None:
+    from concurrent.futures import ThreadPoolExecutor
+
+    from tick_writer import ticks_runtime
+
+    # One process per worker already; handle partitions on threads in-process.
+    runtime = ticks_runtime(executor=ThreadPoolExecutor(max_workers=1))
+    context.watch(
+        lambda: runtime.metrics.messages,
+        lambda: runtime.metrics.checked_in,
+        runtime.stop,
+    )
+    runtime.run()
+
+
+def rules_worker(context: WorkerContext) -> None:
+    from rule_engine import rules_runtime
+
+    runtime = rules_runtime()
+    context.watch(
+        lambda: runtime.metrics.messages,
+        lambda: runtime.metrics.checked_in,
+        runtime.stop,
+    )
+    runtime.run()
+
+
+ROLES: dict[str, Target] = {
+    "dummy": dummy_worker,
+    "dummy-crash": partial(dummy_worker, crash_after=3.0),
+    "fetcher": fetcher_worker,
+    "rollup": rollup_worker,
+    "rules": rules_worker,
+    "ticks": ticks_worker,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--socket", default=SUPERVISOR_SOCKET)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run")
+    run_parser.add_argument(
+        "--role",
+        action="append",
+        default=[],
+        help=f"NAME=COUNT, NAME one of {', '.join(ROLES)}",
+    )
+    run_parser.add_argument("--drain-timeout", type=float, default=10.0)
+    subparsers.add_parser("stats")
+    subparsers.add_parser("stop")
+    args = parser.parse_args()
+
+    if args.command != "run":
+        print(json.dumps(control(args.command, args.socket), indent=2))
+        return
+    roles = []
+    for spec in args.role or ["dummy=2"]:
+        name, _, count = spec.partition("=")
+        roles.append(Role(name, ROLES[name], int(count or 1)))
+    supervisor = Supervisor(
+        roles, socket_path=args.socket, drain_timeout=args.drain_timeout
+    )
+    supervisor.run()
+    print(json.dumps(supervisor.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
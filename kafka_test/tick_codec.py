@@ -0,0 +1,137 @@
+"""Wire format for the stock-prices topic.
+
+A message carries a batch of ticks:
+
+    header   "<4sHI"  magic b"TCK1", string count, tick count
+    strings  per string: uint8 length + utf-8 bytes (symbols, exchanges, sources)
+    records  tick count * TICK_DTYPE, little-endian
+
+String fields are interned into the per-message string table and stored as
+uint16 indices, so a symbol repeated across a batch costs two bytes. Missing
+`size` is NaN and missing `exchange` is NO_STRING. Messages starting with `{`
+or `[` are the JSON debug encoding and are decoded transparently.
+"""
+
+import json
+import struct
+import sys
+from collections.abc import Iterable, Sequence
+from dataclasses import asdict, dataclass
+
+import numpy as np
+
+MAGIC = b"TCK1"
+HEADER = struct.Struct("<4sHI")
+NO_STRING = 0xFFFF
+
+TICK_DTYPE = np.dtype(
+    [
+        ("symbol", "<u2"),
+        ("exchange", "<u2"),
+        ("source", "<u2"),
+        ("ts", "<i8"),  # epoch milliseconds
+        ("price", "<f8"),
+        ("size", "<f8"),
+    ]
+)
+
+
+@dataclass(slots=True)
+class Tick:
+    symbol: str
+    ts: int
+    price: float
+    source: str
+    size: float | None = None
+    exchange: str | None = None
+
+
+class StringTable:
+    def __init__(self, strings: Iterable[str] = ()):
+        self.strings: list[str] = []
+        self._index: dict[str, int] = {}
+        for string in strings:
+            self.intern(string)
+
+    def intern(self, string: str | None) -> int:
+        if string is None:
+            return NO_STRING
+        index = self._index.get(string)
+        if index is None:
+            index = len(self.strings)
+            if index >= NO_STRING:
+                raise ValueError("Too many distinct strings in one batch")
+            self._index[string] = index
+            self.strings.append(string)
+        return index
+
+
+def encode_array(records: np.ndarray, strings: Sequence[str]) -> bytes:
+    """Encode a TICK_DTYPE array whose string fields index into `strings`."""
+    parts = [HEADER.pack(MAGIC, len(strings), len(records))]
+    for string in strings:
+        data = string.encode("utf-8")
+        if len(data) > 255:
+            raise ValueError(f"String too long to encode: {string!r}")
+        parts.append(bytes((len(data),)))
+        parts.append(data)
+    parts.append(np.ascontiguousarray(records, dtype=TICK_DTYPE).tobytes())
+    return b"".join(parts)
+
+
+def decode_array(data: bytes) -> tuple[np.ndarray, list[str]]:
+    """Decode a binary message into a read-only TICK_DTYPE view and its strings."""
+    magic, string_count, tick_count = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a binary tick message")
+    offset = HEADER.size
+    strings = []
+    for _ in range(string_count):
+        length = data[offset]
+        offset += 1
+        strings.append(sys.intern(data[offset : offset + length].decode("utf-8")))
+        offset += length
+    records = np.frombuffer(data, dtype=TICK_DTYPE, count=tick_count, offset=offset)
+    return records, strings
+
+
+def encode_batch(ticks: Sequence[Tick]) -> bytes:
+    table = StringTable()
+    records = np.empty(len(ticks), dtype=TICK_DTYPE)
+    records["symbol"] = [table.intern(tick.symbol) for tick in ticks]
+    records["exchange"] = [table.intern(tick.exchange) for tick in ticks]
+    records["source"] = [table.intern(tick.source) for tick in ticks]
+    records["ts"] = [tick.ts for tick in ticks]
+    records["price"] = [tick.price for tick in ticks]
+    records["size"] = [np.nan if tick.size is None else tick.size for tick in ticks]
+    return encode_array(records, table.strings)
+
+
+def decode_batch(data: bytes) -> list[Tick]:
+    if data[:1] in (b"{", b"["):
+        return decode_json(data)
+    records, strings = decode_array(data)
+    ticks = []
+    for symbol, exchange, source, ts, price, size in records.tolist():
+        ticks.append(
+            Tick(
+                symbol=strings[symbol],
+                ts=ts,
+                price=price,
+                source=strings[source],
+                size=None if size != size else size,  # NaN check
+                exchange=None if exchange == NO_STRING else strings[exchange],
+            )
+        )
+    return ticks
+
+
+def encode_json(ticks: Sequence[Tick]) -> bytes:
+    return json.dumps([asdict(tick) for tick in ticks]).encode("utf-8")
+
+
+def decode_json(data: bytes) -> list[Tick]:
+    payload = json.loads(data)
+    if isinstance(payload, dict):
+        payload = [payload]
+    return [Tick(**tick) for tick in payload]
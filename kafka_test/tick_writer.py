@@ -0,0 +1,84 @@
+"""Ticks from stock-prices into the backend's tick store (app/core/tick_store.py).
+
+Each batch is merged into one tick array, split by symbol and appended with one
+TickStore.append per symbol, which writes one segment (three files) per UTC
+day touched. An append costs about a millisecond however few ticks it holds,
+so throughput is set by ticks per symbol per batch, and the runtime here
+consumes large, slow batches (`bench.py ticks`). The store compacts a day once
+it has too many segments.
+
+TickStore needs a single writer per symbol. stock-prices is keyed by symbol and
+ConsumerRuntime pins each partition to one process, so a symbol is only written
+by the process that owns its partition; after a rebalance the new owner picks
+the symbol's segments up from disk. The API reads the same TICK_STORE_DIR.
+Delivery is at-least-once: a batch redelivered after a failed commit is
+appended twice.
+"""
+
+import os
+import signal
+import sys
+
+import numpy as np
+from fastapi import HTTPException
+
+from consumer import ConsumerRuntime, Record
+from rollup import merge_records
+
+BACKEND_DIR = os.getenv(
+    "BACKEND_DIR",
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"
+    ),
+)
+# Appended: backend/bench.py must not shadow this directory's bench.py.
+sys.path.append(BACKEND_DIR)
+
+from app.core.tick_store import TICK_STORE_DIR, TickStore  # noqa: E402
+
+TICK_WRITER_BATCH_SIZE = int(os.getenv("TICK_WRITER_BATCH_SIZE", 50_000))
+TICK_WRITER_BATCH_TIMEOUT = float(os.getenv("TICK_WRITER_BATCH_TIMEOUT", 30.0))
+
+_store: TickStore | None = None
+
+
+def ticks_handler(topic: str, partition: int, records: list[Record]) -> int:
+    """ConsumerRuntime handler; one TickStore per worker process."""
+    global _store
+    if _store is None:
+        _store = TickStore(TICK_STORE_DIR)
+    ticks, strings = merge_records([r.value for r in records if r.value])
+    if not len(ticks):
+        return 0
+    ticks = ticks[np.argsort(ticks["symbol"], kind="stable")]
+    symbols = ticks["symbol"]
+    starts = np.flatnonzero(np.r_[True, symbols[1:] != symbols[:-1]])
+    ends = np.r_[starts[1:], len(ticks)]
+    written = 0
+    for start, end in zip(starts.tolist(), ends.tolist(), strict=True):
+        rows = ticks[start:end]
+        symbol = strings[symbols[start]]
+        try:
+            written += _store.append(symbol, rows["ts"], rows["price"], rows["size"])
+        except HTTPException:
+            print(f"⚠️ Skipping {end - start} ticks with invalid symbol {symbol!r}")
+    return written
+
+
+def ticks_runtime(**kwargs) -> ConsumerRuntime:
+    return ConsumerRuntime(
+        ["stock-prices"],
+        ticks_handler,
+        config={"group.id": "tick-store"},
+        batch_size=TICK_WRITER_BATCH_SIZE,
+        batch_timeout=TICK_WRITER_BATCH_TIMEOUT,
+        **kwargs,
+    )
+
+
+if __name__ == "__main__":
+    runtime = ticks_runtime()
+    signal.signal(signal.SIGTERM, lambda *_: runtime.stop())
+    signal.signal(signal.SIGINT, lambda *_: runtime.stop())
+    runtime.run()
+    print(runtime.stats())